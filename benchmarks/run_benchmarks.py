@@ -0,0 +1,367 @@
+"""Benchmarks of the pipeline stages on synthetic matches of increasing size.
+
+Every stage is run once to measure the wall time and once more under
+tracemalloc to measure the peak memory. Stages suffixed with _compact run on
+the data loaded with the compact numpy types. Results are compared against the
+stored baseline and the stages slower or bigger than the baseline by more
+than the threshold are reported as regressions.
+
+    python -m benchmarks.run_benchmarks --sizes 10min 90min
+    python -m benchmarks.run_benchmarks --update-baseline
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_match, generate_season
+from src.analysis.ball_tracker import compute_ball_trajectory_between_events
+from src.analysis.heatmap import compute_heatmaps
+from src.analysis.pass_network import compute_pass_networks
+from src.analysis.pass_pressure import compute_pass_pressure
+from src.analysis.pass_statistics import (
+    compute_pass_status,
+    compute_player_stats,
+    find_most_pass_completing_player,
+    find_most_passing_player,
+)
+from src.analysis.player_motion import compute_player_motion
+from src.analysis.possession import compute_possessions
+from src.batch import MATCH_COL, find_match_dirs, run_batch
+from src.main import load_csv_data
+from src.metadata import CompactEvent, CompactTrackedPosition, Event, EventType, TrackedPosition
+from src.utils import event_utils
+from src.utils.cleaning import TrackingCleaner
+from src.utils.tracking_index import load_time_index, load_tracking_range
+
+BENCHMARKS_DIR: Path = Path(__file__).parent
+BASELINE_PATH: Path = BENCHMARKS_DIR / "baseline.json"
+DATA_DIR: Path = BENCHMARKS_DIR / "data"
+
+# Size name: (number of matches, minutes of every match)
+SIZES: Dict[str, Tuple[int, float]] = {
+    "10min": (1, 10),
+    "45min": (1, 45),
+    "90min": (1, 90),
+    "season": (4, 90),
+}
+
+Measurements = Dict[str, Dict[str, float]]
+
+# Changes smaller than these are noise and never a regression.
+MIN_REGRESSION: Dict[str, float] = {"time_s": 0.05, "peak_mb": 5.0}
+
+
+def measure(measurements: Measurements, stage: str, func: Callable[[], Any]) -> Any:
+    """Run the stage and record its wall time and peak memory.
+
+    Parameters
+    ----------
+    measurements : Measurements
+        Measurements of the stages to record to.
+    stage : str
+        Name of the stage
+    func : Callable[[], Any]
+        Stage to run, it is run twice.
+
+    Returns
+    -------
+    Any
+        Result of the stage
+    """
+    start: float = time.perf_counter()
+    result: Any = func()
+    wall_time: float = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    measurements[stage] = {"time_s": round(wall_time, 4), "peak_mb": round(peak / 2**20, 2)}
+    return result
+
+
+def benchmark_match(match_dir: Path) -> Measurements:
+    """Benchmark the stages of the pipeline on the match.
+
+    Parameters
+    ----------
+    match_dir : Path
+        Directory containing the events.csv and tracking.csv of the match.
+
+    Returns
+    -------
+    Measurements
+        Wall time and peak memory of every stage.
+    """
+    events_csv: Path = match_dir / "events.csv"
+    tracking_csv: Path = match_dir / "tracking.csv"
+    measurements: Measurements = {}
+
+    events_df: pd.DataFrame = measure(
+        measurements, "load_events", lambda: load_csv_data(events_csv, Event.column_types())
+    )
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracked_pos_df: pd.DataFrame = measure(
+        measurements,
+        "load_tracking",
+        lambda: load_csv_data(tracking_csv, TrackedPosition.column_types()),
+    )
+    # Warm up the cache before measuring the cached load.
+    load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True)
+    measure(
+        measurements,
+        "load_tracking_cached",
+        lambda: load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True),
+    )
+
+    _benchmark_tracking_range(measurements, events_df, tracking_csv)
+
+    tracked_pos_df = measure(
+        measurements, "clean_tracking", lambda: TrackingCleaner().clean(tracked_pos_df)
+    )
+
+    measure(measurements, "compute_player_motion", lambda: compute_player_motion(tracked_pos_df))
+    measure(measurements, "compute_heatmaps", lambda: compute_heatmaps(tracked_pos_df))
+
+    events_with_positions: pd.DataFrame = measure(
+        measurements,
+        "add_position_to_event",
+        lambda: event_utils.add_position_to_event(events_df, tracked_pos_df),
+    )
+    measure(
+        measurements,
+        "ball_trajectory",
+        lambda: compute_ball_trajectory_between_events(
+            events_with_positions, (EventType.KICK_OFF, 0), (EventType.BALL_OUT_OF_PLAY, 0)
+        ),
+    )
+    events_with_pass_status: pd.DataFrame = measure(
+        measurements, "compute_pass_status", lambda: compute_pass_status(events_with_positions)
+    )
+    measure(measurements, "compute_possessions", lambda: compute_possessions(events_with_positions))
+    measure(
+        measurements,
+        "compute_pass_networks",
+        lambda: compute_pass_networks(events_with_pass_status),
+    )
+    measure(
+        measurements,
+        "compute_pass_pressure",
+        lambda: compute_pass_pressure(events_with_pass_status, tracked_pos_df),
+    )
+    measure(
+        measurements,
+        "find_most_passing_player",
+        lambda: find_most_passing_player(events_with_pass_status),
+    )
+    measure(
+        measurements,
+        "compute_player_stats",
+        lambda: compute_player_stats(events_with_pass_status),
+    )
+    measure(
+        measurements,
+        "find_most_pass_completing_player",
+        lambda: find_most_pass_completing_player(events_with_pass_status),
+    )
+
+    _benchmark_compact_dtypes(measurements, events_csv, tracking_csv)
+
+    return measurements
+
+
+def _benchmark_tracking_range(
+    measurements: Measurements, events_df: pd.DataFrame, tracking_csv: Path
+) -> None:
+    """Benchmark loading the tracking from the kickoff to the first Ball Out of Play."""
+    start_time, end_time = (
+        int(events_df.loc[events_df[Event.event] == event, Event.time].iloc[0])
+        for event in [EventType.KICK_OFF, EventType.BALL_OUT_OF_PLAY]
+    )
+    columns: List[str] = [
+        TrackedPosition.time,
+        TrackedPosition.player_id,
+        TrackedPosition.x,
+        TrackedPosition.y,
+    ]
+    # Warm up the time index before measuring the indexed load.
+    load_time_index(tracking_csv)
+    measure(
+        measurements,
+        "load_tracking_range",
+        lambda: load_tracking_range(tracking_csv, start_time, end_time, columns, use_cache=False),
+    )
+    measure(
+        measurements,
+        "load_tracking_range_cached",
+        lambda: load_tracking_range(tracking_csv, start_time, end_time, columns),
+    )
+
+
+def _benchmark_compact_dtypes(
+    measurements: Measurements, events_csv: Path, tracking_csv: Path
+) -> None:
+    """Benchmark the stages that depend on the column types with the compact numpy types."""
+    events_df: pd.DataFrame = load_csv_data(events_csv, CompactEvent.column_types())
+    events_df = event_utils.convert_event_time_to_ms(
+        events_df, CompactTrackedPosition.column_types()[TrackedPosition.time]
+    )
+    tracked_pos_df: pd.DataFrame = TrackingCleaner().clean(
+        measure(
+            measurements,
+            "load_tracking_compact",
+            lambda: load_csv_data(tracking_csv, CompactTrackedPosition.column_types()),
+        )
+    )
+    measure(
+        measurements,
+        "compute_player_motion_compact",
+        lambda: compute_player_motion(tracked_pos_df),
+    )
+    events_with_positions: pd.DataFrame = measure(
+        measurements,
+        "add_position_to_event_compact",
+        lambda: event_utils.add_position_to_event(events_df, tracked_pos_df),
+    )
+    events_with_pass_status: pd.DataFrame = compute_pass_status(events_with_positions)
+    measure(
+        measurements,
+        "find_most_passing_player_compact",
+        lambda: find_most_passing_player(events_with_pass_status),
+    )
+    measure(
+        measurements,
+        "find_most_pass_completing_player_compact",
+        lambda: find_most_pass_completing_player(events_with_pass_status),
+    )
+
+
+def benchmark_season(season_dir: Path) -> Measurements:
+    """Benchmark the batch analysis of the matches of the season.
+
+    Peak memory is of the main process only, the matches are analysed in worker processes.
+    """
+    measurements: Measurements = {}
+    measure(measurements, "run_batch", lambda: run_batch(season_dir))
+
+    season_events_df: pd.DataFrame = pd.concat(
+        [
+            load_csv_data(match_dir / "events.csv", Event.column_types()).assign(
+                **{MATCH_COL: str(match_dir)}
+            )
+            for match_dir in find_match_dirs(season_dir)
+        ],
+        ignore_index=True,
+    )
+    measure(
+        measurements,
+        "compute_possessions",
+        lambda: compute_possessions(season_events_df, match_col=MATCH_COL),
+    )
+    return measurements
+
+
+def run_benchmarks(sizes: List[str], data_dir: Path = DATA_DIR) -> Dict[str, Measurements]:
+    """Benchmark the pipeline at the given sizes, generating the data when missing.
+
+    Parameters
+    ----------
+    sizes : List[str]
+        Names of the sizes in SIZES
+    data_dir : Path, optional
+        Directory of the generated data, by default DATA_DIR
+
+    Returns
+    -------
+    Dict[str, Measurements]
+        Measurements of every size
+    """
+    results: Dict[str, Measurements] = {}
+    for size in sizes:
+        n_matches, minutes = SIZES[size]
+        size_dir: Path = data_dir / size
+        if n_matches == 1:
+            if not (size_dir / "tracking.csv").is_file():
+                generate_match(size_dir, minutes)
+            results[size] = benchmark_match(size_dir)
+        else:
+            if not (size_dir / f"match_{n_matches - 1:03d}" / "tracking.csv").is_file():
+                generate_season(size_dir, n_matches, minutes)
+            results[size] = benchmark_season(size_dir)
+
+    return results
+
+
+def compare_with_baseline(
+    results: Dict[str, Measurements], baseline: Dict[str, Measurements], threshold: float
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Compare the measurements with the baseline.
+
+    Parameters
+    ----------
+    results : Dict[str, Measurements]
+    baseline : Dict[str, Measurements]
+    threshold : float
+        Ratio to the baseline above which a measurement is a regression, when the
+        change is also above MIN_REGRESSION.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, List[str]]
+        (table of the measurements and their ratio to the baseline, regressions)
+    """
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for size, measurements in results.items():
+        for stage, measurement in measurements.items():
+            row: Dict[str, Any] = {"size": size, "stage": stage, **measurement}
+            base: Dict[str, float] = baseline.get(size, {}).get(stage, {})
+            for metric, value in measurement.items():
+                ratio: float = value / base[metric] if base.get(metric) else float("nan")
+                row[f"{metric}_ratio"] = round(ratio, 2)
+                if ratio > threshold and value - base[metric] > MIN_REGRESSION[metric]:
+                    regressions.append(f"{size}/{stage} {metric}: {value} vs {base[metric]}")
+            rows.append(row)
+
+    return pd.DataFrame(rows), regressions
+
+
+def main(*args: str) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=SIZES.keys(), default=list(SIZES)[:3])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    options = parser.parse_args(args)
+
+    results: Dict[str, Measurements] = run_benchmarks(options.sizes, options.data_dir)
+    baseline: Dict[str, Measurements] = (
+        json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.is_file() else {}
+    )
+
+    table, regressions = compare_with_baseline(results, baseline, options.threshold)
+    print(table.to_string(index=False))
+
+    if options.update_baseline:
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"Updated the baseline {BASELINE_PATH}")
+        return 0
+
+    for regression in regressions:
+        print(f"Regression: {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
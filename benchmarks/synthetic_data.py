@@ -0,0 +1,249 @@
+"""Module generating synthetic match data in the layout of the real datasets.
+
+Tracking data has a delimiter row followed by the position of the 22 players
+every 40ms frame. Events follow a simple model of the play: passes that are
+received, intercepted or cleared, crosses, shots and restarts after the ball
+goes out of play. Players move on the pitch with a smoothed random walk.
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from src.metadata import PITCH_LENGTH, PITCH_WIDTH, EventType
+
+FRAMES_PER_SECOND: int = 25
+# Time of the first event in seconds, events and tracking are aligned from it.
+EVENTS_START_TIME: float = 625.68
+
+EVENTS_HEADER: List[str] = ["event_id", "half_time", "time", "player_id", "team_id", "event"]
+TRACKING_HEADER: List[str] = ["id_half", "t", "id_actor", "id_team", "x", "y"]
+
+# Next event after an event: (event, probability, by the same team)
+_TRANSITIONS: Dict[str, List[Tuple[str, float, bool]]] = {
+    EventType.KICK_OFF: [(EventType.PASS, 1.0, True)],
+    EventType.PASS: [
+        (EventType.RECEPTION, 0.72, True),
+        (EventType.PASS, 0.05, True),
+        (EventType.INTERCEPTION, 0.1, False),
+        (EventType.CLEARANCE, 0.08, False),
+        (EventType.BALL_OUT_OF_PLAY, 0.05, True),
+    ],
+    EventType.CROSS: [
+        (EventType.RECEPTION, 0.35, True),
+        (EventType.CLEARANCE, 0.35, False),
+        (EventType.INTERCEPTION, 0.2, False),
+        (EventType.BALL_OUT_OF_PLAY, 0.1, True),
+    ],
+    EventType.RECEPTION: [
+        (EventType.PASS, 0.6, True),
+        (EventType.CROSS, 0.08, True),
+        (EventType.BALL_PROGRESSION, 0.15, True),
+        (EventType.DEFENSIVE_EVENT, 0.12, False),
+        (EventType.ATTEMPT_AT_GOAL, 0.05, True),
+    ],
+    EventType.BALL_PROGRESSION: [(EventType.PASS, 0.8, True), (EventType.CROSS, 0.2, True)],
+    EventType.DEFENSIVE_EVENT: [
+        (EventType.INTERCEPTION, 0.5, True),
+        (EventType.PASS, 0.3, False),
+        (EventType.BALL_OUT_OF_PLAY, 0.2, True),
+    ],
+    EventType.INTERCEPTION: [(EventType.PASS, 1.0, True)],
+    EventType.CLEARANCE: [
+        (EventType.RECEPTION, 0.5, True),
+        (EventType.RECEPTION, 0.3, False),
+        (EventType.BALL_OUT_OF_PLAY, 0.2, True),
+    ],
+    EventType.ATTEMPT_AT_GOAL: [
+        (EventType.GOALKICK, 0.5, False),
+        (EventType.CORNER, 0.3, False),
+        (EventType.BALL_OUT_OF_PLAY, 0.2, True),
+    ],
+    EventType.BALL_OUT_OF_PLAY: [
+        (EventType.THROW_IN, 0.6, True),
+        (EventType.FREEKICK, 0.2, True),
+        (EventType.CORNER, 0.1, True),
+        (EventType.GOALKICK, 0.1, True),
+    ],
+    EventType.THROW_IN: [(EventType.PASS, 1.0, True)],
+    EventType.FREEKICK: [(EventType.PASS, 0.8, True), (EventType.CROSS, 0.2, True)],
+    EventType.CORNER: [(EventType.CROSS, 1.0, True)],
+    EventType.GOALKICK: [(EventType.PASS, 1.0, True)],
+}
+
+_PASS_EVENTS: List[str] = [EventType.PASS, EventType.CROSS]
+# Events made by the player who has the ball.
+_ON_THE_BALL_EVENTS: List[str] = [
+    EventType.PASS,
+    EventType.CROSS,
+    EventType.BALL_PROGRESSION,
+    EventType.ATTEMPT_AT_GOAL,
+]
+
+
+def _teams(seed: int) -> Dict[int, np.ndarray]:
+    """Return two teams of 11 players with ids unique to the seed."""
+    return {
+        1_000_000 + seed * 10 + 1: 100_000 + seed * 100 + np.arange(11),
+        1_000_000 + seed * 10 + 2: 100_000 + seed * 100 + 50 + np.arange(11),
+    }
+
+
+def generate_tracking(minutes: float, seed: int = 0) -> pd.DataFrame:
+    """Return the tracking data of the match.
+
+    Parameters
+    ----------
+    minutes : float
+        Duration of the match
+    seed : int, optional
+        Seed of the random numbers, by default 0
+
+    Returns
+    -------
+    pd.DataFrame
+        Tracking data with the columns of the tracking.csv
+    """
+    rng = np.random.default_rng(seed)
+    teams = _teams(seed)
+    n_frames: int = int(minutes * 60 * FRAMES_PER_SECOND)
+    player_ids: np.ndarray = np.concatenate(list(teams.values()))
+    team_ids: np.ndarray = np.repeat(list(teams.keys()), 11)
+
+    # Players move with a velocity that changes smoothly, about 2m/s on average.
+    velocity: np.ndarray = lfilter(
+        [1.0], [1.0, -0.98], rng.normal(0, 1.6, size=(n_frames, 22, 2)), axis=0
+    )
+    start: np.ndarray = rng.uniform([0, 0], [PITCH_LENGTH, PITCH_WIDTH], size=(22, 2))
+    coords: np.ndarray = start + velocity.cumsum(axis=0)
+    # Reflect at the pitch boundaries, a few positions stay slightly outside.
+    for axis, size in enumerate([PITCH_LENGTH, PITCH_WIDTH]):
+        coords[..., axis] = size - np.abs(np.mod(coords[..., axis], 2 * size) - size)
+    coords += rng.normal(0, 5.0, size=coords.shape)
+
+    time_ms: np.ndarray = np.arange(n_frames) * 1000 // FRAMES_PER_SECOND
+    half_time: np.ndarray = np.where(time_ms < 45 * 60 * 1000, 1, 2)
+    rows: np.ndarray = np.empty((n_frames, 23, 6), dtype=np.int64)
+    rows[:, :, 0] = half_time[:, np.newaxis]
+    rows[:, :, 1] = time_ms[:, np.newaxis]
+    rows[:, 0, 2:] = -1
+    rows[:, 1:, 2] = player_ids
+    rows[:, 1:, 3] = team_ids
+    rows[:, 1:, 4:] = np.round(coords).astype(np.int64)
+
+    return pd.DataFrame(rows.reshape(-1, 6), columns=TRACKING_HEADER)
+
+
+def generate_events(minutes: float, seed: int = 0) -> pd.DataFrame:
+    """Return the events of the match.
+
+    Parameters
+    ----------
+    minutes : float
+        Duration of the match
+    seed : int, optional
+        Seed of the random numbers, by default 0
+
+    Returns
+    -------
+    pd.DataFrame
+        Events with the columns of the events.csv
+    """
+    rng = np.random.default_rng(seed + 1)
+    teams = _teams(seed)
+    team_ids: List[int] = list(teams.keys())
+    duration: float = minutes * 60
+
+    rows: List[List] = []
+    event: str = EventType.KICK_OFF
+    team: int = 0
+    player_id: int = int(teams[team_ids[team]][9])
+    elapsed: float = 0.0
+
+    while elapsed < duration:
+        half_time: int = 1 if elapsed < 45 * 60 else 2
+        if event == EventType.BALL_OUT_OF_PLAY:
+            rows.append([len(rows), half_time, elapsed, None, None, event])
+        else:
+            rows.append([len(rows), half_time, elapsed, player_id, team_ids[team], event])
+
+        transitions = _TRANSITIONS[event]
+        probabilities: np.ndarray = np.array([prob for _, prob, _ in transitions])
+        next_event, _, same_team = transitions[
+            rng.choice(len(transitions), p=probabilities / probabilities.sum())
+        ]
+        if not same_team:
+            team = 1 - team
+
+        keeps_ball: bool = (
+            same_team and next_event in _ON_THE_BALL_EVENTS and event not in _PASS_EVENTS
+        )
+        if not keeps_ball:
+            team_player_ids: np.ndarray = teams[team_ids[team]]
+            player_id = int(rng.choice(team_player_ids[team_player_ids != player_id]))
+
+        event = next_event
+        elapsed = round(elapsed + rng.exponential(2.5), 2)
+
+    events_df: pd.DataFrame = pd.DataFrame(rows, columns=EVENTS_HEADER)
+    events_df["time"] = (events_df["time"] + EVENTS_START_TIME).round(2)
+    return events_df.astype({"player_id": "Int64", "team_id": "Int64"})
+
+
+def generate_match(match_dir: Path, minutes: float, seed: int = 0) -> Tuple[Path, Path]:
+    """Write the events.csv and tracking.csv of a synthetic match.
+
+    Parameters
+    ----------
+    match_dir : Path
+        Directory to write the match data to.
+    minutes : float
+        Duration of the match
+    seed : int, optional
+        Seed of the random numbers, by default 0
+
+    Returns
+    -------
+    Tuple[Path, Path]
+        (events csv path, tracking csv path)
+    """
+    match_dir.mkdir(parents=True, exist_ok=True)
+    events_csv: Path = match_dir / "events.csv"
+    tracking_csv: Path = match_dir / "tracking.csv"
+
+    generate_events(minutes, seed).to_csv(events_csv, index=False)
+    generate_tracking(minutes, seed).to_csv(tracking_csv, index=False, chunksize=23 * 25 * 60)
+
+    return events_csv, tracking_csv
+
+
+def generate_season(root_dir: Path, n_matches: int, minutes: float = 90) -> List[Path]:
+    """Write the data of the synthetic matches of a season.
+
+    Parameters
+    ----------
+    root_dir : Path
+        Directory to write the match directories to.
+    n_matches : int
+        Number of matches
+    minutes : float, optional
+        Duration of every match, by default 90
+
+    Returns
+    -------
+    List[Path]
+        Directories of the matches.
+    """
+    match_dirs: List[Path] = [root_dir / f"match_{seed:03d}" for seed in range(n_matches)]
+    for seed, match_dir in enumerate(match_dirs):
+        generate_match(match_dir, minutes, seed)
+
+    return match_dirs
+
+
+if __name__ == "__main__":
+    generate_match(Path(sys.argv[1]), float(sys.argv[2]) if len(sys.argv) > 2 else 90)
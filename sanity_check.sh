@@ -3,12 +3,12 @@
 set -eu
 
 echo "Running black"
-python -m black -t py38 -l 100 --check src tests
+python -m black -t py38 -l 100 --check src tests benchmarks
 echo "Running isort"
-python -m isort --py 38 --check src tests
+python -m isort --py 38 --check src tests benchmarks
 echo "Running flake8"
-python -m flake8 src tests
+python -m flake8 src tests benchmarks
 echo "Running mypy"
-python -m mypy src tests
+python -m mypy src tests benchmarks
 echo "Running pytest"
 python -m pytest tests
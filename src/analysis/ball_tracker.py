@@ -9,20 +9,193 @@ This is relatively cheaper to compute but still provides a good approximation.
 frames(40ms apart) would exist and note the player with the ball at that timeframe.
 This involves too much computation given player position is tracked every 40ms.
 
-I went ahead with approach 1.
+I went ahead with approach 1. The distance covered by the ball up to every
+event is precomputed once as a prefix sum over the event sequence, so the
+length of the trajectory between any two events is a subtraction.
+
+Approach 2 is available as TrajectoryMode.FRAMES when the tracking data is
+available as a TrackingStore. The carrier of every frame is looked up for the
+whole match at once and the distance covered frame by frame is precomputed
+as a prefix sum in the same way.
 """
-from typing import Tuple
+
+from enum import Enum
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from scipy.spatial import distance
 
-from src.metadata import Event
-from src.utils.event_utils import get_event_id_for, get_events_between
+from src.metadata import Event, TrackedPosition
+from src.utils.event_utils import EventIndex, event_frame_numbers
+from src.utils.tracking_store import DELIMITER_PLAYER_ID, TrackingStore
+
+
+class TrajectoryMode(Enum):
+    # Distance between the positions of the successive events.
+    EVENTS = "events"
+    # Distance covered by the ball carrier every frame between the events.
+    FRAMES = "frames"
+
+
+def _prefix_distance(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the number of known positions before every point and their cumulative distance.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Points of shape (n, 2), NaN when the position is not known.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        (known positions before every point, cumulative distance over the known positions)
+    """
+    has_position: np.ndarray = ~np.isnan(coords).any(axis=1)
+    steps: np.ndarray = np.hypot(*np.diff(coords[has_position], axis=0).T)
+
+    return (
+        np.concatenate([[0], np.cumsum(has_position)]),
+        np.concatenate([[0.0], np.cumsum(steps)]),
+    )
+
+
+def _distance_between(
+    positions_before: np.ndarray, cumulative_distance: np.ndarray, points: slice
+) -> float:
+    """Return the distance covered over the known positions in the given points."""
+    first: int = int(positions_before[points.start])
+    last: int = int(positions_before[points.stop]) - 1
+
+    if last <= first:
+        return 0.0
+
+    return float(cumulative_distance[last] - cumulative_distance[first])
+
+
+class BallTrajectoryIndex:
+    """Cumulative distance covered by the ball over the sequence of events.
+
+    Events without a known position are skipped, the ball is considered to
+    move straight between the surrounding events with a known position.
+    """
+
+    _event_index: EventIndex
+    _positions_before: np.ndarray
+    _cumulative_distance: np.ndarray
+    _event_frames: np.ndarray
+    _frame_positions_before: Optional[np.ndarray] = None
+    _frame_cumulative_distance: Optional[np.ndarray] = None
+
+    def __init__(
+        self,
+        events_df: pd.DataFrame,
+        event_index: Optional[EventIndex] = None,
+        tracking_store: Optional[TrackingStore] = None,
+    ) -> None:
+        """Build the cumulative distance of the events.
+
+        Parameters
+        ----------
+        events_df : pd.DataFrame
+            Events in the soccer game with the position of the players.
+        event_index : Optional[EventIndex], optional
+            Index of the events, built from events_df if not given.
+        tracking_store : Optional[TrackingStore], optional
+            Position of the players every frame, required for TrajectoryMode.FRAMES
+        """
+        self._event_index = EventIndex(events_df) if event_index is None else event_index
+        sorted_events_df: pd.DataFrame = self._event_index.events_df
+
+        self._positions_before, self._cumulative_distance = _prefix_distance(
+            sorted_events_df[[TrackedPosition.x, TrackedPosition.y]].to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+        )
+
+        self._event_frames = np.maximum.accumulate(event_frame_numbers(sorted_events_df))
+        if tracking_store is not None and len(self._event_frames) > 0:
+            self._frame_positions_before, self._frame_cumulative_distance = _prefix_distance(
+                self._carrier_positions(sorted_events_df, tracking_store)
+            )
+
+    def _carrier_positions(
+        self, sorted_events_df: pd.DataFrame, tracking_store: TrackingStore
+    ) -> np.ndarray:
+        """Return the position of the ball carrier every frame from the first to the last event.
+
+        The player of the latest event is the carrier, events without a player
+        keep the carrier of the previous event.
+        """
+        player_ids: np.ndarray = sorted_events_df[Event.player_id].to_numpy(
+            dtype=np.int64, na_value=DELIMITER_PLAYER_ID
+        )
+        has_player: np.ndarray = player_ids != DELIMITER_PLAYER_ID
+        last_player_event: np.ndarray = np.maximum.accumulate(
+            np.where(has_player, np.arange(len(player_ids)), 0)
+        )
+        carriers: np.ndarray = np.where(
+            has_player[last_player_event], player_ids[last_player_event], DELIMITER_PLAYER_ID
+        )
+
+        frames: np.ndarray = np.arange(self._event_frames[0], self._event_frames[-1] + 1)
+        frame_events: np.ndarray = np.searchsorted(self._event_frames, frames, side="right") - 1
+        coords, found = tracking_store.lookup(frames, carriers[frame_events])
+
+        return np.where(found[:, np.newaxis], coords, np.nan)
+
+    @property
+    def event_index(self) -> EventIndex:
+        return self._event_index
+
+    def distance_between_ids(
+        self, event_id1: int, event_id2: int, mode: TrajectoryMode = TrajectoryMode.EVENTS
+    ) -> float:
+        """Return the distance covered by the ball over the events between the given events.
+
+        Parameters
+        ----------
+        event_id1 : int
+        event_id2 : int
+        mode : TrajectoryMode, optional
+            How the trajectory is followed, by default TrajectoryMode.EVENTS
+
+        Returns
+        -------
+        float
+            Distance in the units of the positions.
+
+        Raises
+        ------
+        ValueError
+            When the frames mode is requested for an index built without the tracking store.
+        """
+        events: slice = self._event_index.positions_between(event_id1, event_id2)
+        if mode == TrajectoryMode.EVENTS:
+            return _distance_between(self._positions_before, self._cumulative_distance, events)
+
+        if events.stop <= events.start:
+            return 0.0
+
+        if self._frame_positions_before is None or self._frame_cumulative_distance is None:
+            raise ValueError("Frames trajectory requires the index built with the tracking store")
+
+        first_frame: int = int(self._event_frames[0])
+        frames: slice = slice(
+            int(self._event_frames[events.start]) - first_frame,
+            int(self._event_frames[events.stop - 1]) - first_frame + 1,
+        )
+        return _distance_between(
+            self._frame_positions_before, self._frame_cumulative_distance, frames
+        )
 
 
 def compute_ball_trajectory_between_events(
-    events_df: pd.DataFrame, event1: Tuple[str, int], event2: Tuple[str, int]
+    events_df: pd.DataFrame,
+    event1: Tuple[str, int],
+    event2: Tuple[str, int],
+    trajectory_index: Optional[BallTrajectoryIndex] = None,
+    mode: TrajectoryMode = TrajectoryMode.EVENTS,
+    tracking_store: Optional[TrackingStore] = None,
 ) -> float:
     """Compute the length of the ball trajectory between the given events
 
@@ -34,24 +207,28 @@ def compute_ball_trajectory_between_events(
         Start event
     event2 : Tuple[str, int]
         End event
+    trajectory_index : Optional[BallTrajectoryIndex], optional
+        Index to reuse across queries, built from events_df if not given.
+    mode : TrajectoryMode, optional
+        How the trajectory is followed, by default TrajectoryMode.EVENTS
+    tracking_store : Optional[TrackingStore], optional
+        Position of the players every frame, required to build the index for
+        TrajectoryMode.FRAMES
 
     Returns
     -------
     float
         Length of the ball trajectory in meters.
     """
-    event1_id: int = get_event_id_for(events_df, event_name=event1[0], n=event1[1])
-    event2_id: int = get_event_id_for(events_df, event_name=event2[0], n=event2[1])
-
-    subevents_df: pd.DataFrame = get_events_between(events_df, event1_id, event2_id)
-    subevents_df.sort_values(by=Event.event_id, ascending=True, inplace=True)
+    if trajectory_index is None:
+        trajectory_index = BallTrajectoryIndex(events_df, tracking_store=tracking_store)
 
-    ball_trajectory_length: float = 0.0
+    event_index: EventIndex = trajectory_index.event_index
+    event1_id: int = event_index.event_id_for(event_name=event1[0], n=event1[1])
+    event2_id: int = event_index.event_id_for(event_name=event2[0], n=event2[1])
 
-    for window in subevents_df.rolling(window=2):
-        if len(window) == 2:
-            coords_1 = [(window.iloc[0]["x"], window.iloc[0]["y"])]
-            coords_2 = [(window.iloc[1]["x"], window.iloc[1]["y"])]
-            ball_trajectory_length += distance.cdist(coords_1, coords_2, metric="euclidean")[0, 0]
+    ball_trajectory_length: float = trajectory_index.distance_between_ids(
+        event1_id, event2_id, mode
+    )
 
     return np.round(ball_trajectory_length / 100.0, 2)
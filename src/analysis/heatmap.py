@@ -0,0 +1,253 @@
+"""Module providing the positional heatmaps of the players and the teams.
+
+The pitch is divided into a grid of cells and the heatmap of a player is the
+number of tracked frames of the player in every cell. The heatmaps of all
+the players are counted at once with a single bincount of the combined
+player and cell index of every tracked position.
+
+Heatmaps are kept per (team, player) along with the sorted ids, heatmaps on
+the same grid are summed by aligning the ids. So the heatmaps are computed
+a chunk of the tracking data at a time, saved per match and summed over the
+matches of a season.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import MISSING_ID, PITCH_LENGTH, PITCH_WIDTH, TrackedPosition
+from src.utils.event_utils import FRAME_INTERVAL_MS
+
+# Cells along the length and the width of the pitch, 5m x 4.9m cells.
+DEFAULT_GRID: Tuple[int, int] = (21, 14)
+
+
+class PlayerHeatmaps:
+    """Frames of every player in every cell of the grid over the pitch."""
+
+    # Team and player id of every heatmap, sorted by the team and the player.
+    team_ids: np.ndarray
+    player_ids: np.ndarray
+    # Frames of team_ids[i], player_ids[i] in the cell [x, y] at [i, x, y].
+    frames: np.ndarray
+
+    def __init__(self, team_ids: np.ndarray, player_ids: np.ndarray, frames: np.ndarray) -> None:
+        """Create the heatmaps.
+
+        Parameters
+        ----------
+        team_ids : np.ndarray
+        player_ids : np.ndarray
+            Team and player id of every heatmap, sorted by the team and the player
+        frames : np.ndarray
+            Frames in the cells of every heatmap, of shape (players, x cells, y cells)
+
+        Raises
+        ------
+        ValueError
+            When the shape of the frames doesn't match the players.
+        """
+        if frames.ndim != 3 or not len(team_ids) == len(player_ids) == frames.shape[0]:
+            raise ValueError(
+                f"Frames of shape {frames.shape} don't match the {len(player_ids)} players"
+            )
+
+        self.team_ids = np.asarray(team_ids, dtype=np.int64)
+        self.player_ids = np.asarray(player_ids, dtype=np.int64)
+        self.frames = np.asarray(frames, dtype=np.int64)
+
+    @classmethod
+    def empty(cls, grid: Tuple[int, int] = DEFAULT_GRID) -> "PlayerHeatmaps":
+        """Return the heatmaps without any players on the grid."""
+        _check_grid(grid)
+        return cls(np.empty(0), np.empty(0), np.zeros((0, *grid), dtype=np.int64))
+
+    @classmethod
+    def from_positions(
+        cls, positions_df: pd.DataFrame, grid: Tuple[int, int] = DEFAULT_GRID
+    ) -> "PlayerHeatmaps":
+        """Count the frames of the players in the cells of the grid.
+
+        Parameters
+        ----------
+        positions_df : pd.DataFrame
+            Position of the players, with or without the delimiter rows. Positions
+            outside the pitch are counted in the nearest cell.
+        grid : Tuple[int, int], optional
+            Cells along the length and the width of the pitch, by default DEFAULT_GRID
+
+        Returns
+        -------
+        PlayerHeatmaps
+        """
+        _check_grid(grid)
+        player_ids: np.ndarray = positions_df[TrackedPosition.player_id].to_numpy(
+            dtype=np.int64, na_value=MISSING_ID
+        )
+        team_ids: np.ndarray = positions_df[TrackedPosition.team_id].to_numpy(
+            dtype=np.int64, na_value=MISSING_ID
+        )
+        coords: np.ndarray = positions_df[[TrackedPosition.x, TrackedPosition.y]].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        tracked: np.ndarray = (player_ids != MISSING_ID) & ~np.isnan(coords).any(axis=1)
+        player_ids, team_ids, coords = player_ids[tracked], team_ids[tracked], coords[tracked]
+
+        # Row of every position in the heatmaps sorted by the team and the player.
+        player_codes, player_uniques = pd.factorize(player_ids)
+        team_codes, team_uniques = pd.factorize(team_ids)
+        pairs: np.ndarray = team_codes * len(player_uniques) + player_codes
+        pair_codes, pair_uniques = pd.factorize(pairs)
+        heatmap_teams: np.ndarray = team_uniques[pair_uniques // max(len(player_uniques), 1)]
+        heatmap_players: np.ndarray = player_uniques[pair_uniques % max(len(player_uniques), 1)]
+        order: np.ndarray = np.lexsort((heatmap_players, heatmap_teams))
+        rows: np.ndarray = np.argsort(order)[pair_codes]
+
+        n_cells: int = grid[0] * grid[1]
+        return cls(
+            heatmap_teams[order],
+            heatmap_players[order],
+            np.bincount(
+                rows * n_cells + _cells(coords, grid), minlength=len(order) * n_cells
+            ).reshape(len(order), *grid),
+        )
+
+    @property
+    def grid(self) -> Tuple[int, int]:
+        """Cells along the length and the width of the pitch."""
+        return int(self.frames.shape[1]), int(self.frames.shape[2])
+
+    def seconds(self) -> np.ndarray:
+        """Return the time in seconds of every player in every cell."""
+        return self.frames * (FRAME_INTERVAL_MS / 1000.0)
+
+    def team_heatmaps(self) -> Dict[int, np.ndarray]:
+        """Return the frames of the players of every team in every cell, by the team id."""
+        teams, starts = np.unique(self.team_ids, return_index=True)
+        if len(teams) == 0:
+            return {}
+
+        return {
+            int(team_id): frames
+            for team_id, frames in zip(teams, np.add.reduceat(self.frames, starts, axis=0))
+        }
+
+    def __add__(self, other: "PlayerHeatmaps") -> "PlayerHeatmaps":
+        """Return the heatmaps with the frames of both the heatmaps.
+
+        Raises
+        ------
+        ValueError
+            When the heatmaps are on different grids.
+        """
+        if self.grid != other.grid:
+            raise ValueError(f"Can't add heatmaps on grids {self.grid} and {other.grid}")
+
+        ids: np.ndarray = np.concatenate(
+            [
+                np.stack([self.team_ids, self.player_ids], axis=1),
+                np.stack([other.team_ids, other.player_ids], axis=1),
+            ]
+        )
+        unique_ids, rows = np.unique(ids, axis=0, return_inverse=True)
+        rows = rows.reshape(-1)
+        frames: np.ndarray = np.zeros((len(unique_ids), *self.grid), dtype=np.int64)
+        # Ids are unique within each of the heatmaps.
+        frames[rows[: len(self.player_ids)]] += self.frames
+        frames[rows[len(self.player_ids) :]] += other.frames
+
+        return PlayerHeatmaps(unique_ids[:, 0], unique_ids[:, 1], frames)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the heatmaps to a .npz file."""
+        np.savez_compressed(
+            path, team_ids=self.team_ids, player_ids=self.player_ids, frames=self.frames
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PlayerHeatmaps":
+        """Load the heatmaps saved with save."""
+        with np.load(path) as saved:
+            return cls(saved["team_ids"], saved["player_ids"], saved["frames"])
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, PlayerHeatmaps)
+            and np.array_equal(self.team_ids, other.team_ids)
+            and np.array_equal(self.player_ids, other.player_ids)
+            and np.array_equal(self.frames, other.frames)
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PlayerHeatmaps(players={len(self.player_ids)}, grid={self.grid}, "
+            f"frames={self.frames.sum()})"
+        )
+
+
+def _check_grid(grid: Tuple[int, int]) -> None:
+    if len(grid) != 2 or min(grid) < 1:
+        raise ValueError(f"Grid must have at least one cell along both the axes, got {grid}")
+
+
+def _cells(coords: np.ndarray, grid: Tuple[int, int]) -> np.ndarray:
+    """Return the flat cell index of every position, positions outside the pitch are clipped."""
+    cell_x: np.ndarray = np.clip(
+        np.floor(coords[:, 0] * grid[0] / PITCH_LENGTH), 0, grid[0] - 1
+    ).astype(np.int64)
+    cell_y: np.ndarray = np.clip(
+        np.floor(coords[:, 1] * grid[1] / PITCH_WIDTH), 0, grid[1] - 1
+    ).astype(np.int64)
+    return cell_x * grid[1] + cell_y
+
+
+def compute_heatmaps(
+    tracked_pos_df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    grid: Tuple[int, int] = DEFAULT_GRID,
+) -> PlayerHeatmaps:
+    """Compute the heatmaps of the players from the whole or the chunked tracking data.
+
+    Parameters
+    ----------
+    tracked_pos_df : Union[pd.DataFrame, Iterable[pd.DataFrame]]
+        Position of the players in the game, whole or in chunks, e.g. from
+        read_tracking_chunks, consumed one chunk at a time.
+    grid : Tuple[int, int], optional
+        Cells along the length and the width of the pitch, by default DEFAULT_GRID
+
+    Returns
+    -------
+    PlayerHeatmaps
+    """
+    if isinstance(tracked_pos_df, pd.DataFrame):
+        return PlayerHeatmaps.from_positions(tracked_pos_df, grid)
+
+    return aggregate_heatmaps(
+        (PlayerHeatmaps.from_positions(chunk, grid) for chunk in tracked_pos_df), grid
+    )
+
+
+def aggregate_heatmaps(
+    heatmaps: Iterable[PlayerHeatmaps], grid: Tuple[int, int] = DEFAULT_GRID
+) -> PlayerHeatmaps:
+    """Sum the heatmaps of the players over the chunks or the matches.
+
+    Parameters
+    ----------
+    heatmaps : Iterable[PlayerHeatmaps]
+        Heatmaps on the grid, consumed one at a time.
+    grid : Tuple[int, int], optional
+        Grid of the heatmaps, by default DEFAULT_GRID
+
+    Returns
+    -------
+    PlayerHeatmaps
+        Sum of the heatmaps of every player, empty without any heatmaps.
+    """
+    total: PlayerHeatmaps = PlayerHeatmaps.empty(grid)
+    for heatmap in heatmaps:
+        total = total + heatmap
+
+    return total
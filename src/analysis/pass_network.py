@@ -0,0 +1,241 @@
+"""Module providing the pass networks of the teams.
+
+The pass network of a team is the weighted adjacency matrix of its players,
+the weight from a player to another is the number of successful passes
+between them. The passer and receiver pairs of all the passes of a match
+are extracted at once with compute_pass_receivers.
+
+Networks are stored as sparse matrices along with the sorted ids of their
+players. Networks of the same team are summed by aligning their player ids,
+so the networks of a season are aggregated one match at a time without
+keeping the events of the matches.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.analysis.pass_statistics import PASS_RECEIVER_COL, compute_pass_receivers
+from src.metadata import MISSING_ID, Event
+
+PASSER_COL: str = "passer_id"
+RECEIVER_COL: str = "receiver_id"
+PASSES_COL: str = "passes"
+
+
+class PassNetwork:
+    """Number of successful passes between every pair of players of a team."""
+
+    team_id: int
+    # Sorted ids of the players of the network.
+    player_ids: np.ndarray
+    # Passes from player_ids[i] to player_ids[j] at [i, j].
+    passes: sparse.csr_matrix
+
+    def __init__(self, team_id: int, player_ids: np.ndarray, passes: sparse.spmatrix) -> None:
+        """Create the network.
+
+        Parameters
+        ----------
+        team_id : int
+        player_ids : np.ndarray
+            Sorted ids of the players
+        passes : sparse.spmatrix
+            Square matrix of the passes between the players
+
+        Raises
+        ------
+        ValueError
+            When the shape of the matrix doesn't match the players.
+        """
+        if passes.shape != (len(player_ids), len(player_ids)):
+            raise ValueError(
+                f"Passes of shape {passes.shape} don't match the {len(player_ids)} players"
+            )
+
+        self.team_id = team_id
+        self.player_ids = np.asarray(player_ids, dtype=np.int64)
+        self.passes = sparse.csr_matrix(passes, dtype=np.int64)
+
+    @classmethod
+    def from_pairs(cls, team_id: int, passers: np.ndarray, receivers: np.ndarray) -> "PassNetwork":
+        """Create the network of the passes from the passers to the receivers.
+
+        Parameters
+        ----------
+        team_id : int
+        passers : np.ndarray
+            Player id of the passer of every pass
+        receivers : np.ndarray
+            Player id of the receiver of every pass
+
+        Returns
+        -------
+        PassNetwork
+        """
+        player_ids: np.ndarray = np.union1d(passers, receivers).astype(np.int64)
+        return cls(
+            team_id,
+            player_ids,
+            _passes_matrix(
+                np.searchsorted(player_ids, passers),
+                np.searchsorted(player_ids, receivers),
+                np.ones(len(passers), dtype=np.int64),
+                len(player_ids),
+            ),
+        )
+
+    def __add__(self, other: "PassNetwork") -> "PassNetwork":
+        """Return the network with the passes of both the networks.
+
+        Raises
+        ------
+        ValueError
+            When the networks are of different teams.
+        """
+        if self.team_id != other.team_id:
+            raise ValueError(f"Can't add networks of teams {self.team_id} and {other.team_id}")
+
+        player_ids: np.ndarray = np.union1d(self.player_ids, other.player_ids)
+        mine: sparse.coo_matrix = self.passes.tocoo()
+        theirs: sparse.coo_matrix = other.passes.tocoo()
+        return PassNetwork(
+            self.team_id,
+            player_ids,
+            _passes_matrix(
+                np.searchsorted(
+                    player_ids,
+                    np.concatenate([self.player_ids[mine.row], other.player_ids[theirs.row]]),
+                ),
+                np.searchsorted(
+                    player_ids,
+                    np.concatenate([self.player_ids[mine.col], other.player_ids[theirs.col]]),
+                ),
+                np.concatenate([mine.data, theirs.data]),
+                len(player_ids),
+            ),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the passes between every pair of players with at least one pass.
+
+        Returns
+        -------
+        pd.DataFrame
+            Passer id, receiver id and passes columns, sorted by the passer and receiver.
+        """
+        passes: sparse.coo_matrix = self.passes.tocoo()
+        return (
+            pd.DataFrame(
+                {
+                    PASSER_COL: self.player_ids[passes.row],
+                    RECEIVER_COL: self.player_ids[passes.col],
+                    PASSES_COL: passes.data,
+                }
+            )
+            .sort_values(by=[PASSER_COL, RECEIVER_COL])
+            .reset_index(drop=True)
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the network to a .npz file."""
+        passes: sparse.coo_matrix = self.passes.tocoo()
+        np.savez_compressed(
+            path,
+            team_id=np.int64(self.team_id),
+            player_ids=self.player_ids,
+            row=passes.row,
+            col=passes.col,
+            data=passes.data,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PassNetwork":
+        """Load the network saved with save."""
+        with np.load(path) as saved:
+            player_ids: np.ndarray = saved["player_ids"]
+            return cls(
+                int(saved["team_id"]),
+                player_ids,
+                _passes_matrix(saved["row"], saved["col"], saved["data"], len(player_ids)),
+            )
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, PassNetwork)
+            and self.team_id == other.team_id
+            and np.array_equal(self.player_ids, other.player_ids)
+            and (self.passes != other.passes).nnz == 0
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PassNetwork(team_id={self.team_id}, players={len(self.player_ids)}, "
+            f"passes={self.passes.sum()})"
+        )
+
+
+def _passes_matrix(
+    rows: np.ndarray, cols: np.ndarray, passes: np.ndarray, n_players: int
+) -> sparse.csr_matrix:
+    """Return the square matrix of the passes, duplicate pairs are summed."""
+    return sparse.csr_matrix((passes, (rows, cols)), shape=(n_players, n_players), dtype=np.int64)
+
+
+def compute_pass_networks(events_df: pd.DataFrame) -> Dict[int, PassNetwork]:
+    """Compute the pass network of every team in the game.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events in the game
+
+    Returns
+    -------
+    Dict[int, PassNetwork]
+        Network of every team with a successful pass, by the team id.
+    """
+    events_df = compute_pass_receivers(events_df)
+    receivers: np.ndarray = events_df[PASS_RECEIVER_COL].to_numpy()
+    passers: np.ndarray = events_df[Event.player_id].to_numpy(dtype=np.int64, na_value=MISSING_ID)
+    is_received: np.ndarray = (receivers != MISSING_ID) & (passers != MISSING_ID)
+
+    teams: np.ndarray = events_df[Event.team_id].to_numpy(dtype=np.int64, na_value=MISSING_ID)[
+        is_received
+    ]
+    passers = passers[is_received]
+    receivers = receivers[is_received]
+
+    return {
+        int(team_id): PassNetwork.from_pairs(
+            int(team_id), passers[teams == team_id], receivers[teams == team_id]
+        )
+        for team_id in np.unique(teams)
+    }
+
+
+def aggregate_pass_networks(
+    networks: Iterable[Mapping[int, PassNetwork]],
+) -> Dict[int, PassNetwork]:
+    """Sum the pass networks of the teams over the matches.
+
+    Parameters
+    ----------
+    networks : Iterable[Mapping[int, PassNetwork]]
+        Networks of the teams of every match, e.g. from compute_pass_networks,
+        consumed one match at a time.
+
+    Returns
+    -------
+    Dict[int, PassNetwork]
+        Sum of the networks of every team, by the team id.
+    """
+    season: Dict[int, PassNetwork] = {}
+    for match_networks in networks:
+        for team_id, network in match_networks.items():
+            season[team_id] = season[team_id] + network if team_id in season else network
+
+    return season
@@ -0,0 +1,152 @@
+"""Module providing the pressure on the passer at the pass events.
+
+The pressure on a pass is measured at the tracking frame closest to the pass
+as the distance from the passer to the nearest opponent and the number of
+opponents within a radius of the passer.
+
+Only the frames of the passes are gathered from the tracking data. With 22
+players per frame, the distances from every passer to the players of its
+frame are computed in one vectorized pass over all the passes, which is
+cheaper than building a spatial index for every frame.
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.pass_statistics import PASS_STATUS_COL, PassStatus, compute_pass_status
+from src.metadata import MISSING_ID, Event, TrackedPosition
+from src.utils.event_utils import event_frame_numbers, tracking_frame_numbers
+
+# Columns added by compute_pass_pressure.
+NEAREST_OPPONENT_COL: str = "nearest_opponent_distance"
+OPPONENTS_IN_RADIUS_COL: str = "opponents_in_radius"
+
+# Radius around the passer in the units of the tracked positions(cm).
+PRESSURE_RADIUS: float = 500.0
+
+
+def compute_pass_pressure(
+    events_df: pd.DataFrame, positions_df: pd.DataFrame, radius: float = PRESSURE_RADIUS
+) -> pd.DataFrame:
+    """Compute the pressure on the passer of every pass.
+
+    Passes are the events classified as a pass by compute_pass_status, the
+    pass status is computed when missing.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events in the game with the time in milliseconds.
+    positions_df : pd.DataFrame
+        Position of the players in the game
+    radius : float, optional
+        Radius around the passer to count the opponents in, by default PRESSURE_RADIUS
+
+    Returns
+    -------
+    pd.DataFrame
+        Events with the distance to the nearest opponent and the number of
+        opponents in the radius, missing for the events that are not passes
+        and for the passes whose passer isn't tracked or has no team.
+    """
+    if PASS_STATUS_COL not in events_df.columns:
+        events_df = compute_pass_status(events_df)
+
+    # Opponents are the players of the other teams, so the passer's team must be known.
+    pass_rows: np.ndarray = np.flatnonzero(
+        (events_df[PASS_STATUS_COL].to_numpy() != PassStatus.Not_A_Pass.value)
+        & (events_df[Event.player_id] != MISSING_ID).to_numpy(dtype=bool, na_value=False)
+        & (events_df[Event.team_id] != MISSING_ID).to_numpy(dtype=bool, na_value=False)
+    )
+    passer_ids: np.ndarray = events_df[Event.player_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )[pass_rows]
+    passer_teams: np.ndarray = events_df[Event.team_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )[pass_rows]
+
+    pass_index, position_rows = _positions_at_frames(
+        event_frame_numbers(events_df)[pass_rows], positions_df
+    )
+    player_ids: np.ndarray = positions_df[TrackedPosition.player_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )[position_rows]
+    team_ids: np.ndarray = positions_df[TrackedPosition.team_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )[position_rows]
+    coords: np.ndarray = np.column_stack(
+        [
+            positions_df[TrackedPosition.x].to_numpy(dtype=np.float64, na_value=np.nan)[
+                position_rows
+            ],
+            positions_df[TrackedPosition.y].to_numpy(dtype=np.float64, na_value=np.nan)[
+                position_rows
+            ],
+        ]
+    )
+
+    # Position of the passer of every pass, NaN when the passer isn't tracked.
+    passer_coords: np.ndarray = np.full((len(pass_rows), 2), np.nan)
+    is_passer: np.ndarray = player_ids == passer_ids[pass_index]
+    passer_coords[pass_index[is_passer]] = coords[is_passer]
+
+    is_opponent: np.ndarray = (team_ids != passer_teams[pass_index]) & (team_ids != MISSING_ID)
+    opponent_pass: np.ndarray = pass_index[is_opponent]
+    distance: np.ndarray = np.hypot(*(coords[is_opponent] - passer_coords[opponent_pass]).T)
+
+    nearest: np.ndarray = np.full(len(pass_rows), np.inf)
+    np.minimum.at(nearest, opponent_pass, np.where(np.isnan(distance), np.inf, distance))
+    opponents: np.ndarray = np.bincount(opponent_pass[distance <= radius], minlength=len(pass_rows))
+
+    has_pressure: np.ndarray = ~np.isnan(passer_coords[:, 0])
+    nearest_col: np.ndarray = np.full(len(events_df), np.nan)
+    nearest_col[pass_rows[has_pressure]] = np.where(
+        np.isinf(nearest[has_pressure]), np.nan, nearest[has_pressure]
+    )
+    opponents_col: np.ndarray = np.zeros(len(events_df), dtype=np.int64)
+    opponents_col[pass_rows] = opponents
+    missing: np.ndarray = np.ones(len(events_df), dtype=bool)
+    missing[pass_rows[has_pressure]] = False
+
+    return events_df.assign(
+        **{
+            NEAREST_OPPONENT_COL: nearest_col,
+            OPPONENTS_IN_RADIUS_COL: pd.arrays.IntegerArray(opponents_col, missing),
+        }
+    )
+
+
+def _positions_at_frames(
+    frames: np.ndarray, positions_df: pd.DataFrame
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the pairs of every frame with the players tracked in it.
+
+    Parameters
+    ----------
+    frames : np.ndarray
+        Frame numbers, may repeat
+    positions_df : pd.DataFrame
+        Position of the players in the game
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        (index into frames, row of positions_df) of every pair.
+    """
+    position_frames: np.ndarray = tracking_frame_numbers(positions_df)
+    # Only the rows of the requested frames, sorted by the frame.
+    rows: np.ndarray = np.flatnonzero(np.isin(position_frames, frames))
+    rows = rows[np.argsort(position_frames[rows], kind="stable")]
+    sorted_frames: np.ndarray = position_frames[rows]
+
+    starts: np.ndarray = np.searchsorted(sorted_frames, frames, side="left")
+    counts: np.ndarray = np.searchsorted(sorted_frames, frames, side="right") - starts
+    frame_index: np.ndarray = np.repeat(np.arange(len(frames)), counts)
+    # Offset of every pair within the rows of its frame.
+    offsets: np.ndarray = np.arange(len(frame_index)) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+
+    return frame_index, rows[starts[frame_index] + offsets]
@@ -11,13 +11,22 @@ Observation: A successful cross event can be followed by
 1. clearance followed by reception by another player of same team
 """
 
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import Callable, List, Mapping, Tuple
+from typing import Any, Deque, List, Mapping, NamedTuple, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
-from src.metadata import Event, EventType
+from src.metadata import (
+    MISSING_EVENT_CODE,
+    MISSING_ID,
+    Event,
+    EventType,
+    Metadata,
+    event_codes,
+)
 
 
 class PassStatus(Enum):
@@ -26,6 +35,9 @@ class PassStatus(Enum):
     Not_A_Pass = -1
 
 
+_PASS_EVENT_CODES: List[int] = [EventType.PASS.code, EventType.CROSS.code]
+
+
 def is_short_pass_completed(pass_events: pd.DataFrame) -> bool:
     """Indicates if the short pass is completed.
 
@@ -103,97 +115,362 @@ def is_long_pass_completed(pass_events: pd.DataFrame) -> bool:
 
 
 PASS_STATUS_COL: str = "pass_status"
+PASS_RECEIVER_COL: str = "pass_receiver"
 
+# The pass rules look at most this many events ahead of the pass.
+_PASS_LOOKAHEAD: int = 2
 
-def compute_pass_status(events_df: pd.DataFrame) -> pd.DataFrame:
+
+def compute_pass_status(
+    events_df: pd.DataFrame, chunk_size: Optional[int] = None, workers: Optional[int] = None
+) -> pd.DataFrame:
     """Compute if the pass or cross event is successful or misplaced.
 
+    The short and long pass rules of ``is_short_pass_completed`` and
+    ``is_long_pass_completed`` are evaluated for all the events at once by
+    comparing every event with the next two events(shifted columns).
+
+    With a chunk size, the sorted events are split into chunks classified in
+    a pool of processes. Every chunk is classified along with the next two
+    events, so the status of its events is the same as when classifying all
+    the events at once.
+
     Parameters
     ----------
     events_df : pd.DataFrame
         Dataframe containing the events
+    chunk_size : Optional[int], optional
+        Number of events classified by a worker process at a time, by default
+        all the events are classified in this process.
+    workers : Optional[int], optional
+        Number of worker processes, by default the number of CPUs.
 
     Returns
     -------
     pd.DataFrame
         Dataframe with the pass status column added.
+
+    Raises
+    ------
+    ValueError
+        When the chunk size is not positive.
     """
-    events_df.sort_values(by=Event.event_id, ascending=True, inplace=True)
-    events_df = events_df.assign(
-        pass_status=np.full(events_df.shape[0], PassStatus.Not_A_Pass.value, dtype="int8")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    events_df = events_df.sort_values(by=Event.event_id, ascending=True)
+    if chunk_size is None or len(events_df) <= chunk_size:
+        return events_df.assign(**{PASS_STATUS_COL: _classify_passes(events_df)})
+
+    # Only the columns of the rules are sent to the workers.
+    rules_df: pd.DataFrame = events_df[[Event.team_id, Event.event]]
+    starts: range = range(0, len(rules_df), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk_status: List[np.ndarray] = list(
+            executor.map(
+                _classify_passes,
+                [rules_df.iloc[start : start + chunk_size + _PASS_LOOKAHEAD] for start in starts],
+            )
+        )
+
+    return events_df.assign(
+        **{PASS_STATUS_COL: np.concatenate([status[:chunk_size] for status in chunk_status])}
     )
 
-    def set_pass_status(
-        window: pd.DataFrame, pass_checks: List[Callable[[pd.DataFrame], bool]]
-    ) -> None:
-        event_id_filter: pd.Series = events_df[Event.event_id] == window.iloc[0][Event.event_id]
-        if window.iloc[0][Event.event] in [EventType.PASS, EventType.CROSS]:
-            if any(pass_check(window) for pass_check in pass_checks):
-                events_df.loc[event_id_filter, PASS_STATUS_COL] = PassStatus.Success.value
-            else:
-                events_df.loc[event_id_filter, PASS_STATUS_COL] = PassStatus.Failure.value
 
-    for window in events_df.rolling(window=3):
-        if len(window) != 3:
-            continue
-        set_pass_status(window, [is_short_pass_completed, is_long_pass_completed])
+def _classify_passes(events_df: pd.DataFrame) -> np.ndarray:
+    """Return the pass status of every event in the sorted events dataframe.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events sorted by the event id
 
-    # Last 2 events due to rolling window of size 3
-    set_pass_status(events_df.iloc[[-2, -1]], [is_short_pass_completed])
+    Returns
+    -------
+    np.ndarray
+        Pass status value of every event.
+    """
+    if events_df.empty:
+        return np.empty(0, dtype="int8")
 
-    # Handle last event. Last pass event is considered as failed
-    if events_df.iloc[-1][Event.event] == EventType.PASS:
-        events_df.loc[
-            events_df[Event.event_id] == events_df.iloc[-1][Event.event_id], PASS_STATUS_COL
-        ] = PassStatus.Failure.value
+    is_pass, receiver_offset = _pass_outcomes(events_df)
 
-    return events_df
+    return np.where(
+        is_pass,
+        np.where(receiver_offset > 0, PassStatus.Success.value, PassStatus.Failure.value),
+        PassStatus.Not_A_Pass.value,
+    ).astype("int8")
 
 
-def find_most_passing_player(events_df: pd.DataFrame) -> Tuple[int, int]:
-    """Find the player who had done the most passsing.
+def _pass_outcomes(events_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the pass events in the sorted events dataframe and the events receiving them.
 
     Parameters
     ----------
     events_df : pd.DataFrame
+        Events sorted by the event id, not empty
 
     Returns
     -------
-    Tuple[int, int]
-        (player_id, total passes made)
+    Tuple[np.ndarray, np.ndarray]
+        (True for the pass events, number of events from every completed
+        pass to its reception, 1 for a short pass and 2 for a long pass, 0
+        for the other events)
     """
-    pass_events_filter = (events_df[Event.event] == EventType.PASS) | (
-        events_df[Event.event] == EventType.CROSS
+    event: np.ndarray = event_codes(events_df[Event.event])
+    # Missing teams are NaN, they are never the same team.
+    team_id: np.ndarray = events_df[Event.team_id].to_numpy(dtype=np.float64, na_value=np.nan)
+    team_id[team_id == MISSING_ID] = np.nan
+
+    is_pass: np.ndarray = np.isin(event, _PASS_EVENT_CODES)
+    # Last pass event is considered as failed, while a last cross is not a pass.
+    is_pass[-1] = event[-1] == EventType.PASS.code
+
+    next_event: np.ndarray = _shift(event, 1, MISSING_EVENT_CODE)
+    short_pass_completed: np.ndarray = np.isin(
+        next_event, [EventType.PASS.code, EventType.RECEPTION.code]
+    ) & (team_id == _shift(team_id, 1, np.nan))
+    long_pass_completed: np.ndarray = (
+        (next_event == EventType.CLEARANCE.code)
+        & (_shift(event, 2, MISSING_EVENT_CODE) == EventType.RECEPTION.code)
+        & (team_id == _shift(team_id, 2, np.nan))
     )
 
-    player_id, total_passes = (
-        events_df[pass_events_filter]
-        .groupby(Event.player_id, as_index=False)
-        .agg(total_passes=("pass_status", "count"))
-        .nlargest(1, "total_passes")
-        .iloc[0]
-        .values
+    return is_pass, np.select(
+        [is_pass & short_pass_completed, is_pass & long_pass_completed], [1, 2], 0
     )
 
-    return (player_id, total_passes)
 
+def compute_pass_receivers(events_df: pd.DataFrame) -> pd.DataFrame:
+    """Compute the pass status and the player receiving every successful pass.
+
+    The receiver is the player of the Pass or Reception event following a
+    short pass, or of the Reception after the Clearance following a long pass.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Dataframe containing the events
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the pass status and the pass receiver columns added,
+        the receiver is MISSING_ID for the events that aren't successful passes.
+    """
+    events_df = compute_pass_status(events_df)
+    receivers: np.ndarray = np.full(len(events_df), MISSING_ID, dtype=np.int64)
+    if not events_df.empty:
+        _, receiver_offset = _pass_outcomes(events_df)
+        passes: np.ndarray = np.flatnonzero(receiver_offset)
+        receivers[passes] = events_df[Event.player_id].to_numpy(
+            dtype=np.int64, na_value=MISSING_ID
+        )[passes + receiver_offset[passes]]
+
+    return events_df.assign(**{PASS_RECEIVER_COL: receivers})
+
+
+def _shift(values: np.ndarray, n: int, fill_value: Any) -> np.ndarray:
+    """Return the values of the events n events later, fill_value after the last event."""
+    return np.concatenate([values[n:], np.full(min(n, len(values)), fill_value, values.dtype)])
 
-def _pass_completion_rate(pass_status: pd.Series) -> float:
-    """Compute the pass completion rate.
+
+PlayerStats: Metadata = Metadata(
+    {
+        "passes": np.dtype(np.int64),
+        "completed_passes": np.dtype(np.int64),
+        "completion_rate": np.dtype(np.float64),
+        "crosses": np.dtype(np.int64),
+        "short_passes": np.dtype(np.int64),
+        "long_passes": np.dtype(np.int64),
+    }
+)
+
+
+def compute_player_stats(events_df: pd.DataFrame) -> pd.DataFrame:
+    """Compute the passing statistics of every player in a single groupby.
+
+    A pass is a Pass or Cross event, it is a long pass when it is followed by
+    a Clearance as per is_long_pass_completed and a short pass otherwise. The
+    completion rate is the percentage of the passes that are successful.
 
     Parameters
     ----------
-    pass_status : pd.Series
-        Status of all the passes made by the player
+    events_df : pd.DataFrame
+        Events in the game, with the pass status column if already computed.
+
     Returns
     -------
-    float
-        player pass completion rate
+    pd.DataFrame
+        PlayerStats columns indexed by the team and the player, sorted by both.
+        A player has one row, with the team of its first pass with a known
+        team. Passes without a player are not counted.
     """
-    return (pass_status.sum() / pass_status.count()) * 100.0
+    if PASS_STATUS_COL not in events_df.columns:
+        events_df = compute_pass_status(events_df)
+    elif not events_df[Event.event_id].is_monotonic_increasing:
+        events_df = events_df.sort_values(by=Event.event_id, ascending=True)
+
+    event: np.ndarray = event_codes(events_df[Event.event])
+    is_pass: np.ndarray = np.isin(event, _PASS_EVENT_CODES)
+    is_long: np.ndarray = _shift(event, 1, MISSING_EVENT_CODE)[is_pass] == EventType.CLEARANCE.code
+
+    passes_df: pd.DataFrame = pd.DataFrame(
+        {
+            Event.team_id: events_df[Event.team_id].array[is_pass],
+            Event.player_id: events_df[Event.player_id].array[is_pass],
+            PlayerStats.passes: np.ones(len(is_long), dtype=np.int64),
+            PlayerStats.completed_passes: (
+                events_df[PASS_STATUS_COL].to_numpy()[is_pass] == PassStatus.Success.value
+            ).astype(np.int64),
+            PlayerStats.crosses: (event[is_pass] == EventType.CROSS.code).astype(np.int64),
+            PlayerStats.short_passes: (~is_long).astype(np.int64),
+            PlayerStats.long_passes: is_long.astype(np.int64),
+        }
+    )
+    passes_df = passes_df.loc[_is_known(passes_df[Event.player_id])]
+
+    # Passes are counted per player, the team is of the first pass with a known team.
+    stats_df: pd.DataFrame = (
+        passes_df.drop(columns=Event.team_id).groupby(Event.player_id, sort=True).sum()
+    )
+    player_teams: pd.Series = (
+        passes_df.iloc[np.argsort(~_is_known(passes_df[Event.team_id]), kind="stable")]
+        .drop_duplicates(Event.player_id)
+        .set_index(Event.player_id)[Event.team_id]
+    )
+    stats_df = (
+        stats_df.assign(**{Event.team_id: player_teams.reindex(stats_df.index)})
+        .reset_index()
+        .set_index([Event.team_id, Event.player_id])
+        .sort_index()
+    )
+
+    return _with_completion_rate(stats_df)[PlayerStats.columns()]
+
 
+def _is_known(ids: pd.Series) -> np.ndarray:
+    """Return True for the ids that are neither missing nor MISSING_ID."""
+    return (ids.notna() & (ids != MISSING_ID)).to_numpy(dtype=bool, na_value=False)
 
-def find_most_pass_completing_player(events_df: pd.DataFrame) -> Tuple[int, float, int]:
+
+def compute_team_stats(player_stats_df: pd.DataFrame) -> pd.DataFrame:
+    """Compute the passing statistics of every team from the statistics of its players.
+
+    Parameters
+    ----------
+    player_stats_df : pd.DataFrame
+        Statistics computed by compute_player_stats
+
+    Returns
+    -------
+    pd.DataFrame
+        PlayerStats columns indexed by the team.
+    """
+    team_stats_df: pd.DataFrame = (
+        player_stats_df.drop(columns=PlayerStats.completion_rate)
+        .groupby(level=Event.team_id, sort=True, dropna=False)
+        .sum()
+    )
+    return _with_completion_rate(team_stats_df)[PlayerStats.columns()]
+
+
+def _with_completion_rate(stats_df: pd.DataFrame) -> pd.DataFrame:
+    return stats_df.assign(
+        **{
+            PlayerStats.completion_rate: stats_df[PlayerStats.completed_passes]
+            / stats_df[PlayerStats.passes]
+            * 100.0
+        }
+    )
+
+
+def top_players(
+    player_stats_df: pd.DataFrame, metric: str, k: int = 1, min_passes: int = 0
+) -> pd.DataFrame:
+    """Return the k players with the highest value of the metric.
+
+    Ties are broken by the number of passes and then by the smallest player id.
+
+    Parameters
+    ----------
+    player_stats_df : pd.DataFrame
+        Statistics computed by compute_player_stats
+    metric : str
+        One of the PlayerStats columns
+    k : int, optional
+        Number of players, by default 1
+    min_passes : int, optional
+        Players with fewer passes are not ranked, by default 0. Rows without
+        a player are never ranked.
+
+    Returns
+    -------
+    pd.DataFrame
+        Statistics of the top players, best first, with the team and player id columns.
+
+    Raises
+    ------
+    ValueError
+        When the metric is not one of the PlayerStats columns.
+    """
+    if metric not in PlayerStats.columns():
+        raise ValueError(f"Unknown metric {metric}, expected one of {PlayerStats.columns()}")
+
+    ranked_df: pd.DataFrame = player_stats_df.reset_index()
+    ranked_df = ranked_df.loc[
+        (ranked_df[PlayerStats.passes] >= min_passes).to_numpy()
+        & _is_known(ranked_df[Event.player_id])
+    ]
+    return (
+        ranked_df.sort_values(
+            by=[metric, PlayerStats.passes, Event.player_id],
+            ascending=[False, False, True],
+            kind="stable",
+        )
+        .head(k)
+        .reset_index(drop=True)
+    )
+
+
+def _top_player(
+    events_df: pd.DataFrame, metric: str, player_stats_df: Optional[pd.DataFrame]
+) -> Mapping[str, Any]:
+    if player_stats_df is None:
+        player_stats_df = compute_player_stats(events_df)
+
+    top_df: pd.DataFrame = top_players(player_stats_df, metric)
+    if top_df.empty:
+        raise ValueError("No passes made")
+
+    return top_df.iloc[0].to_dict()
+
+
+def find_most_passing_player(
+    events_df: pd.DataFrame, player_stats_df: Optional[pd.DataFrame] = None
+) -> Tuple[int, int]:
+    """Find the player who had done the most passsing.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+    player_stats_df : Optional[pd.DataFrame], optional
+        Statistics to reuse across queries, computed from events_df if not given.
+
+    Returns
+    -------
+    Tuple[int, int]
+        (player_id, total passes made)
+    """
+    result: Mapping[str, Any] = _top_player(events_df, PlayerStats.passes, player_stats_df)
+
+    return (int(result[Event.player_id]), int(result[PlayerStats.passes]))
+
+
+def find_most_pass_completing_player(
+    events_df: pd.DataFrame, player_stats_df: Optional[pd.DataFrame] = None
+) -> Tuple[int, float, int]:
     """Find the player with the highest pass completion rate
 
     Player Pass completion rate = (total successful passes / total pass ) * 100.0
@@ -201,26 +478,192 @@ def find_most_pass_completing_player(events_df: pd.DataFrame) -> Tuple[int, floa
     Parameters
     ----------
     events_df : pd.DataFrame
+    player_stats_df : Optional[pd.DataFrame], optional
+        Statistics to reuse across queries, computed from events_df if not given.
 
     Returns
     -------
     Tuple[int, int, int]
         (player_id, pass completion percentage, total passes made)
     """
-    pass_events_filter = (events_df[Event.event] == EventType.PASS) | (
-        events_df[Event.event] == EventType.CROSS
-    )
+    result: Mapping[str, Any] = _top_player(events_df, PlayerStats.completion_rate, player_stats_df)
 
-    result: Mapping[str, float] = (
-        events_df[pass_events_filter]
-        .groupby(Event.player_id, as_index=False)
-        .agg(
-            total_passes=("pass_status", "count"),
-            completion_rate=("pass_status", _pass_completion_rate),
-        )
-        .sort_values(by=["completion_rate", "total_passes"], ascending=False)
-        .iloc[0]
-        .to_dict()
+    return (
+        int(result[Event.player_id]),
+        float(result[PlayerStats.completion_rate]),
+        int(result[PlayerStats.passes]),
     )
 
-    return (int(result[Event.player_id]), result["completion_rate"], int(result["total_passes"]))
+
+class LiveEvent(NamedTuple):
+    event_id: int
+    player_id: Optional[int]
+    team_id: Optional[int]
+    event: str
+
+    def is_pass(self) -> bool:
+        return self.event in [EventType.PASS, EventType.CROSS]
+
+    def is_same_team(self, other: "LiveEvent") -> bool:
+        return self.team_id is not None and self.team_id == other.team_id
+
+
+class LivePassStatistics:
+    """Pass statistics of a live match updated one event at a time.
+
+    The events are expected in the order of the event id. A pass or cross is
+    resolved with the short and long pass rules as soon as the one or two
+    events following it are known. The pass counts of the players are updated
+    when a pass arrives and the completed pass counts when it is resolved, so
+    the leaderboards can be read at any moment.
+
+    Once finish is called, the pass counts are the same as the ones of
+    find_most_passing_player on the whole match, and a completion rate is the
+    successful passes over all the passes of the player.
+    """
+
+    _recent_events: Deque[LiveEvent]
+    _passes: Counter
+    _completed_passes: Counter
+    _finished: bool
+
+    def __init__(self) -> None:
+        # The pass rules look at the two events following a pass.
+        self._recent_events = deque(maxlen=3)
+        self._passes = Counter()
+        self._completed_passes = Counter()
+        self._finished = False
+
+    def ingest(
+        self, event_id: int, player_id: Optional[int], team_id: Optional[int], event: str
+    ) -> List[Tuple[int, PassStatus]]:
+        """Add the next event of the match.
+
+        Parameters
+        ----------
+        event_id : int
+        player_id : Optional[int]
+        team_id : Optional[int]
+        event : str
+            Event name
+
+        Returns
+        -------
+        List[Tuple[int, PassStatus]]
+            (event id, status) of the passes resolved by this event.
+
+        Raises
+        ------
+        ValueError
+            When the match is already finished.
+        """
+        if self._finished:
+            raise ValueError("Cannot add events to a finished match")
+
+        live_event: LiveEvent = LiveEvent(event_id, player_id, team_id, event)
+        self._recent_events.append(live_event)
+        if live_event.is_pass() and player_id is not None:
+            self._passes[player_id] += 1
+
+        resolved: List[Tuple[int, PassStatus]] = []
+        if len(self._recent_events) >= 2 and self._recent_events[-2].is_pass():
+            pass_event: LiveEvent = self._recent_events[-2]
+            # Short pass
+            if live_event.event in [EventType.PASS, EventType.RECEPTION]:
+                resolved.append(self._resolve(pass_event, pass_event.is_same_team(live_event)))
+            elif live_event.event != EventType.CLEARANCE:
+                resolved.append(self._resolve(pass_event, False))
+
+        if (
+            len(self._recent_events) == 3
+            and self._recent_events[0].is_pass()
+            and self._recent_events[1].event == EventType.CLEARANCE
+        ):
+            # Long pass
+            pass_event = self._recent_events[0]
+            resolved.append(
+                self._resolve(
+                    pass_event,
+                    live_event.event == EventType.RECEPTION and pass_event.is_same_team(live_event),
+                )
+            )
+
+        return resolved
+
+    def finish(self) -> List[Tuple[int, PassStatus]]:
+        """Resolve the passes waiting for the events following them at the end of the match.
+
+        Returns
+        -------
+        List[Tuple[int, PassStatus]]
+            (event id, status) of the passes resolved.
+        """
+        resolved: List[Tuple[int, PassStatus]] = []
+        if self._finished or not self._recent_events:
+            return resolved
+
+        self._finished = True
+        if (
+            len(self._recent_events) >= 2
+            and self._recent_events[-2].is_pass()
+            and self._recent_events[-1].event == EventType.CLEARANCE
+        ):
+            resolved.append(self._resolve(self._recent_events[-2], False))
+
+        # Last pass event is considered as failed, while a last cross is not a pass.
+        last_event: LiveEvent = self._recent_events[-1]
+        if last_event.event == EventType.PASS:
+            resolved.append(self._resolve(last_event, False))
+        elif last_event.is_pass():
+            resolved.append((last_event.event_id, PassStatus.Not_A_Pass))
+
+        return resolved
+
+    def _resolve(self, pass_event: LiveEvent, is_completed: bool) -> Tuple[int, PassStatus]:
+        if is_completed and pass_event.player_id is not None:
+            self._completed_passes[pass_event.player_id] += 1
+
+        return (pass_event.event_id, PassStatus.Success if is_completed else PassStatus.Failure)
+
+    def find_most_passing_player(self) -> Tuple[int, int]:
+        """Find the player who had done the most passsing so far.
+
+        Returns
+        -------
+        Tuple[int, int]
+            (player_id, total passes made)
+
+        Raises
+        ------
+        ValueError
+            When no pass is made yet.
+        """
+        if not self._passes:
+            raise ValueError("No passes made yet")
+
+        return min(self._passes.items(), key=lambda player: (-player[1], player[0]))
+
+    def find_most_pass_completing_player(self) -> Tuple[int, float, int]:
+        """Find the player with the highest pass completion rate so far.
+
+        Returns
+        -------
+        Tuple[int, float, int]
+            (player_id, pass completion percentage, total passes made)
+
+        Raises
+        ------
+        ValueError
+            When no pass is made yet.
+        """
+        if not self._passes:
+            raise ValueError("No passes made yet")
+
+        player_id, completion_rate, total_passes = min(
+            (
+                (player_id, (self._completed_passes[player_id] / passes) * 100.0, passes)
+                for player_id, passes in self._passes.items()
+            ),
+            key=lambda player: (-player[1], -player[2], player[0]),
+        )
+        return (player_id, completion_rate, total_passes)
@@ -0,0 +1,218 @@
+"""Module providing the running metrics of the players from the tracking data.
+
+Positions are tracked every 40ms in cm, so the distance and speed of a player
+are the differences between the successive positions of the player. The rows
+are sorted by the player and the time once, and every metric is computed on
+the whole match at once over the resulting runs of positions.
+
+The positions of a player are split into segments at the half boundaries and
+wherever the player isn't tracked for longer than max_gap_ms, e.g. after a
+substitution. No distance is counted between the segments.
+
+Speed zones follow the usual thresholds of the tracking providers:
+
+walking < 2 m/s <= jogging < 4 m/s <= running < 5.5 m/s
+<= high speed running < 7 m/s <= sprinting
+
+A sprint is a run of frames above the sprint speed lasting at least
+MIN_SPRINT_DURATION_MS.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import MISSING_ID, Metadata, TrackedPosition
+from src.utils.event_utils import FRAME_INTERVAL_MS
+
+# Lower speed bound of every speed zone in m/s, in increasing order.
+SPEED_ZONES: List[Tuple[str, float]] = [
+    ("walking", 0.0),
+    ("jogging", 2.0),
+    ("running", 4.0),
+    ("high_speed_running", 5.5),
+    ("sprinting", 7.0),
+]
+HIGH_INTENSITY_SPEED: float = 5.5
+SPRINT_SPEED: float = 7.0
+MIN_SPRINT_DURATION_MS: int = 1000
+
+# Positions further apart in time belong to different segments.
+MAX_GAP_MS: int = 5 * FRAME_INTERVAL_MS
+
+# Tracked positions are in cm, time in ms.
+_CM_TO_M: float = 0.01
+_MS_TO_S: float = 0.001
+
+MotionStats: Metadata = Metadata(
+    {
+        "distance": np.dtype(np.float64),
+        "max_speed": np.dtype(np.float64),
+        **{f"{zone}_distance": np.dtype(np.float64) for zone, _ in SPEED_ZONES},
+        "high_intensity_distance": np.dtype(np.float64),
+        "sprints": np.dtype(np.int64),
+    }
+)
+
+
+def compute_player_motion(
+    positions_df: pd.DataFrame, smoothing_frames: int = 1, max_gap_ms: int = MAX_GAP_MS
+) -> pd.DataFrame:
+    """Compute the distance, speed profile and sprints of every tracked player.
+
+    Distances are in m and speeds in m/s.
+
+    Parameters
+    ----------
+    positions_df : pd.DataFrame
+        Position of the players in the game, delimiter rows and rows without
+        a position are ignored.
+    smoothing_frames : int, optional
+        Width of the centered moving average applied to the positions of every
+        segment to reduce the tracking noise, by default 1(no smoothing)
+    max_gap_ms : int, optional
+        Longest time without a position within a segment, by default MAX_GAP_MS
+
+    Returns
+    -------
+    pd.DataFrame
+        MotionStats columns indexed by the team and the player, sorted by both.
+
+    Raises
+    ------
+    ValueError
+        When smoothing_frames is not positive.
+    """
+    if smoothing_frames < 1:
+        raise ValueError(f"smoothing_frames must be positive, got {smoothing_frames}")
+
+    player_id, team_id, half_time, time, coords = _player_positions(positions_df)
+
+    # A segment starts at the first position of every player, half and after every gap.
+    segment_start: np.ndarray = np.ones(len(player_id), dtype=bool)
+    dt: np.ndarray = np.diff(time)
+    segment_start[1:] = (
+        (np.diff(player_id) != 0) | (np.diff(half_time) != 0) | (dt <= 0) | (dt > max_gap_ms)
+    )
+    if smoothing_frames > 1:
+        coords = _smooth(coords, segment_start, smoothing_frames)
+
+    # Step i moves from position i - 1 to position i, segment starts have no step.
+    is_step: np.ndarray = ~segment_start
+    step_time: np.ndarray = np.zeros(len(time))
+    step_time[1:] = dt * _MS_TO_S
+    step: np.ndarray = np.zeros(len(time))
+    step[1:] = np.hypot(*np.diff(coords, axis=0).T) * _CM_TO_M
+    step[~is_step] = 0.0
+    speed: np.ndarray = np.divide(step, step_time, out=np.zeros(len(step)), where=is_step)
+
+    # Positions are sorted by the player, players start at their first position.
+    player_start: np.ndarray = np.ones(len(player_id), dtype=bool)
+    player_start[1:] = np.diff(player_id) != 0
+    players: np.ndarray = np.flatnonzero(player_start)
+    player_index: np.ndarray = np.cumsum(player_start) - 1
+    n_players: int = len(players)
+
+    zone: np.ndarray = np.searchsorted([lower for _, lower in SPEED_ZONES], speed, side="right") - 1
+    zone_distance: np.ndarray = np.bincount(
+        player_index * len(SPEED_ZONES) + zone, weights=step, minlength=n_players * len(SPEED_ZONES)
+    ).reshape(n_players, len(SPEED_ZONES))
+
+    stats_df: pd.DataFrame = pd.DataFrame(
+        {
+            TrackedPosition.team_id: team_id[players],
+            TrackedPosition.player_id: player_id[players],
+            MotionStats.distance: np.bincount(player_index, weights=step, minlength=n_players),
+            MotionStats.max_speed: (
+                np.maximum.reduceat(speed, players) if n_players else np.zeros(0)
+            ),
+            **{
+                f"{name}_distance": zone_distance[:, idx]
+                for idx, (name, _) in enumerate(SPEED_ZONES)
+            },
+            MotionStats.high_intensity_distance: np.bincount(
+                player_index,
+                weights=np.where(speed >= HIGH_INTENSITY_SPEED, step, 0.0),
+                minlength=n_players,
+            ),
+            MotionStats.sprints: _count_sprints(
+                is_step & (speed >= SPRINT_SPEED), step_time, player_index, n_players
+            ),
+        }
+    )
+
+    return stats_df.set_index([TrackedPosition.team_id, TrackedPosition.player_id]).sort_index()[
+        MotionStats.columns()
+    ]
+
+
+def _player_positions(
+    positions_df: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return the player, team, half, time and (x, y) of the positions sorted by player and time."""
+    player_id: np.ndarray = positions_df[TrackedPosition.player_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )
+    coords: np.ndarray = np.column_stack(
+        [
+            positions_df[TrackedPosition.x].to_numpy(dtype=np.float64, na_value=np.nan),
+            positions_df[TrackedPosition.y].to_numpy(dtype=np.float64, na_value=np.nan),
+        ]
+    )
+    keep: np.ndarray = (player_id != MISSING_ID) & ~np.isnan(coords).any(axis=1)
+
+    player_id = player_id[keep]
+    team_id: np.ndarray = positions_df[TrackedPosition.team_id].to_numpy(
+        dtype=np.int64, na_value=MISSING_ID
+    )[keep]
+    half_time: np.ndarray = positions_df[TrackedPosition.half_time].to_numpy(
+        dtype=np.int64, na_value=0
+    )[keep]
+    time: np.ndarray = positions_df[TrackedPosition.time].to_numpy(dtype=np.int64, na_value=0)[keep]
+    order: np.ndarray = np.lexsort((time, half_time, player_id))
+
+    return (
+        player_id[order],
+        team_id[order],
+        half_time[order],
+        time[order],
+        coords[keep][order],
+    )
+
+
+def _smooth(coords: np.ndarray, segment_start: np.ndarray, frames: int) -> np.ndarray:
+    """Return the centered moving average of the points over the frames of their segment.
+
+    The window is truncated at the segment boundaries.
+    """
+    n: int = len(coords)
+    positions: np.ndarray = np.arange(n)
+    # First position of the segment of every point and one past its last position.
+    first: np.ndarray = np.maximum.accumulate(np.where(segment_start, positions, 0))
+    end: np.ndarray = np.minimum.accumulate(
+        np.where(np.append(segment_start[1:], True), positions + 1, n)[::-1]
+    )[::-1]
+
+    half_width: int = frames // 2
+    low: np.ndarray = np.maximum(positions - half_width, first)
+    high: np.ndarray = np.minimum(positions + frames - half_width, end)
+    cumulative: np.ndarray = np.concatenate([np.zeros((1, 2)), np.cumsum(coords, axis=0)])
+
+    return (cumulative[high] - cumulative[low]) / (high - low)[:, None]
+
+
+def _count_sprints(
+    is_sprinting: np.ndarray, step_time: np.ndarray, player_index: np.ndarray, n_players: int
+) -> np.ndarray:
+    """Return the number of runs of sprinting steps lasting MIN_SPRINT_DURATION_MS per player."""
+    run_start: np.ndarray = is_sprinting & ~np.append(False, is_sprinting[:-1])
+    run_starts: np.ndarray = np.flatnonzero(run_start)
+    run: np.ndarray = np.cumsum(run_start) - 1
+
+    duration: np.ndarray = np.bincount(
+        run[is_sprinting], weights=step_time[is_sprinting], minlength=len(run_starts)
+    )
+    is_sprint: np.ndarray = duration >= MIN_SPRINT_DURATION_MS * _MS_TO_S - 1e-9
+
+    return np.bincount(player_index[run_starts[is_sprint]], minlength=n_players).astype(np.int64)
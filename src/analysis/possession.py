@@ -0,0 +1,186 @@
+"""Module providing the segmentation of the events into possessions.
+
+A possession is a run of consecutive events of a team. A new possession
+starts
+
+1. at the first event of every match and half
+2. after a possession ending event, Ball Out of Play, Interception,
+Clearance or Attempt at Goal
+3. when the team changes, except at an ending event. Interceptions and
+clearances are made by the defending team and end the possession of the
+attacking team.
+
+Events without a team continue the current possession. The starts are
+found for all the events at once from the shifted columns, the possession
+ids are the running count of the starts and every possession is summarised
+over its run of events with reduceat and bincount.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import MISSING_ID, Event, EventType, Metadata, TrackedPosition, event_codes
+
+POSSESSION_COL: str = "possession_id"
+
+POSSESSION_ENDING_EVENTS: List[EventType] = [
+    EventType.BALL_OUT_OF_PLAY,
+    EventType.INTERCEPTION,
+    EventType.CLEARANCE,
+    EventType.ATTEMPT_AT_GOAL,
+]
+
+Possession: Metadata = Metadata(
+    {
+        "team_id": np.dtype(np.int64),
+        "start_event_id": np.dtype(np.int64),
+        "end_event_id": np.dtype(np.int64),
+        "events": np.dtype(np.int64),
+        "duration": np.dtype(np.float64),
+        "passes": np.dtype(np.int64),
+        "trajectory_length": np.dtype(np.float64),
+    }
+)
+
+
+def assign_possessions(events_df: pd.DataFrame, match_col: Optional[str] = None) -> pd.DataFrame:
+    """Assign a possession id to every event.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events of one or more matches
+    match_col : Optional[str], optional
+        Column identifying the match of the events, by default all the events
+        are of the same match.
+
+    Returns
+    -------
+    pd.DataFrame
+        Events sorted by the match and the event id with the possession id
+        column added, possession ids are numbered from 0 in that order.
+    """
+    sort_by: List[str] = [Event.event_id] if match_col is None else [match_col, Event.event_id]
+    events_df = events_df.sort_values(by=sort_by, kind="stable")
+
+    return events_df.assign(
+        **{POSSESSION_COL: np.cumsum(_possession_starts(events_df, match_col)) - 1}
+    )
+
+
+def _possession_starts(events_df: pd.DataFrame, match_col: Optional[str]) -> np.ndarray:
+    """Return True for the events starting a possession in the sorted events."""
+    if events_df.empty:
+        return np.zeros(0, dtype=bool)
+
+    team_id: np.ndarray = events_df[Event.team_id].to_numpy(dtype=np.int64, na_value=MISSING_ID)
+    has_team: np.ndarray = team_id != MISSING_ID
+    # Team of the latest event with a team, for the events without a team.
+    last_team_event: np.ndarray = np.maximum.accumulate(
+        np.where(has_team, np.arange(len(team_id)), 0)
+    )
+    current_team: np.ndarray = team_id[last_team_event]
+    is_ending: np.ndarray = np.isin(
+        event_codes(events_df[Event.event]), [event.code for event in POSSESSION_ENDING_EVENTS]
+    )
+
+    starts: np.ndarray = np.ones(len(team_id), dtype=bool)
+    starts[1:] = (
+        is_ending[:-1]
+        | (has_team[1:] & ~is_ending[1:] & (team_id[1:] != current_team[:-1]))
+        | _changes(events_df[Event.half_time].to_numpy(dtype=np.int64, na_value=0))
+    )
+    if match_col is not None:
+        starts[1:] |= _changes(pd.factorize(events_df[match_col])[0])
+
+    return starts
+
+
+def _changes(values: np.ndarray) -> np.ndarray:
+    """Return True for the values that differ from the previous value, from the second value."""
+    return values[1:] != values[:-1]
+
+
+def compute_possessions(events_df: pd.DataFrame, match_col: Optional[str] = None) -> pd.DataFrame:
+    """Summarise every possession of the events.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events of one or more matches, with the position of the players for
+        the trajectory length.
+    match_col : Optional[str], optional
+        Column identifying the match of the events, by default all the events
+        are of the same match.
+
+    Returns
+    -------
+    pd.DataFrame
+        Possession columns indexed by the possession id, with the match column
+        when given. The team is of the first event of the possession with a
+        team, the duration is in the units of the time column, the passes are
+        the Pass and Cross events of the team and the trajectory length is the
+        distance in meters between the known positions of the events, NaN
+        without the positions.
+    """
+    events_df = assign_possessions(events_df, match_col)
+    possession: np.ndarray = events_df[POSSESSION_COL].to_numpy()
+    n_events: int = len(possession)
+    # Possessions are runs of the same id, from the start to the end event.
+    starts: np.ndarray = np.flatnonzero(np.diff(possession, prepend=-1))
+    ends: np.ndarray = np.append(starts[1:], n_events)[: len(starts)] - 1
+
+    team_id: np.ndarray = events_df[Event.team_id].to_numpy(dtype=np.int64, na_value=MISSING_ID)
+    first_team_event: np.ndarray = np.minimum.reduceat(
+        np.where(team_id != MISSING_ID, np.arange(n_events), n_events), starts
+    )
+    has_team: np.ndarray = first_team_event < n_events
+    possession_team: np.ndarray = np.full(len(starts), MISSING_ID, dtype=np.int64)
+    possession_team[has_team] = team_id[first_team_event[has_team]]
+
+    event_ids: np.ndarray = events_df[Event.event_id].to_numpy(dtype=np.int64)
+    time: np.ndarray = events_df[Event.time].to_numpy(dtype=np.float64)
+    is_pass: np.ndarray = np.isin(
+        event_codes(events_df[Event.event]), [EventType.PASS.code, EventType.CROSS.code]
+    ) & (team_id == possession_team[possession])
+
+    possessions_df: pd.DataFrame = pd.DataFrame(
+        {
+            POSSESSION_COL: np.arange(len(starts)),
+            **({} if match_col is None else {match_col: events_df[match_col].to_numpy()[starts]}),
+            Possession.team_id: possession_team,
+            Possession.start_event_id: event_ids[starts],
+            Possession.end_event_id: event_ids[ends],
+            Possession.events: ends - starts + 1,
+            Possession.duration: time[ends] - time[starts],
+            Possession.passes: np.bincount(possession[is_pass], minlength=len(starts)),
+            Possession.trajectory_length: _trajectory_lengths(events_df, possession, len(starts)),
+        }
+    )
+
+    return possessions_df.set_index(POSSESSION_COL)
+
+
+def _trajectory_lengths(
+    events_df: pd.DataFrame, possession: np.ndarray, n_possessions: int
+) -> np.ndarray:
+    """Return the distance in meters between the known event positions of every possession."""
+    if TrackedPosition.x not in events_df.columns or TrackedPosition.y not in events_df.columns:
+        return np.full(n_possessions, np.nan)
+
+    coords: np.ndarray = events_df[[TrackedPosition.x, TrackedPosition.y]].to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    has_position: np.ndarray = ~np.isnan(coords).any(axis=1)
+    known_possession: np.ndarray = possession[has_position]
+    steps: np.ndarray = np.hypot(*np.diff(coords[has_position], axis=0).T) / 100.0
+    # Steps between the positions of different possessions aren't counted.
+    same_possession: np.ndarray = ~_changes(known_possession)
+
+    return np.bincount(
+        known_possession[1:][same_possession],
+        weights=steps[same_possession],
+        minlength=n_possessions,
+    )
@@ -0,0 +1,122 @@
+"""Module providing the batch analysis of many matches.
+
+Every directory containing an events.csv and a tracking.csv is a match.
+Matches are analysed in a pool of processes, only the path of the match
+directory is sent to the worker processes and only the results come back.
+"""
+
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from pandas.api.types import pandas_dtype
+
+from src.main import ChallengeResults, solve_match, stage_cache_from_env
+
+MATCH_COL: str = "match"
+ERROR_COL: str = "error"
+
+
+def find_match_dirs(root_dir: Path) -> List[Path]:
+    """Return the match directories under the given directory.
+
+    Parameters
+    ----------
+    root_dir : Path
+        Directory to search, can be a match directory itself.
+
+    Returns
+    -------
+    List[Path]
+        Sorted directories containing both events.csv and tracking.csv
+    """
+    return sorted(
+        events_csv.parent
+        for events_csv in root_dir.rglob("events.csv")
+        if (events_csv.parent / "tracking.csv").is_file()
+    )
+
+
+def analyse_match(match_dir: Path) -> Dict[str, Any]:
+    """Return the results of the challenges for the match.
+
+    Parameters
+    ----------
+    match_dir : Path
+        Directory containing the events.csv and tracking.csv of the match.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Results of the challenges, or the error when the analysis failed.
+    """
+    try:
+        results: ChallengeResults = solve_match(match_dir, stage_cache=stage_cache_from_env())
+    except Exception as err:  # pylint: disable=broad-except
+        return {MATCH_COL: str(match_dir), ERROR_COL: f"{type(err).__name__}: {err}"}
+
+    return {MATCH_COL: str(match_dir), **results._asdict(), ERROR_COL: None}
+
+
+def run_batch(root_dir: Path, workers: Optional[int] = None) -> pd.DataFrame:
+    """Analyse all the matches under the directory in a pool of processes.
+
+    A failing match is reported in the error column and doesn't stop the batch.
+
+    Parameters
+    ----------
+    root_dir : Path
+        Directory containing the match directories
+    workers : Optional[int], optional
+        Number of worker processes, by default the number of CPUs.
+
+    Returns
+    -------
+    pd.DataFrame
+        Results of the challenges, a row per match.
+    """
+    match_dirs: List[Path] = find_match_dirs(root_dir)
+    rows: List[Dict[str, Any]] = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: Dict[Future, Path] = {
+            executor.submit(analyse_match, match_dir): match_dir for match_dir in match_dirs
+        }
+        for future in as_completed(futures):
+            try:
+                rows.append(future.result())
+            except Exception as err:  # pylint: disable=broad-except
+                # Worker process died, e.g. out of memory.
+                rows.append(
+                    {MATCH_COL: str(futures[future]), ERROR_COL: f"{type(err).__name__}: {err}"}
+                )
+
+    return (
+        pd.DataFrame(rows, columns=[MATCH_COL, *ChallengeResults._fields, ERROR_COL])
+        .astype(
+            {
+                col: pandas_dtype("Int64")
+                for col, col_type in ChallengeResults.__annotations__.items()
+                if col_type is int
+            }
+        )
+        .sort_values(by=MATCH_COL)
+        .reset_index(drop=True)
+    )
+
+
+def main(*args: str) -> None:
+    root_dir: Path = Path(args[0] if len(args) >= 1 else os.environ["DATA_DIR"]).absolute()
+    workers: Optional[int] = int(args[1]) if len(args) >= 2 else None
+
+    print(f"Analysing the matches in {root_dir}...")
+    results_df: pd.DataFrame = run_batch(root_dir, workers)
+    print(results_df.to_string(index=False))
+    print(f"Completed the analysis of {len(results_df)} matches.")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -1,7 +1,20 @@
+import logging
 import os
 import sys
+import warnings
 from pathlib import Path
-from typing import Mapping
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
 import pandas as pd
@@ -9,14 +22,34 @@ import pandas as pd
 from src.analysis.ball_tracker import compute_ball_trajectory_between_events
 from src.analysis.pass_statistics import (
     compute_pass_status,
+    compute_player_stats,
     find_most_pass_completing_player,
     find_most_passing_player,
 )
-from src.metadata import Event, EventType, TrackedPosition
-from src.utils import event_utils
+from src.metadata import (
+    CompactEvent,
+    CompactTrackedPosition,
+    Event,
+    EventType,
+    Metadata,
+    TrackedPosition,
+    fill_missing_ids,
+    parse_column_types,
+)
+from src.utils import columnar_cache, event_utils
+from src.utils.cleaning import CoordinatePolicy, TrackingCleaner
+from src.utils.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from src.utils.stage_cache import StageCache
+from src.utils.tracking_utils import read_tracking_chunks
+
+T = TypeVar("T")
 
+logger: logging.Logger = logging.getLogger(__name__)
 
-def load_csv_data(dataset_path: Path, column_dtypes: Mapping[str, np.dtype]) -> pd.DataFrame:
+
+def load_csv_data(
+    dataset_path: Path, column_dtypes: Mapping[str, np.dtype], use_cache: bool = False
+) -> pd.DataFrame:
     """Return the dataframe from CSV file
 
     Parameters
@@ -25,62 +58,324 @@ def load_csv_data(dataset_path: Path, column_dtypes: Mapping[str, np.dtype]) ->
         Path to the csv file
     column_dtypes : Mapping[str, np.dtype]
         column names and type metadata
+    use_cache : bool, optional
+        Load from the binary columnar cache of the file, creating it on the first
+        parse, by default False
 
     Returns
     -------
     pd.DataFrame
     """
-    return pd.read_csv(
+    if use_cache:
+        cached_df = columnar_cache.read_cache(dataset_path, column_dtypes)
+        if cached_df is not None:
+            return cached_df
+
+    df: pd.DataFrame = pd.read_csv(
         dataset_path,
         sep=",",
         skiprows=[0],
         skip_blank_lines=True,
         names=column_dtypes.keys(),
-        dtype=column_dtypes,
+        dtype=parse_column_types(column_dtypes),
     )
+    fill_missing_ids(df, column_dtypes)
+
+    if use_cache:
+        try:
+            columnar_cache.write_cache(dataset_path, df, column_dtypes)
+        except OSError as err:
+            warnings.warn(f"Unable to cache {dataset_path}: {err}")
+
+    return df
+
+
+class ChallengeResults(NamedTuple):
+    # task-2
+    kickoff_trajectory_length: float
+    # task-3
+    most_passes_player_id: int
+    most_passes: int
+    # task-4
+    best_completion_player_id: int
+    best_completion_rate: float
+    best_completion_passes: int
 
 
-def compute_challenges(events_df: pd.DataFrame, tracked_pos_df: pd.DataFrame) -> None:
+def add_positions(
+    events_df: pd.DataFrame, tracked_pos_df: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+) -> pd.DataFrame:
+    """Add the position of the player in the event from the whole or the chunked tracking data."""
+    if isinstance(tracked_pos_df, pd.DataFrame):
+        return event_utils.add_position_to_event(events_df, tracked_pos_df)
+
+    return event_utils.add_position_to_event_from_chunks(events_df, tracked_pos_df)
+
+
+def _run_stage(
+    stage_cache: Optional[StageCache], stage: str, inputs: Sequence[Any], compute: Callable[[], T]
+) -> T:
+    return compute() if stage_cache is None else stage_cache.get_or_compute(stage, inputs, compute)
+
+
+def solve_challenges(
+    events_df: pd.DataFrame,
+    tracked_pos_df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    instrumentation: Instrumentation = NO_INSTRUMENTATION,
+) -> ChallengeResults:
+    """Return the results of the challenges.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events in the game with the time in milliseconds
+    tracked_pos_df : Union[pd.DataFrame, Iterable[pd.DataFrame]]
+        Position of the players in the game, whole or in chunks of frames.
+    instrumentation : Instrumentation, optional
+        Instrumentation of the stages, by default none
+
+    Returns
+    -------
+    ChallengeResults
+    """
     # task-1
-    events_with_positions: pd.DataFrame = event_utils.add_position_to_event(
-        events_df, tracked_pos_df
-    )
+    with instrumentation.stage("add_position_to_event", rows=len(events_df)):
+        events_with_positions: pd.DataFrame = add_positions(events_df, tracked_pos_df)
+
+    return _solve_challenges_with_positions(events_with_positions, instrumentation)
 
+
+def _solve_challenges_with_positions(
+    events_with_positions: pd.DataFrame,
+    instrumentation: Instrumentation,
+    stage_cache: Optional[StageCache] = None,
+    inputs: Sequence[Any] = (),
+) -> ChallengeResults:
+    """Return the results of the challenges from the events with the player positions.
+
+    Outputs of the stages are cached under the given input keys when the stage cache is given.
+    """
     # task-2
-    distance = compute_ball_trajectory_between_events(
-        events_with_positions, (EventType.KICK_OFF, 0), (EventType.BALL_OUT_OF_PLAY, 0)
-    )
-    print(
-        "Length of the ball trajectory from the "
-        f"initial kickoff to the first Ball Out of Play: {distance} meters"
-    )
+    kickoff: Tuple[str, int] = (EventType.KICK_OFF, 0)
+    ball_out_of_play: Tuple[str, int] = (EventType.BALL_OUT_OF_PLAY, 0)
+    with instrumentation.stage("ball_trajectory", rows=len(events_with_positions)):
+        distance: float = _run_stage(
+            stage_cache,
+            "ball_trajectory",
+            [*inputs, kickoff, ball_out_of_play],
+            lambda: compute_ball_trajectory_between_events(
+                events_with_positions, kickoff, ball_out_of_play
+            ),
+        )
 
     # task-3
-    events_with_pass_status: pd.DataFrame = compute_pass_status(events_with_positions)
-    player_id, passes = find_most_passing_player(events_with_pass_status)
-    print(f"Player {player_id} made most passes with count {passes} ")
+    with instrumentation.stage("compute_pass_status", rows=len(events_with_positions)):
+        events_with_pass_status: pd.DataFrame = _run_stage(
+            stage_cache,
+            "compute_pass_status",
+            inputs,
+            lambda: compute_pass_status(events_with_positions),
+        )
+    with instrumentation.stage("compute_player_stats", rows=len(events_with_pass_status)):
+        player_stats_df: pd.DataFrame = compute_player_stats(events_with_pass_status)
+    with instrumentation.stage("find_most_passing_player", rows=len(player_stats_df)):
+        most_passes_player_id, passes = find_most_passing_player(
+            events_with_pass_status, player_stats_df
+        )
 
     # task-4
-    player_id, completion_rate, total_passes = find_most_pass_completing_player(
-        events_with_pass_status
+    with instrumentation.stage("find_most_pass_completing_player", rows=len(player_stats_df)):
+        player_id, completion_rate, total_passes = find_most_pass_completing_player(
+            events_with_pass_status, player_stats_df
+        )
+
+    return ChallengeResults(
+        distance, most_passes_player_id, passes, player_id, completion_rate, total_passes
+    )
+
+
+def solve_match(
+    data_dir: Path,
+    instrumentation: Instrumentation = NO_INSTRUMENTATION,
+    stage_cache: Optional[StageCache] = None,
+) -> ChallengeResults:
+    """Return the results of the challenges for the match.
+
+    With the stage cache, the events with the player positions and the pass
+    status are reused while the match data is unchanged, the match data is
+    then not even loaded.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the events.csv and tracking.csv of the match.
+    instrumentation : Instrumentation, optional
+        Instrumentation of the stages, by default none
+    stage_cache : Optional[StageCache], optional
+        Cache of the outputs of the stages, by default None
+
+    Returns
+    -------
+    ChallengeResults
+    """
+    if stage_cache is None:
+        return solve_challenges(*load_match_data(data_dir, instrumentation), instrumentation)
+
+    inputs: Sequence[Any] = [
+        stage_cache.file_key(data_dir / "events.csv"),
+        stage_cache.file_key(data_dir / "tracking.csv"),
+        use_compact_dtypes(),
+        coordinate_policy().value,
+    ]
+
+    def load_with_positions() -> pd.DataFrame:
+        events_df, tracked_pos_df = load_match_data(data_dir, instrumentation)
+        with instrumentation.stage("add_position_to_event", rows=len(events_df)):
+            return add_positions(events_df, tracked_pos_df)
+
+    # task-1
+    events_with_positions: pd.DataFrame = stage_cache.get_or_compute(
+        "add_position_to_event", inputs, load_with_positions
+    )
+
+    return _solve_challenges_with_positions(
+        events_with_positions, instrumentation, stage_cache, inputs
+    )
+
+
+def print_challenge_results(results: ChallengeResults) -> None:
+    print(
+        "Length of the ball trajectory from the initial kickoff to the first Ball Out of Play: "
+        f"{results.kickoff_trajectory_length} meters"
     )
     print(
-        f"Player {player_id} has the best pass completion rate of {completion_rate}% "
-        f"with {total_passes} passes"
+        f"Player {results.most_passes_player_id} made most passes "
+        f"with count {results.most_passes} "
+    )
+    print(
+        f"Player {results.best_completion_player_id} has the best pass completion rate of "
+        f"{results.best_completion_rate}% with {results.best_completion_passes} passes"
     )
 
 
-def main(*args: str) -> None:
-    data_dir: Path = Path(args[0] if len(args) == 1 else os.environ["DATA_DIR"]).absolute()
+def compute_challenges(
+    events_df: pd.DataFrame,
+    tracked_pos_df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    instrumentation: Instrumentation = NO_INSTRUMENTATION,
+) -> None:
+    print_challenge_results(solve_challenges(events_df, tracked_pos_df, instrumentation))
+
+
+def load_match_data(
+    data_dir: Path, instrumentation: Instrumentation = NO_INSTRUMENTATION
+) -> Tuple[pd.DataFrame, Union[pd.DataFrame, Iterable[pd.DataFrame]]]:
+    """Return the events and the tracking data of the match.
+
+    Tracking data is streamed in chunks when TRACKING_CHUNK_FRAMES is set. Data
+    is loaded with the compact numpy types when COMPACT_DTYPES is set. Tracking
+    data is cleaned of the delimiter rows, and the positions outside the pitch
+    are handled as per TRACKING_COORDINATES(keep, flag or clamp, by default flag).
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the events.csv and tracking.csv of the match.
+    instrumentation : Instrumentation, optional
+        Instrumentation of the stages, by default none
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, Union[pd.DataFrame, Iterable[pd.DataFrame]]]
+        (events with the time in milliseconds, tracking data)
+    """
     events_csv: Path = data_dir / "events.csv"
     tracking_csv: Path = data_dir / "tracking.csv"
 
-    events_df: pd.DataFrame = load_csv_data(events_csv, Event.column_types())
-    event_utils.convert_event_time_to_ms(events_df)
-    tracked_pos_df: pd.DataFrame = load_csv_data(tracking_csv, TrackedPosition.column_types())
+    compact: bool = use_compact_dtypes()
+    cleaner: TrackingCleaner = TrackingCleaner(coordinate_policy())
+    events_schema: Metadata = CompactEvent if compact else Event
+    tracking_schema: Metadata = CompactTrackedPosition if compact else TrackedPosition
+
+    with instrumentation.stage("load_events") as record:
+        events_df: pd.DataFrame = load_csv_data(
+            events_csv, events_schema.column_types(), use_cache=True
+        )
+        record.rows = len(events_df)
+    with instrumentation.stage("convert_event_time_to_ms", rows=len(events_df)):
+        events_df = event_utils.convert_event_time_to_ms(
+            events_df, tracking_schema.column_types()[TrackedPosition.time]
+        )
+
+    # Stream the tracking data when it doesn't fit in the memory.
+    tracked_pos_df: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    if "TRACKING_CHUNK_FRAMES" in os.environ:
+        tracked_pos_df = read_tracking_chunks(
+            tracking_csv,
+            frames_per_chunk=int(os.environ["TRACKING_CHUNK_FRAMES"]),
+            column_dtypes=tracking_schema.column_types(),
+            cleaner=cleaner,
+        )
+    else:
+        with instrumentation.stage("load_tracking") as record:
+            tracked_pos_df = load_csv_data(
+                tracking_csv, tracking_schema.column_types(), use_cache=True
+            )
+            record.rows = len(tracked_pos_df)
+        with instrumentation.stage("clean_tracking", rows=len(tracked_pos_df)):
+            tracked_pos_df = cleaner.clean(tracked_pos_df)
+        logger.info("Cleaned the tracking data: %s", cleaner.report)
+
+    return events_df, tracked_pos_df
+
+
+def use_compact_dtypes() -> bool:
+    """Return True when COMPACT_DTYPES requests the compact numpy types."""
+    return bool(os.environ.get("COMPACT_DTYPES"))
+
+
+def coordinate_policy() -> CoordinatePolicy:
+    """Return the policy for the positions outside the pitch set by TRACKING_COORDINATES."""
+    return CoordinatePolicy(os.environ.get("TRACKING_COORDINATES", CoordinatePolicy.FLAG.value))
+
+
+def instrumentation_from_env() -> Instrumentation:
+    """Return the instrumentation requested by the environment.
+
+    INSTRUMENT_STAGES enables the instrumentation, the records are logged to stderr.
+    PROFILE_STAGE names the stage to profile and PROFILE_PATH the file to dump the
+    profile stats to.
+    """
+    if not os.environ.get("INSTRUMENT_STAGES"):
+        return NO_INSTRUMENTATION
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    return Instrumentation(
+        profile_stage=os.environ.get("PROFILE_STAGE"),
+        profile_path=Path(os.environ["PROFILE_PATH"]) if "PROFILE_PATH" in os.environ else None,
+    )
+
+
+def stage_cache_from_env() -> Optional[StageCache]:
+    """Return the stage cache in STAGE_CACHE_DIR, limited to STAGE_CACHE_MAX_MB if set."""
+    if not os.environ.get("STAGE_CACHE_DIR"):
+        return None
+
+    if "STAGE_CACHE_MAX_MB" in os.environ:
+        return StageCache(
+            Path(os.environ["STAGE_CACHE_DIR"]),
+            max_bytes=int(float(os.environ["STAGE_CACHE_MAX_MB"]) * 2**20),
+        )
+
+    return StageCache(Path(os.environ["STAGE_CACHE_DIR"]))
+
+
+def main(*args: str) -> None:
+    data_dir: Path = Path(args[0] if len(args) == 1 else os.environ["DATA_DIR"]).absolute()
 
     print("Performing analysis on the data...")
-    compute_challenges(events_df, tracked_pos_df)
+    print_challenge_results(
+        solve_match(data_dir, instrumentation_from_env(), stage_cache_from_env())
+    )
     print("Completed the analysis.")
 
 
@@ -1,6 +1,8 @@
-from typing import Dict, List, Mapping
+import warnings
+from typing import Any, Dict, List, Mapping
 
 import numpy as np
+import pandas as pd
 from pandas.api.types import pandas_dtype
 from strenum import StrEnum
 
@@ -24,6 +26,60 @@ class Metadata:
         raise AttributeError(f"Type Event has no attribute {col}")
 
 
+# Events can be converted to uniform case
+class EventType(StrEnum):
+    KICK_OFF = "Kick Off"
+    PASS = "Pass"
+    RECEPTION = "Reception"
+    BALL_OUT_OF_PLAY = "Ball Out of Play"
+    FREEKICK = "Freekick"
+    CLEARANCE = "Clearance"
+    CROSS = "Cross"
+    DEFENSIVE_EVENT = "Defensive Event"
+    BALL_PROGRESSION = "Ball Progression"
+    INTERCEPTION = "Interception"
+    GOALKICK = "Goalkick"
+    ATTEMPT_AT_GOAL = "Attempt at Goal"
+    CORNER = "Corner"
+    THROW_IN = "Throw in"
+
+    @property
+    def code(self) -> int:
+        """Fixed small integer code of the event."""
+        return _EVENT_CODES[self]
+
+
+# Codes are the order of declaration, new event types must be declared last.
+_EVENT_CODES: Dict[str, int] = {event: code for code, event in enumerate(EventType)}
+
+# Events are loaded as categories with the codes of EventType, unknown events are missing.
+EVENT_DTYPE: pd.CategoricalDtype = pd.CategoricalDtype(
+    categories=[event.value for event in EventType]
+)
+
+# Code of the missing and unknown events
+MISSING_EVENT_CODE: int = -1
+
+
+def event_codes(events: pd.Series) -> np.ndarray:
+    """Return the EventType codes of the events.
+
+    Parameters
+    ----------
+    events : pd.Series
+        Event names, either as EVENT_DTYPE categories or as strings
+
+    Returns
+    -------
+    np.ndarray
+        int8 codes, MISSING_EVENT_CODE for the missing and unknown events.
+    """
+    if isinstance(events.dtype, pd.CategoricalDtype) and events.dtype == EVENT_DTYPE:
+        return events.cat.codes.to_numpy()
+
+    return EVENT_DTYPE.categories.get_indexer(events).astype(np.int8)
+
+
 Event: Metadata = Metadata(
     {
         "event_id": pandas_dtype("Int64"),
@@ -31,7 +87,7 @@ Event: Metadata = Metadata(
         "time": np.dtype(np.float64),
         "player_id": pandas_dtype("Int64"),
         "team_id": pandas_dtype("Int64"),
-        "event": pandas_dtype("str"),
+        "event": EVENT_DTYPE,
     }
 )
 
@@ -46,19 +102,96 @@ TrackedPosition: Metadata = Metadata(
     }
 )
 
-# Events can be converted to uniform case
-class EventType(StrEnum):
-    KICK_OFF = "Kick Off"
-    PASS = "Pass"
-    RECEPTION = "Reception"
-    BALL_OUT_OF_PLAY = "Ball Out of Play"
-    FREEKICK = "Freekick"
-    CLEARANCE = "Clearance"
-    CROSS = "Cross"
-    DEFENSIVE_EVENT = "Defensive Event"
-    BALL_PROGRESSION = "Ball Progression"
-    INTERCEPTION = "Interception"
-    GOALKICK = "Goalkick"
-    ATTEMPT_AT_GOAL = "Attempt at Goal"
-    CORNER = "Corner"
-    THROW_IN = "Throw in"
+# Pitch dimensions in the units of the tracked positions(cm), positions are
+# measured from a corner of the pitch.
+PITCH_LENGTH: int = 10500
+PITCH_WIDTH: int = 6800
+
+# Compact schemas load the columns as plain numpy types, missing ids are MISSING_ID.
+# Tracking data uses it for the player and team of the rows delimiting the frames.
+MISSING_ID: int = -1
+
+CompactEvent: Metadata = Metadata(
+    {
+        "event_id": np.dtype(np.int32),
+        "half_time": np.dtype(np.int8),
+        "time": np.dtype(np.float64),
+        "player_id": np.dtype(np.int32),
+        "team_id": np.dtype(np.int32),
+        "event": EVENT_DTYPE,
+    }
+)
+
+CompactTrackedPosition: Metadata = Metadata(
+    {
+        "half_time": np.dtype(np.int8),
+        "time": np.dtype(np.int32),
+        "player_id": np.dtype(np.int32),
+        "team_id": np.dtype(np.int32),
+        "x": np.dtype(np.int16),
+        "y": np.dtype(np.int16),
+    }
+)
+
+
+def _is_numpy_integer(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind == "i"
+
+
+def parse_column_types(column_dtypes: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the types to parse the columns with.
+
+    Numpy signed integer columns can't hold missing values, they are parsed as
+    floats, which is also much faster than parsing the nullable integer types,
+    and converted with fill_missing_ids. Categorical columns are parsed with
+    the categories found in the data, so fill_missing_ids can report the
+    values outside the categories before they are lost as missing values.
+
+    Parameters
+    ----------
+    column_dtypes : Mapping[str, Any]
+        column names and type metadata
+
+    Returns
+    -------
+    Dict[str, Any]
+    """
+    return {col: _parse_type(dtype) for col, dtype in column_dtypes.items()}
+
+
+def _parse_type(dtype: Any) -> Any:
+    if _is_numpy_integer(dtype):
+        return np.dtype(np.float64)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.CategoricalDtype()
+
+    return dtype
+
+
+def fill_missing_ids(df: pd.DataFrame, column_dtypes: Mapping[str, Any]) -> None:
+    """Convert the columns parsed with parse_column_types to the column types in place.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed dataframe
+    column_dtypes : Mapping[str, Any]
+        column names and type metadata, missing values of the numpy integer
+        columns are replaced by MISSING_ID. Values outside the categories of
+        the categorical columns become missing values with a warning.
+    """
+    for col, dtype in column_dtypes.items():
+        if _is_numpy_integer(dtype):
+            df[col] = np.nan_to_num(df[col].to_numpy(), nan=MISSING_ID).astype(dtype)
+        elif isinstance(dtype, pd.CategoricalDtype) and df[col].dtype != dtype:
+            _warn_unknown_categories(df[col], dtype)
+            df[col] = df[col].cat.set_categories(dtype.categories, ordered=dtype.ordered)
+
+
+def _warn_unknown_categories(values: pd.Series, dtype: pd.CategoricalDtype) -> None:
+    unknown: pd.Series = values[~values.isin(dtype.categories) & values.notna()]
+    if not unknown.empty:
+        warnings.warn(
+            f"{len(unknown)} values of {values.name} are unknown and loaded as missing: "
+            f"{sorted(map(str, unknown.unique()))}"
+        )
@@ -0,0 +1,428 @@
+"""Module providing a local HTTP service answering the queries on the matches.
+
+A match is loaded once, on its first query, and its events with the player
+positions and the pass status are kept in memory along with the indexes of
+the analyses. The tracked positions are kept in a TrackingStore next to the
+tracking data of the match for the trajectories in the frames mode. Loaded
+matches are evicted, least recently used first, when their memory passes the
+budget, and the results of the queries are kept in a bounded LRU cache.
+
+    python -m src.service <data root> [port]
+
+Every query is a GET with the match directory relative to the data root:
+
+    /trajectory?match=<dir>&start=Kick Off&start_n=0&end=Ball Out of Play&end_n=0&mode=events
+    /leaderboard?match=<dir>&metric=passes&k=5&min_passes=0
+    /events?match=<dir>&first_id=0&last_id=100
+    /matches
+
+Results are returned as JSON, invalid query parameters with the 400 status,
+unknown queries and matches with the 404 status and failures, including the
+failures to load a match, with the 500 status.
+Matches are loaded once, the service is restarted to pick up changed match
+data.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.ball_tracker import (
+    BallTrajectoryIndex,
+    TrajectoryMode,
+    compute_ball_trajectory_between_events,
+)
+from src.analysis.pass_statistics import (
+    PlayerStats,
+    compute_pass_status,
+    compute_player_stats,
+    top_players,
+)
+from src.main import add_positions, load_match_data
+from src.utils.tracking_store import TrackingStore, store_dir_for
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MATCH_BYTES: int = 2 * 2**30
+DEFAULT_RESULT_CACHE_SIZE: int = 1024
+
+
+class MatchData:
+    """Resident frames and indexes of a loaded match."""
+
+    events_df: pd.DataFrame
+    tracking_store: TrackingStore
+    trajectory_index: BallTrajectoryIndex
+    player_stats_df: pd.DataFrame
+    nbytes: int
+
+    def __init__(self, data_dir: Path) -> None:
+        """Load the match and build the indexes of its analyses.
+
+        Parameters
+        ----------
+        data_dir : Path
+            Directory containing the events.csv and tracking.csv of the match.
+        """
+        tracking_csv: Path = data_dir / "tracking.csv"
+        events_df, tracked_pos_df = load_match_data(data_dir)
+        # Streamed tracking data is consumed by add_positions, the store reads the file again.
+        self.tracking_store = (
+            TrackingStore.build(tracked_pos_df, store_dir_for(tracking_csv))
+            if isinstance(tracked_pos_df, pd.DataFrame)
+            else TrackingStore.from_csv(tracking_csv, store_dir_for(tracking_csv))
+        )
+        # Events with the positions and the pass status, sorted by the event id.
+        self.events_df = compute_pass_status(add_positions(events_df, tracked_pos_df))
+        self.trajectory_index = BallTrajectoryIndex(
+            self.events_df, tracking_store=self.tracking_store
+        )
+        self.player_stats_df = compute_player_stats(self.events_df)
+        self.nbytes = int(
+            self.events_df.memory_usage(deep=True).sum()
+            + self.player_stats_df.memory_usage(deep=True).sum()
+            + self.tracking_store.positions.nbytes
+            + self.tracking_store.player_ids.nbytes
+        )
+
+
+class LRUCache:
+    """Thread safe mapping keeping the most recently used entries up to a total size."""
+
+    _entries: "OrderedDict[Hashable, Tuple[Any, int]]"
+    # Values being computed, by the key.
+    _pending: "Dict[Hashable, Future[Any]]"
+    _max_size: int
+    _size: int
+    _lock: threading.Lock
+
+    def __init__(self, max_size: int) -> None:
+        """Create the cache.
+
+        Parameters
+        ----------
+        max_size : int
+            Total size of the entries, the most recent entry is kept even if bigger.
+        """
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._max_size = max_size
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], size: Callable[[Any], int] = lambda _: 1
+    ) -> Any:
+        """Return the cached value of the key, computing and caching it on a miss.
+
+        Parameters
+        ----------
+        key : Hashable
+        compute : Callable[[], Any]
+            Computes the value, called without holding the lock. Concurrent
+            calls for the same key compute the value once, the others wait
+            for it.
+        size : Callable[[Any], int], optional
+            Size of the value, by default every entry is of size 1
+
+        Returns
+        -------
+        Any
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            # Concurrent misses of the key wait for the first one to compute the value.
+            pending: Optional["Future[Any]"] = self._pending.get(key)
+            if pending is None:
+                future: "Future[Any]" = Future()
+                self._pending[key] = future
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            value: Any = compute()
+            value_size: int = size(value)
+        except BaseException as err:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(err)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            self._entries[key] = (value, value_size)
+            self._size += value_size
+            self._evict()
+        future.set_result(value)
+
+        return value
+
+    def _evict(self) -> None:
+        while self._size > self._max_size and len(self._entries) > 1:
+            key, (_, value_size) = self._entries.popitem(last=False)
+            self._size -= value_size
+            logger.info("Evicted %s from the cache", key)
+
+    def items(self) -> List[Tuple[Hashable, int]]:
+        """Return the keys and the sizes of the entries, least recently used first."""
+        with self._lock:
+            return [(key, value_size) for key, (_, value_size) in self._entries.items()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryError(ValueError):
+    """Invalid query parameters, answered with the 400 status."""
+
+
+class MatchQueryService:
+    """Answers the queries on the matches under the data root."""
+
+    root_dir: Path
+    matches: LRUCache
+    results: LRUCache
+
+    def __init__(
+        self,
+        root_dir: Path,
+        max_match_bytes: int = DEFAULT_MAX_MATCH_BYTES,
+        result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+    ) -> None:
+        """Create the service.
+
+        Parameters
+        ----------
+        root_dir : Path
+            Directory containing the match directories
+        max_match_bytes : int, optional
+            Memory budget of the loaded matches, by default DEFAULT_MAX_MATCH_BYTES
+        result_cache_size : int, optional
+            Number of query results to cache, by default DEFAULT_RESULT_CACHE_SIZE
+        """
+        self.root_dir = root_dir.resolve()
+        self.matches = LRUCache(max_match_bytes)
+        self.results = LRUCache(result_cache_size)
+
+    def query(self, path: str, params: Mapping[str, str]) -> Any:
+        """Return the JSON serializable result of the query.
+
+        Parameters
+        ----------
+        path : str
+            Query path, e.g. /trajectory
+        params : Mapping[str, str]
+            Query parameters
+
+        Returns
+        -------
+        Any
+
+        Raises
+        ------
+        QueryError
+            When the query parameters are invalid.
+        LookupError
+            When the query path is unknown.
+        FileNotFoundError
+            When the match directory has no match data.
+        """
+        if path == "/matches":
+            return [
+                {"match": str(match_dir), "bytes": nbytes}
+                for match_dir, nbytes in self.matches.items()
+            ]
+
+        handlers: Dict[str, Callable[[MatchData, Mapping[str, str]], Any]] = {
+            "/trajectory": _trajectory,
+            "/leaderboard": _leaderboard,
+            "/events": _events,
+        }
+        if path not in handlers:
+            raise LookupError(f"Unknown query {path}")
+
+        match_dir: Path = self._match_dir(params)
+        key: Hashable = (path, str(match_dir), tuple(sorted(params.items())))
+        # Failures to load the match are not the query's fault, only the handlers raise QueryError.
+        return self.results.get_or_compute(
+            key, lambda: handlers[path](self.match(match_dir), params)
+        )
+
+    def match(self, match_dir: Path) -> MatchData:
+        """Return the loaded match, loading it on the first query."""
+        match_data: MatchData = self.matches.get_or_compute(
+            match_dir, lambda: MatchData(match_dir), lambda data: data.nbytes
+        )
+        return match_data
+
+    def _match_dir(self, params: Mapping[str, str]) -> Path:
+        if "match" not in params:
+            raise QueryError("Required the match parameter")
+
+        match_dir: Path = (self.root_dir / params["match"]).resolve()
+        if self.root_dir != match_dir and self.root_dir not in match_dir.parents:
+            raise QueryError(f"Match {params['match']} is outside the data root")
+        if not (match_dir / "events.csv").is_file() or not (match_dir / "tracking.csv").is_file():
+            raise FileNotFoundError(f"No match data in {params['match']}")
+
+        return match_dir
+
+
+def _required_param(params: Mapping[str, str], name: str) -> str:
+    if name not in params:
+        raise QueryError(f"Required the {name} parameter")
+
+    return params[name]
+
+
+def _int_param(params: Mapping[str, str], name: str, default: int) -> int:
+    if name not in params:
+        return default
+
+    try:
+        return int(params[name])
+    except ValueError as err:
+        raise QueryError(f"Parameter {name} must be an integer, got {params[name]!r}") from err
+
+
+def _event_param(match: MatchData, params: Mapping[str, str], name: str) -> Tuple[str, int]:
+    """Return the event name and occurrence of the parameters name and name_n."""
+    event: Tuple[str, int] = (_required_param(params, name), _int_param(params, f"{name}_n", 0))
+    occurrences: int = len(match.trajectory_index.event_index.occurrences(event[0]))
+    if not 0 <= event[1] < occurrences:
+        raise QueryError(
+            f"Match has {occurrences} occurrences of {event[0]}, got {name}_n={event[1]}"
+        )
+
+    return event
+
+
+def _trajectory(match: MatchData, params: Mapping[str, str]) -> Dict[str, Any]:
+    start: Tuple[str, int] = _event_param(match, params, "start")
+    end: Tuple[str, int] = _event_param(match, params, "end")
+    try:
+        mode: TrajectoryMode = TrajectoryMode(params.get("mode", TrajectoryMode.EVENTS.value))
+    except ValueError as err:
+        modes: List[str] = [mode.value for mode in TrajectoryMode]
+        raise QueryError(f"Unknown mode {params['mode']}, expected one of {modes}") from err
+
+    length: float = compute_ball_trajectory_between_events(
+        match.events_df, start, end, trajectory_index=match.trajectory_index, mode=mode
+    )
+    return {"start": start, "end": end, "mode": mode.value, "length": float(length)}
+
+
+def _leaderboard(match: MatchData, params: Mapping[str, str]) -> List[Dict[str, Any]]:
+    metric: str = params.get("metric", PlayerStats.passes)
+    if metric not in PlayerStats.columns():
+        raise QueryError(f"Unknown metric {metric}, expected one of {PlayerStats.columns()}")
+
+    top_df: pd.DataFrame = top_players(
+        match.player_stats_df,
+        metric,
+        k=_int_param(params, "k", 1),
+        min_passes=_int_param(params, "min_passes", 0),
+    )
+    return _records(top_df)
+
+
+def _events(match: MatchData, params: Mapping[str, str]) -> List[Dict[str, Any]]:
+    event_ids: np.ndarray = match.trajectory_index.event_index.event_ids
+    first_id: int = _int_param(params, "first_id", int(np.iinfo(np.int64).min))
+    last_id: int = _int_param(params, "last_id", int(np.iinfo(np.int64).max))
+    first: int = int(np.searchsorted(event_ids, first_id, "left"))
+    last: int = int(np.searchsorted(event_ids, last_id, "right"))
+    return _records(match.events_df.iloc[first:last])
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Return the rows of the dataframe as JSON serializable records, missing values as null."""
+    records: List[Dict[str, Any]] = json.loads(df.to_json(orient="records"))
+    return records
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Request handler of the MatchQueryService of the server."""
+
+    server: "MatchQueryServer"
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlsplit(self.path)
+        params: Dict[str, str] = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            result: Any = self.server.service.query(url.path, params)
+        except QueryError as err:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(err)})
+        except (LookupError, FileNotFoundError) as err:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": str(err)})
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception("Failed to answer %s", self.path)
+            self._send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(err).__name__}: {err}"}
+            )
+        else:
+            self._send_json(HTTPStatus.OK, result)
+
+    def _send_json(self, status: HTTPStatus, body: Any) -> None:
+        content: bytes = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        logger.info(format, *args)
+
+
+class MatchQueryServer(ThreadingHTTPServer):
+    """HTTP server answering the queries with the service, a thread per request."""
+
+    service: MatchQueryService
+
+    def __init__(self, address: Tuple[str, int], service: MatchQueryService) -> None:
+        super().__init__(address, QueryHandler)
+        self.service = service
+
+
+def service_from_env(root_dir: Path) -> MatchQueryService:
+    """Return the service with the budgets set by SERVICE_MAX_MB and SERVICE_CACHE_SIZE."""
+    max_match_bytes: int = (
+        int(float(os.environ["SERVICE_MAX_MB"]) * 2**20)
+        if "SERVICE_MAX_MB" in os.environ
+        else DEFAULT_MAX_MATCH_BYTES
+    )
+    result_cache_size: int = int(
+        os.environ.get("SERVICE_CACHE_SIZE", str(DEFAULT_RESULT_CACHE_SIZE))
+    )
+    return MatchQueryService(root_dir, max_match_bytes, result_cache_size)
+
+
+def main(*args: str) -> None:
+    root_dir: Path = Path(args[0] if len(args) >= 1 else os.environ["DATA_DIR"]).absolute()
+    port: int = int(args[1]) if len(args) >= 2 else 8000
+    service: MatchQueryService = service_from_env(root_dir)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with MatchQueryServer(("127.0.0.1", port), service) as server:
+        print(f"Serving the matches in {root_dir} on http://127.0.0.1:{port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
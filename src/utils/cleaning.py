@@ -0,0 +1,111 @@
+"""Module providing the cleaning of the tracking data as it is loaded.
+
+Every frame of the tracking data starts with a delimiter row that has -1 as
+the player and team, and some players are tracked slightly outside the pitch,
+e.g. while taking a throw in. The cleaning drops the delimiter rows and flags
+or clamps the positions outside the pitch in one vectorized pass over the
+rows, so it can run on every chunk of the tracking data as it is parsed.
+"""
+
+from enum import Enum
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import MISSING_ID, PITCH_LENGTH, PITCH_WIDTH, TrackedPosition
+
+# Column added by CoordinatePolicy.FLAG, True for the positions outside the pitch.
+OUT_OF_PITCH_COL: str = "out_of_pitch"
+
+
+class CoordinatePolicy(Enum):
+    # Keep the positions outside the pitch as they are.
+    KEEP = "keep"
+    # Keep the positions and flag them in the OUT_OF_PITCH_COL column.
+    FLAG = "flag"
+    # Move the positions to the nearest point on the pitch.
+    CLAMP = "clamp"
+
+
+class CleaningReport:
+    """Counts of the rows changed by the cleaning."""
+
+    rows: int
+    delimiter_rows: int
+    out_of_pitch_rows: int
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.delimiter_rows = 0
+        self.out_of_pitch_rows = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "rows": self.rows,
+            "delimiter_rows": self.delimiter_rows,
+            "out_of_pitch_rows": self.out_of_pitch_rows,
+        }
+
+    def __repr__(self) -> str:
+        return f"CleaningReport({self.to_dict()})"
+
+
+class TrackingCleaner:
+    """Cleans the tracking data, a chunk at a time, and counts what it changed."""
+
+    policy: CoordinatePolicy
+    report: CleaningReport
+
+    def __init__(self, policy: CoordinatePolicy = CoordinatePolicy.FLAG) -> None:
+        """Create the cleaner.
+
+        Parameters
+        ----------
+        policy : CoordinatePolicy, optional
+            What to do with the positions outside the pitch, by default FLAG
+        """
+        self.policy = policy
+        self.report = CleaningReport()
+
+    def clean(self, positions_df: pd.DataFrame) -> pd.DataFrame:
+        """Return the tracked positions without the delimiter rows.
+
+        Positions outside the pitch are flagged or clamped as per the policy.
+        The counts are added to the report of the cleaner.
+
+        Parameters
+        ----------
+        positions_df : pd.DataFrame
+            Position of the players in the game
+
+        Returns
+        -------
+        pd.DataFrame
+            Cleaned positions, the input is not modified.
+        """
+        is_player: np.ndarray = (positions_df[TrackedPosition.player_id] != MISSING_ID).to_numpy(
+            dtype=bool, na_value=True
+        )
+        x: pd.Series = positions_df[TrackedPosition.x]
+        y: pd.Series = positions_df[TrackedPosition.y]
+        out_of_pitch: np.ndarray = (
+            (x < 0) | (x > PITCH_LENGTH) | (y < 0) | (y > PITCH_WIDTH)
+        ).to_numpy(dtype=bool, na_value=False) & is_player
+
+        self.report.rows += len(positions_df)
+        self.report.delimiter_rows += int(len(is_player) - np.count_nonzero(is_player))
+        self.report.out_of_pitch_rows += int(np.count_nonzero(out_of_pitch))
+
+        cleaned_df: pd.DataFrame = positions_df if is_player.all() else positions_df.loc[is_player]
+        if self.policy == CoordinatePolicy.FLAG:
+            return cleaned_df.assign(**{OUT_OF_PITCH_COL: out_of_pitch[is_player]})
+        if self.policy == CoordinatePolicy.CLAMP and out_of_pitch.any():
+            return cleaned_df.assign(
+                **{
+                    TrackedPosition.x: cleaned_df[TrackedPosition.x].clip(0, PITCH_LENGTH),
+                    TrackedPosition.y: cleaned_df[TrackedPosition.y].clip(0, PITCH_WIDTH),
+                }
+            )
+
+        return cleaned_df
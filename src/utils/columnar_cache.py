@@ -0,0 +1,263 @@
+"""Module providing a binary columnar cache of the parsed CSV files.
+
+Every column of a parsed CSV file is saved as a numpy file in a cache
+directory next to the CSV file. Columns of the nullable pandas types are
+saved as the values and the missing value mask, categorical columns as their
+codes. On later runs, the numeric columns are memory mapped instead of
+parsing the CSV text again, and a subset of the columns and rows is read
+by slicing the memory mapped columns.
+
+The columns sorted in the ascending order without missing values are
+recorded in the manifest, a range of their values is found with a binary
+search.
+
+The cache is invalidated when the size of the CSV file changes or when its
+modification time changes along with its content hash, or when the column
+types differ from the ones it was written with.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+_MANIFEST_FILE: str = "manifest.json"
+_CACHE_VERSION: int = 2
+
+
+def cache_dir_for(dataset_path: Path) -> Path:
+    """Return the cache directory of the CSV file.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the csv file
+
+    Returns
+    -------
+    Path
+    """
+    return dataset_path.with_name(f"{dataset_path.name}.cache")
+
+
+def file_hash(file_path: Path) -> str:
+    """Return the SHA-256 hex digest of the content of the file."""
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b""):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def _schema(column_dtypes: Mapping[str, Any]) -> Dict[str, str]:
+    # The name of categorical types doesn't include the categories.
+    return {
+        col: repr(dtype) if isinstance(dtype, pd.CategoricalDtype) else str(dtype)
+        for col, dtype in column_dtypes.items()
+    }
+
+
+def _is_masked(dtype: Any) -> bool:
+    """Nullable pandas types(Int64, boolean, Float64) hold the values and a mask."""
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, "numpy_dtype")
+
+
+def _is_numeric(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in "biuf"
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    """Ascending values without NaN, the diff of a NaN is never >= 0."""
+    return bool(np.all(np.diff(values) >= 0))
+
+
+def read_cache(
+    dataset_path: Path,
+    column_dtypes: Mapping[str, Any],
+    columns: Optional[Sequence[str]] = None,
+    rows: slice = slice(None),
+) -> Optional[pd.DataFrame]:
+    """Return the cached dataframe of the CSV file if the cache is valid.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the csv file
+    column_dtypes : Mapping[str, Any]
+        column names and type metadata
+    columns : Optional[Sequence[str]], optional
+        Columns to read, by default all the columns
+    rows : slice, optional
+        Rows to read, by default all the rows. Only the pages of the memory
+        mapped columns within the rows are read.
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        None when there is no valid cache for the file.
+    """
+    if _valid_manifest(dataset_path, column_dtypes) is None:
+        return None
+
+    cache_dir: Path = cache_dir_for(dataset_path)
+    selected: Sequence[str] = list(column_dtypes) if columns is None else columns
+    col_idx: Dict[str, int] = {col: idx for idx, col in enumerate(column_dtypes)}
+    data: Dict[str, Any] = {}
+    for col in selected:
+        idx, dtype = col_idx[col], column_dtypes[col]
+        values: np.ndarray = np.load(cache_dir / f"{idx}.values.npy", mmap_mode="c")[rows]
+        if _is_numeric(dtype):
+            data[col] = values
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            data[col] = pd.Categorical.from_codes(values, dtype=dtype)
+            continue
+
+        mask: np.ndarray = np.load(cache_dir / f"{idx}.mask.npy", mmap_mode="c")[rows]
+        if _is_masked(dtype):
+            data[col] = dtype.construct_array_type()(values, mask)
+        else:
+            strings: np.ndarray = values.astype(object)
+            strings[mask] = np.nan
+            data[col] = pd.array(strings, dtype=dtype)
+
+    return pd.DataFrame(data, columns=selected, copy=False)
+
+
+def find_sorted_rows(
+    dataset_path: Path, column_dtypes: Mapping[str, Any], column: str, first: Any, last: Any
+) -> Optional[slice]:
+    """Return the rows of the cached CSV file with the column between the values.
+
+    The rows are found with a binary search of the memory mapped column, so
+    only a few of its pages are read.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the csv file
+    column_dtypes : Mapping[str, Any]
+        column names and type metadata
+    column : str
+        Numeric column sorted in the ascending order without missing values
+    first : Any
+        First value of the range, inclusive
+    last : Any
+        Last value of the range, inclusive
+
+    Returns
+    -------
+    Optional[slice]
+        None when there is no valid cache for the file or the cached column
+        isn't sorted.
+    """
+    manifest: Optional[Dict[str, Any]] = _valid_manifest(dataset_path, column_dtypes)
+    if manifest is None or column not in manifest["sorted_columns"]:
+        return None
+
+    idx: int = list(column_dtypes).index(column)
+    values: np.ndarray = np.load(cache_dir_for(dataset_path) / f"{idx}.values.npy", mmap_mode="r")
+    return slice(
+        int(np.searchsorted(values, first, "left")), int(np.searchsorted(values, last, "right"))
+    )
+
+
+def _valid_manifest(
+    dataset_path: Path, column_dtypes: Mapping[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Return the manifest of the cache of the CSV file if the cache is valid."""
+    cache_dir: Path = cache_dir_for(dataset_path)
+    try:
+        with open(cache_dir / _MANIFEST_FILE, encoding="utf-8") as manifest_file:
+            manifest: Dict[str, Any] = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+    stat: os.stat_result = dataset_path.stat()
+    if (
+        manifest.get("version") != _CACHE_VERSION
+        or manifest["schema"] != _schema(column_dtypes)
+        or manifest["size"] != stat.st_size
+    ):
+        return None
+
+    if manifest["mtime_ns"] != stat.st_mtime_ns:
+        if manifest["sha256"] != file_hash(dataset_path):
+            return None
+        # Same content with a new modification time, e.g. a copied file.
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        with suppress(OSError):
+            _write_manifest(cache_dir, manifest)
+
+    return manifest
+
+
+def write_cache(dataset_path: Path, df: pd.DataFrame, column_dtypes: Mapping[str, Any]) -> None:
+    """Write the parsed dataframe of the CSV file to its cache directory.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the csv file the dataframe was parsed from
+    df : pd.DataFrame
+        Parsed dataframe
+    column_dtypes : Mapping[str, Any]
+        column names and type metadata
+    """
+    stat: os.stat_result = dataset_path.stat()
+    cache_dir: Path = cache_dir_for(dataset_path)
+    tmp_dir: Path = Path(tempfile.mkdtemp(prefix=f".{cache_dir.name}.", dir=cache_dir.parent))
+
+    sorted_columns: List[str] = []
+    try:
+        for idx, (col, dtype) in enumerate(column_dtypes.items()):
+            column: pd.Series = df[col]
+            if _is_numeric(dtype):
+                numeric_values: np.ndarray = column.to_numpy(dtype=dtype)
+                np.save(tmp_dir / f"{idx}.values.npy", numeric_values)
+                if _is_sorted(numeric_values):
+                    sorted_columns.append(col)
+                continue
+            if isinstance(dtype, pd.CategoricalDtype):
+                np.save(tmp_dir / f"{idx}.values.npy", pd.Categorical(column, dtype=dtype).codes)
+                continue
+
+            mask: np.ndarray = column.isna().to_numpy()
+            if _is_masked(dtype):
+                values: np.ndarray = column.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+            else:
+                values = column.fillna("").to_numpy(dtype=str)
+            np.save(tmp_dir / f"{idx}.values.npy", values)
+            np.save(tmp_dir / f"{idx}.mask.npy", mask)
+            if _is_masked(dtype) and dtype.kind in "biuf" and not mask.any() and _is_sorted(values):
+                sorted_columns.append(col)
+
+        _write_manifest(
+            tmp_dir,
+            {
+                "version": _CACHE_VERSION,
+                "schema": _schema(column_dtypes),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_hash(dataset_path),
+                "rows": len(df),
+                "sorted_columns": sorted_columns,
+            },
+        )
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_manifest(cache_dir: Path, manifest: Mapping[str, Any]) -> None:
+    with open(cache_dir / _MANIFEST_FILE, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file)
@@ -1,72 +1,252 @@
+from typing import Any, Dict, Iterable, Optional
+
 import numpy as np
 import pandas as pd
 from pandas.api.types import pandas_dtype
 
-from src.metadata import Event, TrackedPosition
-
+from src.metadata import MISSING_ID, Event, TrackedPosition
 
-def _convert_time_to_ms(time_in_sec: float, start_time_in_ms: int) -> int:
-    return int(time_in_sec * 1000) - start_time_in_ms
+# Player positions are tracked every 40ms.
+FRAME_INTERVAL_MS: int = 40
 
 
-def convert_event_time_to_ms(events_df: pd.DataFrame) -> None:
+def convert_event_time_to_ms(
+    events_df: pd.DataFrame, time_dtype: Any = pandas_dtype("Int64")
+) -> pd.DataFrame:
     """Convert the time column in seconds to milliseconds
 
+    Time is offset to start from the first event.
+
     Parameters
     ----------
     events_df : pd.DataFrame
-        Events in the soccer game.
+        Events in the soccer game, not modified.
+    time_dtype : Any, optional
+        Type of the time in milliseconds, by default Int64
+
+    Returns
+    -------
+    pd.DataFrame
+        Events with the time in milliseconds.
     """
     time_col: str = Event.time
-    start_time_in_ms: int = _convert_time_to_ms(events_df[time_col].min(), 0)
-    events_df[time_col] = (
-        events_df[time_col]
-        .apply(_convert_time_to_ms, start_time_in_ms=start_time_in_ms)
-        .astype(pandas_dtype("Int64"))
+    # Truncated to milliseconds.
+    time_in_ms: np.ndarray = (events_df[time_col].to_numpy(dtype=np.float64) * 1000).astype(
+        np.int64
     )
+    return events_df.assign(**{time_col: pd.array(time_in_ms - time_in_ms.min(), dtype=time_dtype)})
+
+
+def event_frame_numbers(events_df: pd.DataFrame) -> np.ndarray:
+    """Return the tracking frame closest to every event.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events in the game with the time in milliseconds.
+
+    Returns
+    -------
+    np.ndarray
+        Frame number of every event.
+    """
+    event_time: np.ndarray = events_df[Event.time].to_numpy(dtype=np.float64)
+    return np.round(event_time / FRAME_INTERVAL_MS).astype(np.int64)
 
 
-def add_position_to_event(events_df: pd.DataFrame, positions_df: pd.DataFrame) -> pd.DataFrame:
+def tracking_frame_numbers(positions_df: pd.DataFrame) -> np.ndarray:
+    """Return the frame of every tracked position.
+
+    Parameters
+    ----------
+    positions_df : pd.DataFrame
+        Position of the players in the game
+
+    Returns
+    -------
+    np.ndarray
+        Frame number of every position.
+    """
+    tracking_time: np.ndarray = positions_df[TrackedPosition.time].to_numpy(dtype=np.int64)
+    return tracking_time // FRAME_INTERVAL_MS
+
+
+def add_position_to_event(
+    events_df: pd.DataFrame, positions_df: pd.DataFrame, tolerance_ms: Optional[int] = None
+) -> pd.DataFrame:
     """Add position of the player in the event to the dataframe.
 
+    By default the position is taken from the tracking frame closest to the
+    event. With a tolerance, the position is taken from the tracked position of
+    the player nearest in time to the event, within the tolerance.
+
     Parameters
     ----------
     events_df : pd.DataFrame
         Events in the game
     positions_df : pd.DataFrame
         Position of the players in the game
+    tolerance_ms : Optional[int], optional
+        Maximum time between the event and the tracked position, by default None
 
     Returns
     -------
     pd.DataFrame
         Events with the position of the players.
     """
-    time_col: str = Event.time
+    if tolerance_ms is not None:
+        return _add_nearest_position_to_event(events_df, positions_df, tolerance_ms)
+
     frame_number: str = "frame_number"
-    event_positions_df: pd.DataFrame
+    event_row: str = "event_row"
+    position_row: str = "position_row"
+    has_player: np.ndarray = _has_player(events_df)
 
     # Pick the time frame that is closest to the event.
-    events_df[frame_number] = (
-        events_df[time_col].apply(lambda t: np.round(t / 40)).astype(pandas_dtype("Int64"))
+    event_frames_df: pd.DataFrame = pd.DataFrame(
+        {
+            frame_number: event_frame_numbers(events_df)[has_player],
+            Event.player_id: events_df[Event.player_id].array[has_player],
+            event_row: np.flatnonzero(has_player),
+        }
+    )
+    frame_positions_df: pd.DataFrame = pd.DataFrame(
+        {
+            frame_number: tracking_frame_numbers(positions_df),
+            Event.player_id: positions_df[TrackedPosition.player_id].array,
+            position_row: np.arange(len(positions_df)),
+        },
+        copy=False,
+    )
+    rows_df: pd.DataFrame = event_frames_df.merge(
+        frame_positions_df, how="inner", on=[frame_number, Event.player_id], validate="m:1"
+    )
+
+    event_rows: np.ndarray = rows_df[event_row].to_numpy()
+    positions: pd.DataFrame = positions_df[[TrackedPosition.x, TrackedPosition.y]].iloc[
+        rows_df[position_row].to_numpy()
+    ]
+    coords: np.ndarray = np.zeros((len(events_df), 2), dtype=np.int16)
+    missing: np.ndarray = np.ones((len(events_df), 2), dtype=bool)
+    coords[event_rows] = positions.to_numpy(dtype=np.int16, na_value=0)
+    missing[event_rows] = positions.isna().to_numpy()
+
+    return _assign_positions(events_df, coords, missing)
+
+
+def _has_player(events_df: pd.DataFrame) -> np.ndarray:
+    """Return True for the events with a player, missing as NA or as MISSING_ID."""
+    player_ids: pd.Series = events_df[Event.player_id]
+    return (player_ids != MISSING_ID).to_numpy(dtype=bool, na_value=False)
+
+
+def _add_nearest_position_to_event(
+    events_df: pd.DataFrame, positions_df: pd.DataFrame, tolerance_ms: int
+) -> pd.DataFrame:
+    """Add the position of the player tracked nearest in time to the event."""
+    player_ids: pd.Series = events_df[Event.player_id]
+    has_player: np.ndarray = _has_player(events_df)
+    row_col: str = "row"
+
+    event_times_df: pd.DataFrame = pd.DataFrame(
+        {
+            row_col: np.flatnonzero(has_player),
+            Event.time: events_df[Event.time].to_numpy(dtype=np.int64)[has_player],
+            Event.player_id: player_ids.to_numpy(dtype=np.int64, na_value=-1)[has_player],
+        }
+    ).sort_values(by=Event.time, kind="stable")
+
+    tracking_times_df: pd.DataFrame = pd.DataFrame(
+        {
+            Event.time: positions_df[TrackedPosition.time].to_numpy(dtype=np.int64),
+            Event.player_id: positions_df[TrackedPosition.player_id].to_numpy(
+                dtype=np.int64, na_value=-1
+            ),
+            TrackedPosition.x: positions_df[TrackedPosition.x].array,
+            TrackedPosition.y: positions_df[TrackedPosition.y].array,
+        },
+        copy=False,
+    )
+    if not tracking_times_df[Event.time].is_monotonic_increasing:
+        tracking_times_df = tracking_times_df.sort_values(by=Event.time, kind="stable")
+
+    nearest_df: pd.DataFrame = pd.merge_asof(
+        event_times_df,
+        tracking_times_df,
+        on=Event.time,
+        by=Event.player_id,
+        direction="nearest",
+        tolerance=tolerance_ms,
     )
 
-    positions_df[frame_number] = (
-        positions_df[time_col].apply(lambda t: t // 40).astype(pandas_dtype("Int64"))
+    coords: np.ndarray = np.zeros((len(events_df), 2), dtype=np.int16)
+    missing: np.ndarray = np.ones((len(events_df), 2), dtype=bool)
+    rows: np.ndarray = nearest_df[row_col].to_numpy()
+    nearest_coords: pd.DataFrame = nearest_df[[TrackedPosition.x, TrackedPosition.y]]
+    coords[rows] = nearest_coords.to_numpy(dtype=np.int16, na_value=0)
+    missing[rows] = nearest_coords.isna().to_numpy()
+
+    return _assign_positions(events_df, coords, missing)
+
+
+def _assign_positions(
+    events_df: pd.DataFrame, coords: np.ndarray, missing: np.ndarray
+) -> pd.DataFrame:
+    """Return the events with the given positions, NA where the position is missing."""
+    return (
+        events_df.filter(Event.columns())
+        .reset_index(drop=True)
+        .assign(
+            **{
+                TrackedPosition.x: pd.arrays.IntegerArray(coords[:, 0], missing[:, 0]),
+                TrackedPosition.y: pd.arrays.IntegerArray(coords[:, 1], missing[:, 1]),
+            }
+        )
     )
 
-    try:
-        event_positions_df = events_df.merge(
-            positions_df,
-            how="left",
-            on=[frame_number, Event.player_id],
-            suffixes=(None, "_r"),
-            validate="m:1",
-        ).filter(Event.columns() + [TrackedPosition.x, TrackedPosition.y])
-    finally:
-        events_df.drop(frame_number, axis=1, inplace=True)
-        positions_df.drop(frame_number, axis=1, inplace=True)
 
-    return event_positions_df
+def add_position_to_event_from_chunks(
+    events_df: pd.DataFrame, positions_chunks: Iterable[pd.DataFrame]
+) -> pd.DataFrame:
+    """Add position of the player in the event to the dataframe.
+
+    Position of the players is consumed a chunk of frames at a time, so only
+    one chunk of the tracking data needs to be in memory.
+
+    Parameters
+    ----------
+    events_df : pd.DataFrame
+        Events in the game
+    positions_chunks : Iterable[pd.DataFrame]
+        Position of the players in the game in chunks of consecutive frames.
+
+    Returns
+    -------
+    pd.DataFrame
+        Events with the position of the players.
+    """
+    event_frames: np.ndarray = event_frame_numbers(events_df)
+    coords: np.ndarray = np.zeros((len(events_df), 2), dtype=np.int16)
+    missing: np.ndarray = np.ones((len(events_df), 2), dtype=bool)
+
+    for positions_df in positions_chunks:
+        if positions_df.empty:
+            continue
+
+        chunk_frames: np.ndarray = tracking_frame_numbers(positions_df)
+        in_chunk: np.ndarray = np.flatnonzero(
+            (event_frames >= chunk_frames.min()) & (event_frames <= chunk_frames.max())
+        )
+        if len(in_chunk) == 0:
+            continue
+
+        chunk_positions: pd.DataFrame = add_position_to_event(
+            events_df.iloc[in_chunk], positions_df
+        )[[TrackedPosition.x, TrackedPosition.y]]
+        coords[in_chunk] = chunk_positions.to_numpy(dtype=np.int16, na_value=0)
+        missing[in_chunk] = chunk_positions.isna().to_numpy()
+
+    return _assign_positions(events_df, coords, missing)
 
 
 def is_event_like_df(df: pd.DataFrame) -> bool:
@@ -142,3 +322,122 @@ def get_events_between(
     )
 
     return pd.DataFrame(events_like_df.loc[filter_criteria])
+
+
+class EventIndex:
+    """Index of the events for looking up the events by occurrence and by event id.
+
+    The index is built once for an events dataframe. It holds the events sorted
+    by the event id, the sorted event ids and, for every type of event, the
+    position of its occurrences. Lookups are array indexing and binary search,
+    and return slices of the sorted events instead of copies.
+    """
+
+    _events_df: pd.DataFrame
+    _event_ids: np.ndarray
+    _occurrences: Dict[str, np.ndarray]
+
+    def __init__(self, events_like_df: pd.DataFrame) -> None:
+        """Build the index of the events.
+
+        Parameters
+        ----------
+        events_like_df : pd.DataFrame
+            Events in the soccer game
+
+        Raises
+        ------
+        ValueError
+            Error when the dataframe doesnt have all the columns of Event dataset.
+        """
+        if not is_event_like_df(events_like_df):
+            raise ValueError("Required a dataframe with all columns of Event")
+
+        if not events_like_df[Event.event_id].is_monotonic_increasing:
+            events_like_df = events_like_df.sort_values(by=Event.event_id, kind="stable")
+
+        self._events_df = events_like_df
+        self._event_ids = events_like_df[Event.event_id].to_numpy(dtype=np.int64)
+
+        codes, event_names = pd.factorize(events_like_df[Event.event])
+        # Events without a name have the code -1 and no occurrences.
+        order: np.ndarray = np.flatnonzero(codes >= 0)
+        order = order[np.argsort(codes[order], kind="stable")]
+        splits: np.ndarray = np.searchsorted(codes[order], np.arange(1, len(event_names)))
+        self._occurrences = {
+            str(event_name): occurrences
+            for event_name, occurrences in zip(event_names, np.split(order, splits))
+        }
+
+    @property
+    def events_df(self) -> pd.DataFrame:
+        """Events sorted by the event id."""
+        return self._events_df
+
+    @property
+    def event_ids(self) -> np.ndarray:
+        """Sorted event ids."""
+        return self._event_ids
+
+    def occurrences(self, event_name: str) -> np.ndarray:
+        """Return the position of all the occurrences of the event in the sorted events.
+
+        Parameters
+        ----------
+        event_name : str
+            Event name
+
+        Returns
+        -------
+        np.ndarray
+        """
+        return self._occurrences.get(str(event_name), np.empty(0, dtype=np.int64))
+
+    def event_id_for(self, event_name: str, n: int = 0) -> int:
+        """Return the event_id for the nth occurrence of the given event.
+
+        Parameters
+        ----------
+        event_name : str
+            Event name
+        n : int, optional
+            Nth occurence of the event in the game
+
+        Returns
+        -------
+        int
+            Event ID
+        """
+        return int(self._event_ids[self.occurrences(event_name)[n]])
+
+    def positions_between(self, event_id1: int, event_id2: int) -> slice:
+        """Return the positions of the events between the two given events.
+
+        Parameters
+        ----------
+        event_id1 : int
+        event_id2 : int
+
+        Returns
+        -------
+        slice
+            Slice of the sorted events between the two given events.
+        """
+        start: int = int(np.searchsorted(self._event_ids, event_id1, side="right"))
+        stop: int = int(np.searchsorted(self._event_ids, event_id2, side="left"))
+        return slice(start, max(start, stop))
+
+    def events_between(self, event_id1: int, event_id2: int) -> pd.DataFrame:
+        """Return the set of events between the two given events.
+
+        Parameters
+        ----------
+        event_id1 : int
+        event_id2 : int
+
+        Returns
+        -------
+        pd.DataFrame
+            Slice of the sorted events between the two given events
+        """
+        return self._events_df.iloc[self.positions_between(event_id1, event_id2)]
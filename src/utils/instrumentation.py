@@ -0,0 +1,154 @@
+"""Module providing the opt-in timing and memory instrumentation of pipeline stages.
+
+Every instrumented stage records its wall time, CPU time, peak memory traced
+by tracemalloc and the number of rows it processed. The records are logged as
+JSON lines. One chosen stage can also be profiled with cProfile.
+"""
+
+import cProfile
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Peak memory of every active stage, outermost first, from before the peak was
+# reset by its nested stages. tracemalloc has a single peak for the process.
+_active_peaks: List[int] = []
+
+
+class StageRecord:
+    """Measurements of a stage, rows are set by the stage itself."""
+
+    name: str
+    rows: Optional[int]
+    wall_time_s: float
+    cpu_time_s: float
+    peak_memory_mb: Optional[float]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows = None
+        self.wall_time_s = 0.0
+        self.cpu_time_s = 0.0
+        self.peak_memory_mb = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "rows": self.rows,
+            "wall_time_s": round(self.wall_time_s, 6),
+            "cpu_time_s": round(self.cpu_time_s, 6),
+            "peak_memory_mb": self.peak_memory_mb,
+        }
+
+
+class Instrumentation:
+    """Instrumentation of the pipeline stages, disabled stages cost nothing."""
+
+    enabled: bool
+    trace_memory: bool
+    profile_stage: Optional[str]
+    profile_path: Optional[Path]
+    records: List[StageRecord]
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_memory: bool = True,
+        profile_stage: Optional[str] = None,
+        profile_path: Optional[Path] = None,
+    ) -> None:
+        """Create the instrumentation.
+
+        Parameters
+        ----------
+        enabled : bool, optional
+            Record the stages, by default True
+        trace_memory : bool, optional
+            Trace the peak memory of the stages with tracemalloc, by default True
+        profile_stage : Optional[str], optional
+            Name of the stage to profile with cProfile, by default None
+        profile_path : Optional[Path], optional
+            File to dump the profile stats to, by default <stage>.prof
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[StageRecord]:
+        """Instrument the code run in the context as a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage
+        rows : Optional[int], optional
+            Number of rows processed, can also be set on the record in the context.
+
+        The peak memory of a stage includes the peaks of its nested stages.
+        It isn't recorded when tracemalloc is already tracing outside the
+        stages, so as not to reset the peak of the caller.
+
+        Yields
+        ------
+        Iterator[StageRecord]
+            Record of the stage
+        """
+        record: StageRecord = StageRecord(name)
+        record.rows = rows
+        if not self.enabled:
+            yield record
+            return
+
+        was_tracing: bool = tracemalloc.is_tracing()
+        # Peak of tracing started outside the stages isn't reset, the stage isn't traced then.
+        trace_memory: bool = self.trace_memory and (bool(_active_peaks) or not was_tracing)
+        if trace_memory:
+            if was_tracing:
+                _active_peaks[-1] = max(_active_peaks[-1], tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            _active_peaks.append(0)
+
+        profile: Optional[cProfile.Profile] = (
+            cProfile.Profile() if name == self.profile_stage else None
+        )
+        start_wall_time: float = time.perf_counter()
+        start_cpu_time: float = time.process_time()
+        if profile is not None:
+            profile.enable()
+
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.wall_time_s = time.perf_counter() - start_wall_time
+            record.cpu_time_s = time.process_time() - start_cpu_time
+
+            if trace_memory:
+                peak: int = max(tracemalloc.get_traced_memory()[1], _active_peaks.pop())
+                record.peak_memory_mb = round(peak / 2**20, 3)
+                if _active_peaks:
+                    _active_peaks[-1] = max(_active_peaks[-1], peak)
+                if not was_tracing:
+                    tracemalloc.stop()
+
+            if profile is not None:
+                profile.dump_stats(str(self.profile_path or Path(f"{name}.prof")))
+
+            self.records.append(record)
+            logger.info(json.dumps(record.to_dict()))
+
+
+# Instrumentation used when none is requested.
+NO_INSTRUMENTATION: Instrumentation = Instrumentation(enabled=False)
@@ -0,0 +1,174 @@
+"""Module providing an on-disk cache of the outputs of the pipeline stages.
+
+The output of a stage is stored under a key hashing the name of the stage,
+the version of the cache and the keys of its inputs. Source files enter the
+keys by the hash of their content, so an unchanged match hits the cache even
+when its files were copied or touched. The hashes of the source files are
+remembered along with their size and modification time so that the files are
+only read again when they change.
+
+Outputs are pickled, and the least recently used outputs are evicted when
+the cache grows beyond its size limit.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, TypeVar
+
+from src.utils.columnar_cache import file_hash
+
+_FINGERPRINTS_FILE: str = "fingerprints.json"
+_OUTPUT_SUFFIX: str = ".pkl"
+# Bump when the output of a stage changes for the same inputs.
+STAGE_CACHE_VERSION: int = 2
+DEFAULT_MAX_BYTES: int = 1 << 30
+
+T = TypeVar("T")
+
+
+class StageCache:
+    """Outputs of the pipeline stages keyed by the hash of their inputs."""
+
+    cache_dir: Path
+    max_bytes: int
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Open the cache in the directory, creating it if missing.
+
+        Parameters
+        ----------
+        cache_dir : Path
+            Directory of the cache
+        max_bytes : int, optional
+            Size of the cached outputs above which the least recently used are
+            evicted, by default 1GiB
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def file_key(self, file_path: Path) -> str:
+        """Return the hash of the content of the file.
+
+        The hash is recomputed only when the size or the modification time of
+        the file changed since it was last computed.
+
+        Parameters
+        ----------
+        file_path : Path
+
+        Returns
+        -------
+        str
+        """
+        stat: os.stat_result = file_path.stat()
+        fingerprints_path: Path = self.cache_dir / _FINGERPRINTS_FILE
+        fingerprints: Dict[str, Dict[str, Any]] = {}
+        with suppress(OSError, ValueError):
+            fingerprints = json.loads(fingerprints_path.read_text(encoding="utf-8"))
+
+        name: str = str(file_path.resolve())
+        fingerprint: Dict[str, Any] = fingerprints.get(name, {})
+        if fingerprint.get("size") == stat.st_size and fingerprint.get("mtime_ns") == (
+            stat.st_mtime_ns
+        ):
+            return fingerprint["sha256"]
+
+        fingerprints[name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash(file_path),
+        }
+        with suppress(OSError):
+            self._write_atomic(fingerprints_path, json.dumps(fingerprints).encode("utf-8"))
+
+        return fingerprints[name]["sha256"]
+
+    @staticmethod
+    def key(stage: str, inputs: Sequence[Any]) -> str:
+        """Return the key of the output of the stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage
+        inputs : Sequence[Any]
+            Keys of the input files or outputs and the parameters of the stage,
+            their repr must identify them.
+
+        Returns
+        -------
+        str
+        """
+        return hashlib.sha256(
+            repr((STAGE_CACHE_VERSION, stage, tuple(inputs))).encode("utf-8")
+        ).hexdigest()
+
+    def get_or_compute(self, stage: str, inputs: Sequence[Any], compute: Callable[[], T]) -> T:
+        """Return the cached output of the stage, computing and caching it on a miss.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage
+        inputs : Sequence[Any]
+            Keys of the input files or outputs and the parameters of the stage.
+        compute : Callable[[], T]
+            Computes the output of the stage, it must be picklable.
+
+        Returns
+        -------
+        T
+            Output of the stage
+        """
+        output_path: Path = self.cache_dir / f"{self.key(stage, inputs)}{_OUTPUT_SUFFIX}"
+        try:
+            with open(output_path, "rb") as output_file:
+                output: T = pickle.load(output_file)
+        except Exception:  # pylint: disable=broad-except
+            # Missing, or written by an incompatible version of the libraries.
+            pass
+        else:
+            # The modification time orders the outputs for the eviction.
+            with suppress(OSError):
+                os.utime(output_path)
+            return output
+
+        output = compute()
+        with suppress(OSError):
+            self._write_atomic(output_path, pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL))
+            self._evict()
+
+        return output
+
+    def _write_atomic(self, file_path: Path, content: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{file_path.name}.", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, file_path)
+        finally:
+            with suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+
+    def _evict(self) -> None:
+        """Remove the least recently used outputs until the cache fits in its size limit."""
+        outputs: List[os.stat_result] = []
+        output_paths: List[Path] = []
+        for output_path in self.cache_dir.glob(f"*{_OUTPUT_SUFFIX}"):
+            with suppress(FileNotFoundError):
+                outputs.append(output_path.stat())
+                output_paths.append(output_path)
+
+        total_bytes: int = sum(stat.st_size for stat in outputs)
+        for idx in sorted(range(len(outputs)), key=lambda idx: outputs[idx].st_mtime_ns):
+            if total_bytes <= self.max_bytes:
+                break
+            with suppress(FileNotFoundError):
+                output_paths[idx].unlink()
+            total_bytes -= outputs[idx].st_size
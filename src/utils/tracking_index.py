@@ -0,0 +1,275 @@
+"""Module providing the loading of a time range of the tracking data.
+
+Tracking data is sorted by the time, so a time range is a contiguous run of
+rows. A time range is read
+
+1. from the binary columnar cache of the file when it is valid and its time
+column is sorted, the rows are found with a binary search of the memory
+mapped time column and only the requested columns are sliced.
+2. otherwise from the CSV file with a side index of the byte offset and the
+time of every stride-th row. Only the bytes between the indexed rows around
+the range are parsed.
+
+The index is saved next to the CSV file and rebuilt when the size or the
+modification time of the file changes.
+"""
+
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import TrackedPosition, fill_missing_ids, parse_column_types
+from src.utils import columnar_cache
+from src.utils.event_utils import FRAME_INTERVAL_MS
+from src.utils.tracking_utils import ROWS_PER_FRAME
+
+# Rows between the indexed rows, by default a second of tracking.
+INDEX_STRIDE: int = 25 * ROWS_PER_FRAME
+
+_BLOCK_SIZE: int = 1 << 24
+
+
+class TimeIndex(NamedTuple):
+    # Byte offset of the indexed rows in the CSV file.
+    offsets: np.ndarray
+    # Time of the indexed rows, in the ascending order.
+    times: np.ndarray
+    # Size of the CSV file
+    size: int
+    mtime_ns: int
+
+
+def index_path_for(dataset_path: Path) -> Path:
+    """Return the path of the time index of the CSV file.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file
+
+    Returns
+    -------
+    Path
+    """
+    return dataset_path.with_name(f"{dataset_path.name}.index.npz")
+
+
+def build_time_index(dataset_path: Path, stride: int = INDEX_STRIDE) -> TimeIndex:
+    """Index the byte offset and the time of every stride-th row of the CSV file.
+
+    The file is scanned for the line starts a block at a time, only the
+    indexed rows are parsed.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file
+    stride : int, optional
+        Rows between the indexed rows, by default INDEX_STRIDE
+
+    Returns
+    -------
+    TimeIndex
+
+    Raises
+    ------
+    ValueError
+        When the stride is less than 1 or the rows aren't sorted by the time.
+    """
+    if stride < 1:
+        raise ValueError(f"Index stride must be at least 1, got {stride}")
+
+    stat: os.stat_result = dataset_path.stat()
+    time_col: int = TrackedPosition.columns().index(TrackedPosition.time)
+    offsets: List[int] = []
+    times: List[int] = []
+    with open(dataset_path, "rb") as scan_file, open(dataset_path, "rb") as data_file:
+        for offset in _indexed_line_starts(scan_file, stat.st_size, stride):
+            data_file.seek(offset)
+            fields: List[bytes] = data_file.readline().split(b",")
+            # Blank lines have no time to index.
+            if len(fields) > time_col and fields[time_col].strip():
+                offsets.append(offset)
+                times.append(int(float(fields[time_col])))
+
+    index: TimeIndex = TimeIndex(
+        np.array(offsets, dtype=np.int64),
+        np.array(times, dtype=np.int64),
+        stat.st_size,
+        stat.st_mtime_ns,
+    )
+    if np.any(np.diff(index.times) < 0):
+        raise ValueError(f"Rows of {dataset_path} aren't sorted by the time")
+
+    return index
+
+
+def _indexed_line_starts(data_file: io.BufferedReader, size: int, stride: int) -> Iterator[int]:
+    """Yield the byte offset of every stride-th line after the header line."""
+    lines: int = 0
+    block_start: int = 0
+    while True:
+        block: bytes = data_file.read(_BLOCK_SIZE)
+        if not block:
+            return
+
+        # A line starts after every newline, the first one ends the header.
+        line_starts: np.ndarray = (
+            np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n")) + block_start + 1
+        )
+        line_numbers: np.ndarray = np.arange(lines, lines + len(line_starts))
+        yield from line_starts[(line_numbers % stride == 0) & (line_starts < size)].tolist()
+        lines += len(line_starts)
+        block_start += len(block)
+
+
+def load_time_index(dataset_path: Path, stride: int = INDEX_STRIDE) -> TimeIndex:
+    """Return the saved time index of the CSV file, building and saving it when stale.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file
+    stride : int, optional
+        Rows between the indexed rows of a new index, by default INDEX_STRIDE
+
+    Returns
+    -------
+    TimeIndex
+    """
+    index_path: Path = index_path_for(dataset_path)
+    stat: os.stat_result = dataset_path.stat()
+    try:
+        with np.load(index_path) as saved:
+            index: TimeIndex = TimeIndex(
+                saved["offsets"], saved["times"], int(saved["size"]), int(saved["mtime_ns"])
+            )
+        if index.size == stat.st_size and index.mtime_ns == stat.st_mtime_ns:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_time_index(dataset_path, stride)
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{index_path.name}.", dir=index_path.parent)
+        with os.fdopen(fd, "wb") as index_file:
+            np.savez(index_file, **index._asdict())
+        os.replace(tmp_path, index_path)
+    except OSError:
+        pass
+
+    return index
+
+
+def frame_time_range(first_frame: int, last_frame: int) -> Tuple[int, int]:
+    """Return the time range in milliseconds of the tracking rows of the frames.
+
+    Parameters
+    ----------
+    first_frame : int
+        First frame, inclusive
+    last_frame : int
+        Last frame, inclusive
+
+    Returns
+    -------
+    Tuple[int, int]
+        (start time, end time) both inclusive
+    """
+    return first_frame * FRAME_INTERVAL_MS, (last_frame + 1) * FRAME_INTERVAL_MS - 1
+
+
+def load_tracking_range(
+    dataset_path: Path,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    column_dtypes: Optional[Mapping[str, np.dtype]] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """Return the given columns of the tracking rows between the times.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file, sorted by the time
+    start_time : Optional[int], optional
+        First time in milliseconds, inclusive, by default from the first row
+    end_time : Optional[int], optional
+        Last time in milliseconds, inclusive, by default up to the last row
+    columns : Optional[Sequence[str]], optional
+        Columns to load, by default all the columns
+    column_dtypes : Optional[Mapping[str, np.dtype]], optional
+        column names and type metadata, by default the TrackedPosition types.
+    use_cache : bool, optional
+        Read from the columnar cache of the file when it is valid and its time
+        column is sorted, by default True. The cache isn't created, the CSV
+        file is read with its time index instead.
+
+    Returns
+    -------
+    pd.DataFrame
+        Rows in the file order with a default index, the same as the rows of
+        load_csv_data within the times.
+    """
+    column_dtypes = column_dtypes or TrackedPosition.column_types()
+    columns = list(column_dtypes) if columns is None else list(columns)
+    first: int = np.iinfo(np.int64).min if start_time is None else start_time
+    last: int = np.iinfo(np.int64).max if end_time is None else end_time
+
+    if use_cache:
+        rows: Optional[slice] = columnar_cache.find_sorted_rows(
+            dataset_path, column_dtypes, TrackedPosition.time, first, last
+        )
+        if rows is not None:
+            cached_df: Optional[pd.DataFrame] = columnar_cache.read_cache(
+                dataset_path, column_dtypes, columns, rows
+            )
+            if cached_df is not None:
+                return cached_df
+
+    return _read_csv_range(dataset_path, first, last, columns, column_dtypes)
+
+
+def _read_csv_range(
+    dataset_path: Path,
+    first: int,
+    last: int,
+    columns: List[str],
+    column_dtypes: Mapping[str, np.dtype],
+) -> pd.DataFrame:
+    """Parse the rows between the indexed rows around the times and filter them."""
+    index: TimeIndex = load_time_index(dataset_path)
+    # Rows of the start time can precede its indexed row, start from the row before.
+    start_idx: int = max(int(np.searchsorted(index.times, first, "left")) - 1, 0)
+    end_idx: int = int(np.searchsorted(index.times, last, "right"))
+    start: int = int(index.offsets[start_idx]) if len(index.offsets) else index.size
+    end: int = int(index.offsets[end_idx]) if end_idx < len(index.offsets) else index.size
+
+    usecols: List[str] = list(dict.fromkeys([*columns, TrackedPosition.time]))
+    dtypes: Mapping[str, np.dtype] = {col: column_dtypes[col] for col in usecols}
+    with open(dataset_path, "rb") as data_file:
+        data_file.seek(start)
+        data: bytes = data_file.read(max(end - start, 0))
+
+    if data.strip():
+        df: pd.DataFrame = pd.read_csv(
+            io.BytesIO(data),
+            sep=",",
+            header=None,
+            skip_blank_lines=True,
+            names=list(column_dtypes),
+            usecols=usecols,
+            dtype=parse_column_types(dtypes),
+        )
+    else:
+        df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+    fill_missing_ids(df, dtypes)
+
+    times: np.ndarray = df[TrackedPosition.time].to_numpy(dtype=np.float64, na_value=np.nan)
+    return df.loc[(times >= first) & (times <= last), columns].reset_index(drop=True)
@@ -0,0 +1,322 @@
+"""Module providing a frame indexed store of the tracked player positions.
+
+Player positions are tracked every 40ms and every frame contains the position
+of all the players. The store keeps the positions in a dense array of shape
+(frames, players, 2) with int16 coordinates in a numpy file that is memory
+mapped, along with the sorted player ids that map a player to a slot of the
+array. Position of a player at a frame is then a direct array index instead of
+a dataframe merge.
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import Event, TrackedPosition
+from src.utils.event_utils import event_frame_numbers, tracking_frame_numbers
+
+# Value of the coordinates of a player not tracked in a frame.
+MISSING_POSITION: int = int(np.iinfo(np.int16).min)
+# Player id of the rows delimiting the frames in the tracking data.
+DELIMITER_PLAYER_ID: int = -1
+
+_POSITIONS_FILE: str = "positions.npy"
+_PLAYER_IDS_FILE: str = "player_ids.npy"
+_METADATA_FILE: str = "metadata.json"
+
+
+def store_dir_for(dataset_path: Path) -> Path:
+    """Return the store directory of the tracking CSV file.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file
+
+    Returns
+    -------
+    Path
+    """
+    return dataset_path.with_name(f"{dataset_path.name}.store")
+
+
+class TrackingStore:
+    """Memory mapped store of the player positions indexed by frame and player."""
+
+    _positions: np.ndarray
+    _player_ids: np.ndarray
+    _first_frame: int
+
+    def __init__(self, store_dir: Path) -> None:
+        """Open an existing store.
+
+        Parameters
+        ----------
+        store_dir : Path
+            Directory containing the store files.
+        """
+        with open(store_dir / _METADATA_FILE, encoding="utf-8") as metadata_file:
+            self._first_frame = int(json.load(metadata_file)["first_frame"])
+
+        self._player_ids = np.load(store_dir / _PLAYER_IDS_FILE)
+        self._positions = np.load(store_dir / _POSITIONS_FILE, mmap_mode="r")
+
+    @property
+    def first_frame(self) -> int:
+        return self._first_frame
+
+    @property
+    def n_frames(self) -> int:
+        return int(self._positions.shape[0])
+
+    @property
+    def player_ids(self) -> np.ndarray:
+        return self._player_ids
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Positions array of shape (frames, players, 2)."""
+        return self._positions
+
+    @classmethod
+    def build(cls, positions_df: pd.DataFrame, store_dir: Path) -> "TrackingStore":
+        """Create the store from the tracked positions.
+
+        Parameters
+        ----------
+        positions_df : pd.DataFrame
+            Position of the players in the game
+        store_dir : Path
+            Directory to write the store files to.
+
+        Returns
+        -------
+        TrackingStore
+
+        Raises
+        ------
+        ValueError
+            When a player is tracked more than once in a frame, e.g. when the
+            tracking time restarts in the second half.
+        """
+        return cls._write(store_dir, lambda: iter([positions_df]))
+
+    @classmethod
+    def from_csv(
+        cls, dataset_path: Path, store_dir: Path, chunksize: int = 23 * 25 * 60
+    ) -> "TrackingStore":
+        """Create the store from the tracking CSV file without loading it entirely.
+
+        Parameters
+        ----------
+        dataset_path : Path
+            Path to the tracking csv file
+        store_dir : Path
+            Directory to write the store files to.
+        chunksize : int, optional
+            Number of rows parsed at a time, by default a minute of tracking.
+
+        Returns
+        -------
+        TrackingStore
+
+        Raises
+        ------
+        ValueError
+            When a player is tracked more than once in a frame, e.g. when the
+            tracking time restarts in the second half.
+        """
+
+        def read_chunks() -> Iterator[pd.DataFrame]:
+            return iter(
+                pd.read_csv(
+                    dataset_path,
+                    sep=",",
+                    skiprows=[0],
+                    skip_blank_lines=True,
+                    names=TrackedPosition.columns(),
+                    usecols=[
+                        TrackedPosition.time,
+                        TrackedPosition.player_id,
+                        TrackedPosition.x,
+                        TrackedPosition.y,
+                    ],
+                    dtype={
+                        TrackedPosition.time: np.int64,
+                        TrackedPosition.player_id: np.int64,
+                        TrackedPosition.x: np.int16,
+                        TrackedPosition.y: np.int16,
+                    },
+                    chunksize=chunksize,
+                )
+            )
+
+        return cls._write(store_dir, read_chunks)
+
+    @classmethod
+    def _write(
+        cls, store_dir: Path, read_chunks: Callable[[], Iterator[pd.DataFrame]]
+    ) -> "TrackingStore":
+        # First pass finds the frame range and the players to size the array.
+        first_frame, last_frame = np.iinfo(np.int64).max, np.iinfo(np.int64).min
+        player_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        for chunk in read_chunks():
+            frames, chunk_player_ids, _ = _tracked_rows(chunk)
+            if len(frames) == 0:
+                continue
+            first_frame = min(first_frame, int(frames.min()))
+            last_frame = max(last_frame, int(frames.max()))
+            player_ids = np.union1d(player_ids, chunk_player_ids)
+
+        if last_frame < first_frame:
+            first_frame, last_frame = 0, -1
+
+        store_dir.mkdir(parents=True, exist_ok=True)
+        positions: np.memmap = np.lib.format.open_memmap(
+            store_dir / _POSITIONS_FILE,
+            mode="w+",
+            dtype=np.int16,
+            shape=(last_frame - first_frame + 1, len(player_ids), 2),
+        )
+        positions[:] = MISSING_POSITION
+        tracked: np.ndarray = np.zeros(positions.shape[:2], dtype=bool)
+
+        for chunk in read_chunks():
+            frames, chunk_player_ids, coords = _tracked_rows(chunk)
+            frame_idx: np.ndarray = frames - first_frame
+            slots: np.ndarray = np.searchsorted(player_ids, chunk_player_ids)
+            _mark_tracked(tracked, frame_idx, slots, first_frame, player_ids)
+            positions[frame_idx, slots] = coords
+
+        positions.flush()
+        del positions
+        np.save(store_dir / _PLAYER_IDS_FILE, player_ids)
+        with open(store_dir / _METADATA_FILE, "w", encoding="utf-8") as metadata_file:
+            json.dump({"first_frame": first_frame}, metadata_file)
+
+        return cls(store_dir)
+
+    def slots(self, player_ids: np.ndarray) -> np.ndarray:
+        """Return the slot of the given players in the positions array.
+
+        Parameters
+        ----------
+        player_ids : np.ndarray
+
+        Returns
+        -------
+        np.ndarray
+            Slot of every player, -1 for players not in the store.
+        """
+        if len(self._player_ids) == 0:
+            return np.full(len(player_ids), -1, dtype=np.int64)
+
+        slots: np.ndarray = np.searchsorted(self._player_ids, player_ids)
+        slots[slots == len(self._player_ids)] = 0
+        return np.where(self._player_ids[slots] == player_ids, slots, -1)
+
+    def lookup(
+        self, frame_numbers: np.ndarray, player_ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the position of the players at the given frames.
+
+        Parameters
+        ----------
+        frame_numbers : np.ndarray
+        player_ids : np.ndarray
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (positions of shape (n, 2), True where the position is tracked)
+        """
+        frame_idx: np.ndarray = np.asarray(frame_numbers, dtype=np.int64) - self._first_frame
+        slots: np.ndarray = self.slots(np.asarray(player_ids, dtype=np.int64))
+        found: np.ndarray = (frame_idx >= 0) & (frame_idx < self.n_frames) & (slots >= 0)
+
+        coords: np.ndarray = np.full((len(frame_idx), 2), MISSING_POSITION, dtype=np.int16)
+        coords[found] = self._positions[frame_idx[found], slots[found]]
+        # A position is tracked only when both its coordinates are.
+        found &= (coords != MISSING_POSITION).all(axis=1)
+
+        return coords, found
+
+    def add_position_to_event(self, events_df: pd.DataFrame) -> pd.DataFrame:
+        """Add position of the player in the event to the dataframe.
+
+        Parameters
+        ----------
+        events_df : pd.DataFrame
+            Events in the game
+
+        Returns
+        -------
+        pd.DataFrame
+            Events with the position of the players.
+        """
+        player_ids: pd.Series = events_df[Event.player_id]
+        coords, found = self.lookup(
+            event_frame_numbers(events_df),
+            player_ids.to_numpy(dtype=np.int64, na_value=DELIMITER_PLAYER_ID),
+        )
+        missing: np.ndarray = ~found | player_ids.isna().to_numpy()
+
+        return (
+            events_df.filter(Event.columns())
+            .reset_index(drop=True)
+            .assign(
+                **{
+                    TrackedPosition.x: pd.arrays.IntegerArray(coords[:, 0], missing),
+                    TrackedPosition.y: pd.arrays.IntegerArray(coords[:, 1], missing.copy()),
+                }
+            )
+        )
+
+
+def _mark_tracked(
+    tracked: np.ndarray,
+    frame_idx: np.ndarray,
+    slots: np.ndarray,
+    first_frame: int,
+    player_ids: np.ndarray,
+) -> None:
+    """Mark the positions as tracked, raising ValueError when a player is tracked twice in a frame.
+
+    Frames are numbered from the tracking time, a time restarting in the
+    second half repeats the frames of the first half.
+    """
+    duplicates: np.ndarray = np.flatnonzero(tracked[frame_idx, slots])
+    n_tracked: int = int(np.count_nonzero(tracked))
+    tracked[frame_idx, slots] = True
+    if len(duplicates) == 0 and np.count_nonzero(tracked) - n_tracked < len(frame_idx):
+        # Repeated within the rows, found only then as it needs a sort.
+        cells: np.ndarray = frame_idx * tracked.shape[1] + slots
+        order: np.ndarray = np.argsort(cells, kind="stable")
+        duplicates = order[1:][np.diff(cells[order]) == 0]
+
+    if len(duplicates) > 0:
+        row: int = int(duplicates[0])
+        raise ValueError(
+            f"Player {player_ids[slots[row]]} is tracked more than once in frame "
+            f"{frame_idx[row] + first_frame}, the tracking time must not restart in the "
+            "second half"
+        )
+
+
+def _tracked_rows(chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the frame, player id and coordinates of the player rows in the chunk."""
+    player_ids: np.ndarray = chunk[TrackedPosition.player_id].to_numpy(
+        dtype=np.int64, na_value=DELIMITER_PLAYER_ID
+    )
+    is_player: np.ndarray = player_ids != DELIMITER_PLAYER_ID
+    coords: np.ndarray = np.column_stack(
+        [
+            chunk[TrackedPosition.x].to_numpy(dtype=np.int16, na_value=MISSING_POSITION),
+            chunk[TrackedPosition.y].to_numpy(dtype=np.int16, na_value=MISSING_POSITION),
+        ]
+    )
+
+    return tracking_frame_numbers(chunk)[is_player], player_ids[is_player], coords[is_player]
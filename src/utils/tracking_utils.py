@@ -0,0 +1,96 @@
+"""Module providing utility functions to read the tracking data in chunks.
+
+Tracking data has a row for every player every 40ms frame. Reading it in
+chunks of frames keeps the memory bounded by the chunk size instead of the
+length of the match.
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterator, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.metadata import TrackedPosition, fill_missing_ids, parse_column_types
+from src.utils.cleaning import TrackingCleaner
+from src.utils.event_utils import tracking_frame_numbers
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Every frame has a delimiter row followed by the position of the 22 players.
+ROWS_PER_FRAME: int = 23
+
+
+def read_tracking_chunks(
+    dataset_path: Path,
+    frames_per_chunk: int = 25 * 60,
+    column_dtypes: Optional[Mapping[str, np.dtype]] = None,
+    cleaner: Optional[TrackingCleaner] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the tracking data in chunks that never split the rows of a frame.
+
+    Parameters
+    ----------
+    dataset_path : Path
+        Path to the tracking csv file
+    frames_per_chunk : int, optional
+        Approximate number of frames in a chunk, by default a minute of tracking.
+    column_dtypes : Optional[Mapping[str, np.dtype]], optional
+        column names and type metadata, by default the TrackedPosition types.
+    cleaner : Optional[TrackingCleaner], optional
+        Cleans every chunk as it is parsed, by default the chunks are not
+        cleaned. Its report counts all the chunks and is logged once all the
+        chunks are read.
+
+    Yields
+    ------
+    Iterator[pd.DataFrame]
+        Position of the players in consecutive frames.
+    """
+    column_dtypes = column_dtypes or TrackedPosition.column_types()
+    carry: Optional[pd.DataFrame] = None
+
+    with pd.read_csv(
+        dataset_path,
+        sep=",",
+        skiprows=[0],
+        skip_blank_lines=True,
+        names=column_dtypes.keys(),
+        dtype=parse_column_types(column_dtypes),
+        chunksize=max(frames_per_chunk, 1) * ROWS_PER_FRAME,
+    ) as reader:
+        for chunk in reader:
+            fill_missing_ids(chunk, column_dtypes)
+            if cleaner is not None:
+                chunk = cleaner.clean(chunk)
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+
+            # Rows of the last frame can continue in the next chunk.
+            frame_start: int = _last_frame_start(chunk)
+            carry = chunk.iloc[frame_start:]
+            if frame_start > 0:
+                yield chunk.iloc[:frame_start]
+
+    if carry is not None and not carry.empty:
+        yield carry
+    if cleaner is not None:
+        logger.info("Cleaned the tracking data: %s", cleaner.report)
+
+
+def _last_frame_start(positions_df: pd.DataFrame) -> int:
+    """Return the position of the first row of the last frame in the dataframe."""
+    # Cleaning can drop all the rows of a chunk.
+    if positions_df.empty:
+        return 0
+
+    half_time: np.ndarray = positions_df[TrackedPosition.half_time].to_numpy(
+        dtype=np.int64, na_value=-1
+    )
+    frames: np.ndarray = tracking_frame_numbers(positions_df)
+    other_frame_rows: np.ndarray = np.flatnonzero(
+        (frames != frames[-1]) | (half_time != half_time[-1])
+    )
+
+    return int(other_frame_rows[-1]) + 1 if len(other_frame_rows) else 0
@@ -1,6 +1,17 @@
-from src.analysis.ball_tracker import compute_ball_trajectory_between_events
-from src.metadata import EventType
-from tests.utils import get_events_with_pos_df
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.analysis.ball_tracker import (
+    BallTrajectoryIndex,
+    TrajectoryMode,
+    compute_ball_trajectory_between_events,
+)
+from src.metadata import Event, EventType, TrackedPosition
+from src.utils import event_utils
+from src.utils.tracking_store import TrackingStore
+from tests.utils import get_events_with_pos_df, get_test_events, get_test_tracking
 
 
 def test_ball_trajectory_length() -> None:
@@ -19,3 +30,80 @@ def test_ball_trajectory_length() -> None:
         )
         == 6.50
     )
+
+
+def test_ball_trajectory_index() -> None:
+    rng = np.random.default_rng(3)
+    event_names = ["Pass", "Reception", "Ball Out of Play", "Clearance"]
+    rows = [[0, 1, 600.0, 1, 1, "Kick Off", 5250, 3400]] + [
+        [i, 1, 600.0 + i, 1, 1, rng.choice(event_names)] + list(rng.integers(0, 6800, 2))
+        for i in range(1, 100)
+    ]
+    events_df = get_events_with_pos_df(rows)
+    trajectory_index = BallTrajectoryIndex(events_df)
+
+    for n in range(3):
+        event2_id = trajectory_index.event_index.event_id_for(EventType.BALL_OUT_OF_PLAY, n)
+        between = events_df.iloc[1:event2_id][[TrackedPosition.x, TrackedPosition.y]]
+        expected = np.hypot(*np.diff(between.to_numpy(dtype=float), axis=0).T).sum() / 100.0
+
+        assert compute_ball_trajectory_between_events(
+            events_df,
+            (EventType.KICK_OFF, 0),
+            (EventType.BALL_OUT_OF_PLAY, n),
+            trajectory_index=trajectory_index,
+        ) == pytest.approx(expected, abs=0.005)
+
+
+def test_ball_trajectory_skips_unknown_positions() -> None:
+    events_df = get_events_with_pos_df(
+        [
+            [0, 1, 625.68, 358112, 1935290, "Kick Off", 5250, 3400],
+            [1, 1, 625.68, 358112, 1935290, "Pass", None, None],
+            [2, 1, 626.69, 339987, 1935290, "Reception", 5500, 4000],
+            [3, 1, 626.69, 339987, 1935290, "Pass", None, None],
+            [4, 1, 627.69, 358112, 1935290, "Reception", 5500, 4100],
+            [5, 1, 628.69, -1, -1, "Ball Out of Play", None, None],
+        ]
+    )
+    trajectory_index = BallTrajectoryIndex(events_df)
+
+    assert trajectory_index.distance_between_ids(0, 5) == 100.0
+    assert trajectory_index.distance_between_ids(0, 3) == 0.0
+    assert trajectory_index.distance_between_ids(4, 0) == 0.0
+
+
+def test_frames_ball_trajectory(tmp_path: Path) -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = get_test_tracking()
+    events_with_pos_df = event_utils.add_position_to_event(events_df, tracking_df)
+    store = TrackingStore.build(tracking_df, tmp_path)
+
+    # Reference: position of the latest event's player every frame.
+    positions = tracking_df.set_index([TrackedPosition.time, TrackedPosition.player_id])
+    subevents = events_df.iloc[1:10]
+    event_frames = np.round(subevents[Event.time].to_numpy(dtype=float) / 40).astype(int)
+    coords = []
+    for frame in range(event_frames[0], event_frames[-1] + 1):
+        player_id = subevents[Event.player_id].iloc[np.flatnonzero(event_frames <= frame)[-1]]
+        coords.append(
+            positions.loc[(frame * 40, player_id), [TrackedPosition.x, TrackedPosition.y]]
+        )
+    expected = np.hypot(*np.diff(np.array(coords, dtype=float), axis=0).T).sum() / 100.0
+
+    assert compute_ball_trajectory_between_events(
+        events_with_pos_df,
+        (EventType.KICK_OFF, 0),
+        (EventType.BALL_OUT_OF_PLAY, 0),
+        mode=TrajectoryMode.FRAMES,
+        tracking_store=store,
+    ) == pytest.approx(expected, abs=0.005)
+
+    with pytest.raises(ValueError):
+        compute_ball_trajectory_between_events(
+            events_with_pos_df,
+            (EventType.KICK_OFF, 0),
+            (EventType.BALL_OUT_OF_PLAY, 0),
+            mode=TrajectoryMode.FRAMES,
+        )
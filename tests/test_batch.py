@@ -0,0 +1,35 @@
+import shutil
+from pathlib import Path
+
+from src.batch import ERROR_COL, MATCH_COL, find_match_dirs, run_batch
+from tests.utils import get_test_tracking, write_tracking_csv
+
+
+def _make_match_dir(match_dir: Path) -> Path:
+    match_dir.mkdir(parents=True)
+    shutil.copy(Path(__file__).parent / "test_data/events.csv", match_dir)
+    write_tracking_csv(get_test_tracking(), match_dir / "tracking.csv")
+    return match_dir
+
+
+def test_run_batch(tmp_path: Path) -> None:
+    _make_match_dir(tmp_path / "season/match_1")
+    _make_match_dir(tmp_path / "season/match_2")
+    broken_match_dir = _make_match_dir(tmp_path / "season/match_3")
+    (broken_match_dir / "events.csv").write_text("event_id,half_time,time,player_id\n1,1,x,2\n")
+    (tmp_path / "season/not_a_match").mkdir()
+
+    assert [match_dir.name for match_dir in find_match_dirs(tmp_path)] == [
+        "match_1",
+        "match_2",
+        "match_3",
+    ]
+
+    results_df = run_batch(tmp_path, workers=2)
+
+    assert results_df[MATCH_COL].tolist() == [
+        str(tmp_path / f"season/match_{i}") for i in range(1, 4)
+    ]
+    assert results_df[ERROR_COL].isna().tolist() == [True, True, False]
+    assert results_df["most_passes_player_id"].iloc[0] == 270948
+    assert results_df["best_completion_player_id"].iloc[1] == 339987
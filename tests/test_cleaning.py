@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metadata import PITCH_LENGTH, PITCH_WIDTH, CompactTrackedPosition, TrackedPosition
+from src.utils import event_utils
+from src.utils.cleaning import OUT_OF_PITCH_COL, CoordinatePolicy, TrackingCleaner
+from src.utils.tracking_utils import ROWS_PER_FRAME, read_tracking_chunks
+from tests.utils import get_test_events, get_test_tracking, write_tracking_csv
+
+
+def _tracking_outside_the_pitch(n_frames: int = 20) -> pd.DataFrame:
+    tracking_df = get_test_tracking(n_frames=n_frames)
+    tracking_df.loc[1, TrackedPosition.x] = -20
+    tracking_df.loc[2, TrackedPosition.y] = PITCH_WIDTH + 15
+    tracking_df.loc[ROWS_PER_FRAME + 1, TrackedPosition.x] = PITCH_LENGTH + 1
+    return tracking_df
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_tracking_cleaner(compact: bool) -> None:
+    tracking_df = _tracking_outside_the_pitch()
+    if compact:
+        tracking_df = tracking_df.astype(CompactTrackedPosition.column_types())
+    tracking_copy_df = tracking_df.copy()
+
+    cleaner = TrackingCleaner()
+    cleaned_df = cleaner.clean(tracking_df)
+
+    pd.testing.assert_frame_equal(tracking_df, tracking_copy_df)
+    assert cleaner.report.to_dict() == {
+        "rows": 20 * ROWS_PER_FRAME,
+        "delimiter_rows": 20,
+        "out_of_pitch_rows": 3,
+    }
+    assert len(cleaned_df) == 20 * (ROWS_PER_FRAME - 1)
+    assert (cleaned_df[TrackedPosition.player_id] != -1).all()
+    assert np.flatnonzero(cleaned_df[OUT_OF_PITCH_COL]).tolist() == [0, 1, ROWS_PER_FRAME - 1]
+    pd.testing.assert_frame_equal(
+        cleaned_df.drop(columns=OUT_OF_PITCH_COL),
+        tracking_df[tracking_df[TrackedPosition.player_id] != -1],
+    )
+
+    clamped_df = TrackingCleaner(CoordinatePolicy.CLAMP).clean(tracking_df)
+    assert clamped_df.columns.tolist() == tracking_df.columns.tolist()
+    assert clamped_df.dtypes.tolist() == tracking_df.dtypes.tolist()
+    assert clamped_df[TrackedPosition.x].between(0, PITCH_LENGTH).all()
+    assert clamped_df[TrackedPosition.y].between(0, PITCH_WIDTH).all()
+    assert clamped_df.loc[[1, 2, ROWS_PER_FRAME + 1]].to_numpy(dtype=np.int64)[:, 4:].tolist() == [
+        [0, int(tracking_df.loc[1, TrackedPosition.y])],
+        [int(tracking_df.loc[2, TrackedPosition.x]), PITCH_WIDTH],
+        [PITCH_LENGTH, int(tracking_df.loc[ROWS_PER_FRAME + 1, TrackedPosition.y])],
+    ]
+
+
+def test_cleaning_keeps_the_event_positions() -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = get_test_tracking()
+
+    pd.testing.assert_frame_equal(
+        event_utils.add_position_to_event(
+            events_df, TrackingCleaner(CoordinatePolicy.KEEP).clean(tracking_df)
+        ),
+        event_utils.add_position_to_event(events_df, tracking_df),
+    )
+
+
+def test_read_tracking_chunks_cleaned(tmp_path: Path) -> None:
+    tracking_df = _tracking_outside_the_pitch(n_frames=50)
+    tracking_csv = write_tracking_csv(tracking_df, tmp_path / "tracking.csv")
+
+    cleaner = TrackingCleaner()
+    chunks = list(read_tracking_chunks(tracking_csv, frames_per_chunk=7, cleaner=cleaner))
+
+    assert len(chunks) > 1
+    assert cleaner.report.to_dict() == {
+        "rows": 50 * ROWS_PER_FRAME,
+        "delimiter_rows": 50,
+        "out_of_pitch_rows": 3,
+    }
+    pd.testing.assert_frame_equal(pd.concat(chunks), TrackingCleaner().clean(tracking_df))
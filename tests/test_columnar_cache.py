@@ -0,0 +1,49 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from src.main import load_csv_data
+from src.metadata import Event, TrackedPosition
+from src.utils import columnar_cache
+from tests.utils import get_test_events, get_test_tracking, write_tracking_csv
+
+
+def test_load_csv_data_from_cache(tmp_path: Path) -> None:
+    events_csv = Path(shutil.copy(Path(__file__).parent / "test_data/events.csv", tmp_path))
+
+    events_df = load_csv_data(events_csv, Event.column_types(), use_cache=True)
+    assert columnar_cache.cache_dir_for(events_csv).is_dir()
+
+    cached_events_df = columnar_cache.read_cache(events_csv, Event.column_types())
+    assert cached_events_df is not None
+    pd.testing.assert_frame_equal(cached_events_df, events_df)
+    pd.testing.assert_frame_equal(cached_events_df, get_test_events())
+
+    tracking_csv = write_tracking_csv(get_test_tracking(n_frames=5), tmp_path / "tracking.csv")
+    tracking_df = load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True)
+    pd.testing.assert_frame_equal(
+        load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True), tracking_df
+    )
+
+
+def test_cache_invalidation(tmp_path: Path) -> None:
+    events_csv = Path(shutil.copy(Path(__file__).parent / "test_data/events.csv", tmp_path))
+    load_csv_data(events_csv, Event.column_types(), use_cache=True)
+
+    # Touching the file keeps the cache as the content is unchanged.
+    stat = events_csv.stat()
+    os.utime(events_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert columnar_cache.read_cache(events_csv, Event.column_types()) is not None
+
+    # Schema change
+    assert columnar_cache.read_cache(events_csv, TrackedPosition.column_types()) is None
+
+    with open(events_csv, "a", encoding="utf-8") as events_file:
+        events_file.write("11,1,634.0,358112,1935290,Pass\n")
+    assert columnar_cache.read_cache(events_csv, Event.column_types()) is None
+
+    events_df = load_csv_data(events_csv, Event.column_types(), use_cache=True)
+    assert len(events_df) == 12
+    assert len(load_csv_data(events_csv, Event.column_types(), use_cache=True)) == 12
@@ -1,8 +1,20 @@
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
+import pytest
 
-from src.metadata import Event, EventType
+from src.main import load_csv_data
+from src.metadata import (
+    MISSING_ID,
+    CompactEvent,
+    CompactTrackedPosition,
+    Event,
+    EventType,
+    TrackedPosition,
+)
 from src.utils import event_utils
-from tests.utils import get_event_df, get_test_events
+from tests.utils import get_event_df, get_test_events, get_test_tracking
 
 
 def test_convert_time_to_ms() -> None:
@@ -13,11 +25,14 @@ def test_convert_time_to_ms() -> None:
             [2, 1, 626.69, 339987, 1935290, "Reception"],
         ]
     )
-    event_utils.convert_event_time_to_ms(events_df)
+    original_df = events_df.copy()
+    converted_df = event_utils.convert_event_time_to_ms(events_df)
 
-    assert events_df.iloc[0][Event.time] == 0
-    assert events_df.iloc[1][Event.time] == 0
-    assert events_df.iloc[2][Event.time] == 1010
+    assert converted_df.iloc[0][Event.time] == 0
+    assert converted_df.iloc[1][Event.time] == 0
+    assert converted_df.iloc[2][Event.time] == 1010
+    # The events are not modified.
+    pd.testing.assert_frame_equal(events_df, original_df)
 
 
 def test_get_event_id() -> None:
@@ -47,3 +62,112 @@ def test_is_event_like_df() -> None:
 
     test_events_df.drop(Event.event, inplace=True, axis=1)
     assert not event_utils.is_event_like_df(test_events_df)
+
+
+def test_event_index() -> None:
+    test_events_df = get_test_events()
+    # Index sorts the events by the event id
+    event_index = event_utils.EventIndex(test_events_df.iloc[::-1])
+
+    assert event_index.event_id_for(EventType.KICK_OFF, 0) == 0
+    assert event_index.event_id_for(EventType.CROSS, 1) == 6
+    assert event_index.event_id_for(EventType.INTERCEPTION, -1) == 9
+    assert event_index.occurrences(EventType.CORNER).size == 0
+    with pytest.raises(IndexError):
+        event_index.event_id_for(EventType.BALL_OUT_OF_PLAY, 1)
+
+    for event_name in test_events_df[Event.event].unique():
+        for n in range((test_events_df[Event.event] == event_name).sum()):
+            assert event_index.event_id_for(event_name, n) == event_utils.get_event_id_for(
+                test_events_df, event_name, n
+            )
+
+    subevents = event_index.events_between(0, 10)
+    pd.testing.assert_frame_equal(subevents, event_utils.get_events_between(test_events_df, 0, 10))
+    assert event_index.events_between(3, 4).empty
+    assert event_index.events_between(8, 2).empty
+    assert event_index.events_between(-5, 2)[Event.event_id].tolist() == [0, 1]
+
+
+def test_event_index_skips_events_without_name() -> None:
+    events_df = get_event_df(
+        [
+            [0, 1, 1.0, 1, 10, "Kick Off"],
+            [1, 1, 2.0, 1, 10, "Pass"],
+            [2, 1, 3.0, None, None, None],
+            [3, 1, 4.0, 2, 20, "Kick Off"],
+        ]
+    )
+    event_index = event_utils.EventIndex(events_df)
+
+    assert event_index.occurrences(EventType.KICK_OFF).tolist() == [0, 3]
+    assert event_index.event_id_for(EventType.KICK_OFF, 0) == 0
+    assert event_index.event_id_for(EventType.KICK_OFF, 1) == 3
+    assert event_index.event_id_for(EventType.PASS, 0) == 1
+
+
+def test_add_position_to_event() -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = get_test_tracking()
+    events_copy_df, tracking_copy_df = events_df.copy(), tracking_df.copy()
+
+    events_with_pos_df = event_utils.add_position_to_event(events_df, tracking_df)
+
+    # Inputs are not modified
+    pd.testing.assert_frame_equal(events_df, events_copy_df)
+    pd.testing.assert_frame_equal(tracking_df, tracking_copy_df)
+
+    assert events_with_pos_df.columns.tolist() == Event.columns() + ["x", "y"]
+    # Reception at 1010ms is closest to the frame at 1000ms
+    reception = events_with_pos_df.iloc[2]
+    tracked = tracking_df.loc[
+        (tracking_df[TrackedPosition.time] == 1000)
+        & (tracking_df[TrackedPosition.player_id] == reception[Event.player_id])
+    ].iloc[0]
+    assert (reception["x"], reception["y"]) == (tracked["x"], tracked["y"])
+    assert events_with_pos_df[["x", "y"]].iloc[-1].isna().all()
+
+
+def test_add_nearest_position_to_event() -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = get_test_tracking()
+
+    pd.testing.assert_frame_equal(
+        event_utils.add_position_to_event(events_df, tracking_df, tolerance_ms=20),
+        event_utils.add_position_to_event(events_df, tracking_df),
+    )
+
+    events_with_pos_df = event_utils.add_position_to_event(events_df, tracking_df, tolerance_ms=5)
+    distance_to_frame = (events_df[Event.time] % 40).to_numpy()
+    distance_to_frame = np.minimum(distance_to_frame, 40 - distance_to_frame)
+    assert (
+        events_with_pos_df["x"].isna().tolist()
+        == ((distance_to_frame > 5) | events_df[Event.player_id].isna()).tolist()
+    )
+
+
+def test_add_position_to_event_compact_dtypes() -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    compact_events_df = load_csv_data(
+        Path(__file__).parent / "test_data/events.csv", CompactEvent.column_types()
+    )
+    compact_events_df = event_utils.convert_event_time_to_ms(compact_events_df, np.dtype(np.int32))
+    tracking_df = get_test_tracking()
+
+    assert compact_events_df[Event.player_id].dtype == np.int32
+    assert (compact_events_df[Event.player_id] == MISSING_ID).tolist() == (
+        events_df[Event.player_id].isna().tolist()
+    )
+    assert compact_events_df[Event.time].tolist() == events_df[Event.time].tolist()
+
+    compact_events_with_pos_df = event_utils.add_position_to_event(
+        compact_events_df, tracking_df.astype(CompactTrackedPosition.column_types())
+    )
+    events_with_pos_df = event_utils.add_position_to_event(events_df, tracking_df)
+    # Events without a player don't take the position of the delimiter rows.
+    pd.testing.assert_frame_equal(
+        compact_events_with_pos_df[["x", "y"]], events_with_pos_df[["x", "y"]]
+    )
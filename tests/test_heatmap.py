@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.heatmap import (
+    PlayerHeatmaps,
+    aggregate_heatmaps,
+    compute_heatmaps,
+)
+from src.metadata import CompactTrackedPosition, TrackedPosition
+from src.utils.cleaning import CoordinatePolicy, TrackingCleaner
+from src.utils.tracking_utils import read_tracking_chunks
+from tests.utils import TEST_TEAMS, get_test_tracking, write_tracking_csv
+
+
+def _positions_df(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=TrackedPosition.columns()).astype(
+        TrackedPosition.column_types()
+    )
+
+
+def test_player_heatmaps() -> None:
+    positions_df = _positions_df(
+        [
+            [1, 0, -1, -1, -1, -1],
+            [1, 0, 20, 2, 0, 0],
+            [1, 0, 10, 1, 10499, 6799],
+            [1, 40, -1, -1, -1, -1],
+            [1, 40, 20, 2, 5300, 3300],
+            [1, 40, 10, 1, 11000, -50],
+            [1, 80, 30, 1, None, None],
+            [1, 80, 20, 2, 100, 100],
+        ]
+    )
+
+    heatmaps = PlayerHeatmaps.from_positions(positions_df, grid=(2, 2))
+
+    assert heatmaps.team_ids.tolist() == [1, 2]
+    assert heatmaps.player_ids.tolist() == [10, 20]
+    assert heatmaps.frames.tolist() == [[[0, 0], [1, 1]], [[2, 0], [1, 0]]]
+    assert heatmaps.seconds()[1, 0, 0] == pytest.approx(0.08)
+    team_heatmaps = heatmaps.team_heatmaps()
+    assert list(team_heatmaps) == [1, 2]
+    assert team_heatmaps[2].tolist() == [[2, 0], [1, 0]]
+
+    with pytest.raises(ValueError):
+        PlayerHeatmaps.from_positions(positions_df, grid=(0, 2))
+    with pytest.raises(ValueError):
+        PlayerHeatmaps(np.array([1]), np.array([10]), np.zeros((2, 2, 2)))
+
+
+def test_add_player_heatmaps(tmp_path: Path) -> None:
+    first = PlayerHeatmaps(np.array([1, 2]), np.array([10, 20]), np.array([[[1, 0]], [[0, 2]]]))
+    second = PlayerHeatmaps(
+        np.array([1, 1, 3]), np.array([10, 11, 30]), np.array([[[0, 4]], [[5, 0]], [[1, 1]]])
+    )
+
+    total = first + second
+    assert total.team_ids.tolist() == [1, 1, 2, 3]
+    assert total.player_ids.tolist() == [10, 11, 20, 30]
+    assert total.frames[:, 0].tolist() == [[1, 4], [5, 0], [0, 2], [1, 1]]
+    assert total == second + first
+    assert total.team_heatmaps()[1].tolist() == [[6, 4]]
+    assert aggregate_heatmaps([first, second], grid=(1, 2)) == total
+    assert aggregate_heatmaps([], grid=(1, 2)) == PlayerHeatmaps.empty((1, 2))
+    assert PlayerHeatmaps.empty((1, 2)).team_heatmaps() == {}
+
+    with pytest.raises(ValueError):
+        first + PlayerHeatmaps.empty((2, 1))
+
+    total.save(tmp_path / "heatmaps.npz")
+    assert PlayerHeatmaps.load(tmp_path / "heatmaps.npz") == total
+
+
+def test_compute_heatmaps_from_chunks(tmp_path: Path) -> None:
+    tracking_df = get_test_tracking(n_frames=60)
+    tracking_csv = write_tracking_csv(tracking_df, tmp_path / "tracking.csv")
+
+    heatmaps = compute_heatmaps(tracking_df)
+    assert len(heatmaps.player_ids) == sum(len(players) for players in TEST_TEAMS.values())
+    assert (heatmaps.frames.sum(axis=(1, 2)) == 60).all()
+    assert sorted(heatmaps.team_heatmaps()) == sorted(TEST_TEAMS)
+
+    chunks = read_tracking_chunks(
+        tracking_csv,
+        frames_per_chunk=7,
+        column_dtypes=CompactTrackedPosition.column_types(),
+        cleaner=TrackingCleaner(CoordinatePolicy.FLAG),
+    )
+    assert compute_heatmaps(chunks) == heatmaps
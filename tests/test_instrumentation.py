@@ -0,0 +1,103 @@
+import json
+import logging
+import pstats
+import shutil
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from src.main import load_match_data, solve_challenges
+from src.utils.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from tests.utils import get_test_tracking, write_tracking_csv
+
+
+def test_instrumentation_records_stages(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    profile_path = tmp_path / "stage.prof"
+    instrumentation = Instrumentation(profile_stage="second", profile_path=profile_path)
+
+    with caplog.at_level(logging.INFO, logger="src.utils.instrumentation"):
+        with instrumentation.stage("first", rows=3):
+            data = list(range(100_000))
+        with instrumentation.stage("second") as record:
+            record.rows = len(sorted(data, reverse=True))
+
+    assert [record.name for record in instrumentation.records] == ["first", "second"]
+    assert [record.rows for record in instrumentation.records] == [3, 100_000]
+    first = instrumentation.records[0]
+    assert first.wall_time_s > 0
+    assert first.peak_memory_mb is not None and first.peak_memory_mb > 1
+
+    logged = [json.loads(message) for message in caplog.messages]
+    assert logged == [record.to_dict() for record in instrumentation.records]
+
+    assert profile_path.is_file()
+    assert "sorted" in str(pstats.Stats(str(profile_path)).stats)  # type: ignore
+
+
+def test_nested_stages_keep_the_outer_peak() -> None:
+    instrumentation = Instrumentation()
+
+    with instrumentation.stage("outer"):
+        data = list(range(200_000))
+        del data
+        with instrumentation.stage("inner"):
+            small = list(range(1000))
+            with instrumentation.stage("innermost"):
+                more = list(range(100_000))
+        del small, more
+
+    innermost, inner, outer = instrumentation.records
+    assert [record.name for record in instrumentation.records] == ["innermost", "inner", "outer"]
+    assert innermost.peak_memory_mb is not None and innermost.peak_memory_mb > 1
+    assert inner.peak_memory_mb is not None and inner.peak_memory_mb >= innermost.peak_memory_mb
+    assert outer.peak_memory_mb is not None and outer.peak_memory_mb > inner.peak_memory_mb
+    assert not tracemalloc.is_tracing()
+
+
+def test_stages_keep_the_peak_of_the_caller() -> None:
+    instrumentation = Instrumentation()
+    tracemalloc.start()
+    try:
+        data = list(range(200_000))
+        del data
+        caller_peak = tracemalloc.get_traced_memory()[1]
+        with instrumentation.stage("stage") as record:
+            pass
+
+        assert record.peak_memory_mb is None
+        assert tracemalloc.get_traced_memory()[1] >= caller_peak
+    finally:
+        tracemalloc.stop()
+
+
+def test_instrumentation_disabled() -> None:
+    with NO_INSTRUMENTATION.stage("stage", rows=1) as record:
+        pass
+
+    assert record.rows == 1
+    assert not NO_INSTRUMENTATION.records
+
+
+def test_solve_challenges_instrumented(tmp_path: Path) -> None:
+    shutil.copy(Path(__file__).parent / "test_data/events.csv", tmp_path)
+    write_tracking_csv(get_test_tracking(), tmp_path / "tracking.csv")
+    instrumentation = Instrumentation(trace_memory=False)
+
+    results = solve_challenges(*load_match_data(tmp_path, instrumentation), instrumentation)
+
+    assert results == solve_challenges(*load_match_data(tmp_path))
+    assert [record.name for record in instrumentation.records] == [
+        "load_events",
+        "convert_event_time_to_ms",
+        "load_tracking",
+        "clean_tracking",
+        "add_position_to_event",
+        "ball_trajectory",
+        "compute_pass_status",
+        "compute_player_stats",
+        "find_most_passing_player",
+        "find_most_pass_completing_player",
+    ]
+    assert all(record.peak_memory_mb is None for record in instrumentation.records)
+    assert instrumentation.records[2].rows == len(get_test_tracking())
@@ -1,8 +1,23 @@
 from contextlib import suppress
+from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pytest
 from pandas.api.types import pandas_dtype
 
-from src.metadata import Metadata
+from src.main import load_csv_data
+from src.metadata import (
+    EVENT_DTYPE,
+    MISSING_ID,
+    CompactEvent,
+    Event,
+    EventType,
+    Metadata,
+    event_codes,
+    fill_missing_ids,
+    parse_column_types,
+)
 
 
 def test_metadata() -> None:
@@ -17,3 +32,55 @@ def test_metadata() -> None:
 
     with suppress(AttributeError):
         test_data.event_name
+
+
+def test_event_codes() -> None:
+    assert [event.code for event in EventType] == list(range(len(EventType)))
+    assert EventType.PASS.code == 1
+    assert list(EVENT_DTYPE.categories) == [event.value for event in EventType]
+
+    names = ["Pass", "Cross", "Unknown", None]
+    expected = [EventType.PASS.code, EventType.CROSS.code, -1, -1]
+    assert event_codes(pd.Series(names)).tolist() == expected
+    assert event_codes(pd.Series(names[:2] + names[3:], dtype=EVENT_DTYPE)).tolist() == (
+        expected[:2] + expected[3:]
+    )
+    assert event_codes(pd.Series(names[:2], dtype=EVENT_DTYPE)).dtype == np.int8
+
+
+def test_parse_compact_column_types() -> None:
+    column_types = CompactEvent.column_types()
+    events_df = pd.DataFrame(
+        {
+            "event_id": [0.0, 1.0],
+            "half_time": [1.0, 1.0],
+            "time": [600.0, 601.5],
+            "player_id": [358112.0, np.nan],
+            "team_id": [1935290.0, np.nan],
+            "event": pd.Series(["Pass", "Ball Out of Play"], dtype=EVENT_DTYPE),
+        }
+    ).astype(parse_column_types(column_types))
+
+    fill_missing_ids(events_df, column_types)
+
+    assert events_df.dtypes.to_dict() == column_types
+    assert events_df["player_id"].tolist() == [358112, MISSING_ID]
+    assert events_df["time"].tolist() == [600.0, 601.5]
+
+
+def test_unknown_events_warning(tmp_path: Path) -> None:
+    events_csv = tmp_path / "events.csv"
+    events_csv.write_text(
+        "event_id,half_time,time,player_id,team_id,event\n"
+        "0,1,600.0,1,10,Kick Off\n"
+        "1,1,601.0,1,10,Dribble\n"
+        "2,1,602.0,1,10,\n"
+        "3,1,603.0,1,10,Dribble\n",
+        encoding="utf-8",
+    )
+
+    with pytest.warns(UserWarning, match=r"2 values of event are unknown.*\['Dribble'\]"):
+        events_df = load_csv_data(events_csv, Event.column_types())
+
+    assert events_df["event"].dtype == EVENT_DTYPE
+    assert events_df["event"].isna().tolist() == [False, True, True, True]
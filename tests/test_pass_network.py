@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.analysis.pass_network import (
+    PASSER_COL,
+    PASSES_COL,
+    RECEIVER_COL,
+    PassNetwork,
+    aggregate_pass_networks,
+    compute_pass_networks,
+)
+from src.analysis.pass_statistics import (
+    PASS_RECEIVER_COL,
+    PASS_STATUS_COL,
+    compute_pass_receivers,
+    compute_pass_status,
+)
+from src.metadata import MISSING_ID
+from tests.utils import get_event_df, get_test_events
+
+_EVENTS = [
+    [1, 1, 600.0, 11, 1, "Pass"],
+    [2, 1, 601.0, 12, 1, "Reception"],
+    [3, 1, 602.0, 12, 1, "Pass"],
+    [4, 1, 603.0, 21, 2, "Clearance"],
+    [5, 1, 604.0, 13, 1, "Reception"],
+    [6, 1, 605.0, 13, 1, "Pass"],
+    [7, 1, 606.0, 11, 1, "Pass"],
+    [8, 1, 607.0, 12, 1, "Pass"],
+    [9, 1, 608.0, 22, 2, "Interception"],
+    [10, 1, 609.0, 22, 2, "Pass"],
+    [11, 1, 610.0, 21, 2, "Reception"],
+]
+
+
+def test_compute_pass_receivers() -> None:
+    events_df = get_test_events()
+    receivers_df = compute_pass_receivers(events_df)
+
+    assert (receivers_df[PASS_STATUS_COL] == compute_pass_status(events_df)[PASS_STATUS_COL]).all()
+    assert (
+        (receivers_df[PASS_RECEIVER_COL] != MISSING_ID) == (receivers_df[PASS_STATUS_COL] == 1)
+    ).all()
+
+    receivers_df = compute_pass_receivers(get_event_df(_EVENTS))
+    assert receivers_df[PASS_RECEIVER_COL].tolist() == [12, -1, 13, -1, -1, 11, 12, -1, -1, 21, -1]
+
+
+def test_compute_pass_networks() -> None:
+    networks = compute_pass_networks(get_event_df(_EVENTS).sample(frac=1, random_state=2))
+
+    assert sorted(networks) == [1, 2]
+    assert networks[1].player_ids.tolist() == [11, 12, 13]
+    assert networks[1].passes.toarray().tolist() == [[0, 2, 0], [0, 0, 1], [1, 0, 0]]
+    assert networks[2].to_frame().values.tolist() == [[22, 21, 1]]
+
+    assert (
+        sum(network.passes.sum() for network in compute_pass_networks(get_test_events()).values())
+        == (compute_pass_status(get_test_events())[PASS_STATUS_COL] == 1).sum()
+    )
+
+
+def test_pass_network_add(tmp_path: Path) -> None:
+    first = PassNetwork.from_pairs(1, np.array([11, 11, 12]), np.array([12, 12, 11]))
+    second = PassNetwork.from_pairs(1, np.array([13, 11]), np.array([11, 12]))
+
+    season = aggregate_pass_networks([{1: first}, {1: second, 2: second}])
+
+    assert season[1].player_ids.tolist() == [11, 12, 13]
+    assert season[1].to_frame().to_dict("list") == {
+        PASSER_COL: [11, 12, 13],
+        RECEIVER_COL: [12, 11, 11],
+        PASSES_COL: [3, 1, 1],
+    }
+    assert season[1] == second + first
+    assert season[2] == second
+    with pytest.raises(ValueError):
+        first + PassNetwork.from_pairs(2, np.array([21]), np.array([22]))
+
+    season[1].save(tmp_path / "team_1.npz")
+    assert PassNetwork.load(tmp_path / "team_1.npz") == season[1]
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.pass_pressure import (
+    NEAREST_OPPONENT_COL,
+    OPPONENTS_IN_RADIUS_COL,
+    compute_pass_pressure,
+)
+from src.analysis.pass_statistics import PASS_STATUS_COL, PassStatus, compute_pass_status
+from src.main import load_csv_data
+from src.metadata import CompactEvent, CompactTrackedPosition, Event, TrackedPosition
+from src.utils import event_utils
+from tests.utils import get_event_df, get_test_events, get_test_tracking
+
+
+def test_compute_pass_pressure() -> None:
+    events_df = get_event_df(
+        [
+            [1, 1, 0.0, 10, 1, "Pass"],
+            [2, 1, 0.04, 11, 1, "Reception"],
+            [3, 1, 0.08, 11, 1, "Pass"],
+            [4, 1, 0.12, 12, 1, "Pass"],
+            [5, 1, 0.16, 20, 2, "Interception"],
+        ]
+    )
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = pd.DataFrame(
+        [
+            [1, 0, -1, -1, -1, -1],
+            [1, 0, 10, 1, 0, 0],
+            [1, 0, 11, 1, 50, 0],
+            [1, 0, 20, 2, 300, 400],
+            [1, 0, 21, 2, 100, 0],
+            [1, 0, 22, 2, 600, 0],
+            [1, 80, 11, 1, 1000, 1000],
+            [1, 80, 20, 2, 1000, 1300],
+            [1, 120, 20, 2, 0, 0],
+        ],
+        columns=TrackedPosition.columns(),
+    ).astype(TrackedPosition.column_types())
+
+    pressure_df = compute_pass_pressure(events_df, tracking_df.iloc[::-1])
+
+    pd.testing.assert_frame_equal(
+        pressure_df.drop(columns=[NEAREST_OPPONENT_COL, OPPONENTS_IN_RADIUS_COL]),
+        compute_pass_status(events_df),
+    )
+    assert pressure_df[NEAREST_OPPONENT_COL].tolist() == pytest.approx(
+        [100, np.nan, 300, np.nan, np.nan], nan_ok=True
+    )
+    # Passer of the 4th event isn't tracked.
+    assert pressure_df[OPPONENTS_IN_RADIUS_COL].tolist() == [2, pd.NA, 1, pd.NA, pd.NA]
+    assert compute_pass_pressure(events_df, tracking_df, radius=50)[
+        OPPONENTS_IN_RADIUS_COL
+    ].tolist() == [0, pd.NA, 0, pd.NA, pd.NA]
+
+
+def test_compute_pass_pressure_without_passer_team() -> None:
+    events_df = get_event_df(
+        [
+            [1, 1, 0.0, 10, None, "Pass"],
+            [2, 1, 0.04, 11, 1, "Reception"],
+        ]
+    )
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = pd.DataFrame(
+        [[1, 0, 10, 1, 0, 0], [1, 0, 11, 1, 50, 0], [1, 0, 20, 2, 300, 400]],
+        columns=TrackedPosition.columns(),
+    ).astype(TrackedPosition.column_types())
+
+    # Teammates would count as opponents without the passer's team.
+    pressure_df = compute_pass_pressure(events_df, tracking_df)
+
+    assert pressure_df[NEAREST_OPPONENT_COL].isna().all()
+    assert pressure_df[OPPONENTS_IN_RADIUS_COL].isna().all()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_compute_pass_pressure_all_pairs(compact: bool) -> None:
+    events_df = get_test_events()
+    tracking_df = get_test_tracking()
+    if compact:
+        events_df = load_csv_data(
+            Path(__file__).parent / "test_data/events.csv", CompactEvent.column_types()
+        )
+        tracking_df = tracking_df.astype(CompactTrackedPosition.column_types())
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+
+    pressure_df = compute_pass_pressure(compute_pass_status(events_df), tracking_df)
+
+    frames = event_utils.tracking_frame_numbers(tracking_df)
+    passes_df = pressure_df[pressure_df[PASS_STATUS_COL] != PassStatus.Not_A_Pass.value]
+    assert passes_df[OPPONENTS_IN_RADIUS_COL].notna().sum() > 0
+    for _, event in passes_df.iterrows():
+        frame_df = tracking_df[frames == round(event[Event.time] / 40)]
+        passer_df = frame_df[frame_df[TrackedPosition.player_id] == event[Event.player_id]]
+        if passer_df.empty:
+            assert pd.isna(event[OPPONENTS_IN_RADIUS_COL])
+            continue
+
+        opponents_df = frame_df[
+            ~frame_df[TrackedPosition.team_id].isin([event[Event.team_id], -1])
+        ].astype(np.float64)
+        distance = np.hypot(
+            opponents_df[TrackedPosition.x] - float(passer_df[TrackedPosition.x].iloc[0]),
+            opponents_df[TrackedPosition.y] - float(passer_df[TrackedPosition.y].iloc[0]),
+        )
+        assert event[NEAREST_OPPONENT_COL] == pytest.approx(distance.min())
+        assert event[OPPONENTS_IN_RADIUS_COL] == (distance <= 500).sum()
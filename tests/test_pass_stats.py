@@ -1,14 +1,23 @@
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 
+import pandas as pd
 import pytest
 
 from src.analysis.pass_statistics import (
     PASS_STATUS_COL,
+    LivePassStatistics,
+    PlayerStats,
     compute_pass_status,
+    compute_player_stats,
+    compute_team_stats,
+    find_most_pass_completing_player,
+    find_most_passing_player,
     is_long_pass_completed,
     is_short_pass_completed,
+    top_players,
 )
-from tests.utils import get_event_df, get_test_events
+from src.metadata import MISSING_ID, CompactEvent, Event, EventType
+from tests.utils import get_event_df, get_random_events, get_test_events
 
 
 @pytest.mark.parametrize(
@@ -105,3 +114,165 @@ def test_compute_pass_status() -> None:
     assert get_pass_status(8) == 0
     assert get_pass_status(7) == -1
     assert get_pass_status(9) == -1
+
+
+def test_compute_pass_status_compact_dtypes() -> None:
+    rows = [
+        [0, 1, 600.0, 1, 10, "Pass"],
+        [1, 1, 601.0, 2, 10, "Reception"],
+        [2, 1, 602.0, 2, MISSING_ID, "Pass"],
+        [3, 1, 603.0, 3, MISSING_ID, "Reception"],
+        [4, 1, 604.0, MISSING_ID, MISSING_ID, "Ball Out of Play"],
+    ]
+    events_df = pd.DataFrame(rows, columns=CompactEvent.columns()).astype(
+        CompactEvent.column_types()
+    )
+
+    # Missing teams are never the same team.
+    assert compute_pass_status(events_df)[PASS_STATUS_COL].tolist() == [1, -1, 0, -1, -1]
+
+
+def test_compute_player_stats() -> None:
+    player_stats_df = compute_player_stats(get_test_events())
+
+    assert player_stats_df.columns.tolist() == PlayerStats.columns()
+    assert player_stats_df.index.names == [Event.team_id, Event.player_id]
+    assert player_stats_df.reset_index().values.tolist() == [
+        [1884426, 395433, 1, 0, 0.0, 0, 1, 0],
+        [1935290, 270948, 1, 0, 0.0, 1, 1, 0],
+        [1935290, 339987, 1, 1, 100.0, 1, 0, 1],
+        [1935290, 358112, 1, 1, 100.0, 0, 1, 0],
+    ]
+    pd.testing.assert_frame_equal(
+        compute_player_stats(compute_pass_status(get_test_events()).iloc[::-1]),
+        player_stats_df,
+    )
+
+    team_stats_df = compute_team_stats(player_stats_df)
+    assert team_stats_df.index.tolist() == [1884426, 1935290]
+    assert team_stats_df[PlayerStats.passes].tolist() == [1, 3]
+    assert team_stats_df[PlayerStats.completion_rate].tolist() == pytest.approx([0.0, 200 / 3])
+    assert team_stats_df[PlayerStats.long_passes].tolist() == [0, 1]
+
+
+def test_top_players() -> None:
+    rows = [[i, 1, 600.0 + i, 1000 + i % 3, 0, "Pass"] for i in range(7)]
+    player_stats_df = compute_player_stats(get_event_df(rows))
+
+    top_df = top_players(player_stats_df, PlayerStats.passes, k=2)
+    assert top_df[Event.player_id].tolist() == [1000, 1001]
+    assert top_df[PlayerStats.passes].tolist() == [3, 2]
+
+    # Every pass but the last is received by the same team.
+    top_df = top_players(player_stats_df, PlayerStats.completion_rate, k=3, min_passes=3)
+    assert top_df[Event.player_id].tolist() == [1000]
+    assert top_players(player_stats_df, PlayerStats.completion_rate)[Event.player_id][0] == 1001
+    with pytest.raises(ValueError):
+        top_players(player_stats_df, "goals")
+
+
+def test_player_stats_one_row_per_player() -> None:
+    rows: List[List[Any]] = [
+        [0, 1, 600.0, 1000, None, "Pass"],
+        [1, 1, 601.0, 1000, 5, "Pass"],
+        [2, 1, 602.0, None, 5, "Pass"],
+        [3, 1, 603.0, None, 5, "Pass"],
+        [4, 1, 604.0, 1000, 6, "Pass"],
+        [5, 1, 605.0, None, 5, "Pass"],
+        [6, 1, 606.0, 1001, 6, "Pass"],
+    ]
+    player_stats_df = compute_player_stats(get_event_df(rows))
+
+    assert player_stats_df.index.tolist() == [(5, 1000), (6, 1001)]
+    assert player_stats_df[PlayerStats.passes].tolist() == [3, 1]
+    assert find_most_passing_player(get_event_df(rows)) == (1000, 3)
+
+    # Statistics given with a row without a player don't rank it.
+    unknown_player_df = pd.concat(
+        [player_stats_df, player_stats_df.iloc[:1].rename(index={1000: MISSING_ID})]
+    )
+    unknown_player_df.loc[(5, MISSING_ID), PlayerStats.passes] = 10
+    assert top_players(unknown_player_df, PlayerStats.passes)[Event.player_id].tolist() == [1000]
+
+
+def _reference_pass_status(events_df: pd.DataFrame) -> List[int]:
+    """Pass status computed with the rolling window rules, one event at a time."""
+    statuses: List[int] = []
+    for i in range(len(events_df)):
+        window = events_df.iloc[i : i + 3]
+        if window.iloc[0][Event.event] not in [EventType.PASS, EventType.CROSS]:
+            statuses.append(-1)
+        elif len(window) == 1:
+            statuses.append(0 if window.iloc[0][Event.event] == EventType.PASS else -1)
+        elif is_short_pass_completed(window) or (
+            len(window) == 3 and is_long_pass_completed(window)
+        ):
+            statuses.append(1)
+        else:
+            statuses.append(0)
+
+    return statuses
+
+
+@pytest.mark.parametrize("last_event", ["Pass", "Cross", "Clearance", "Reception"])
+def test_compute_pass_status_matches_rules(last_event: str) -> None:
+    events_df = get_random_events(200, seed=7, last_event=last_event)
+
+    pass_status = compute_pass_status(events_df)[PASS_STATUS_COL].tolist()
+
+    assert pass_status == _reference_pass_status(events_df)
+
+
+@pytest.mark.parametrize("last_event", ["Pass", "Cross"])
+def test_compute_pass_status_chunked(last_event: str) -> None:
+    events_df = get_random_events(100, seed=5, last_event=last_event).sample(frac=1, random_state=3)
+    expected_df = compute_pass_status(events_df)
+
+    for chunk_size in [1, 2, 3, 7, 100]:
+        pd.testing.assert_frame_equal(
+            compute_pass_status(events_df, chunk_size=chunk_size, workers=2), expected_df
+        )
+    with pytest.raises(ValueError):
+        compute_pass_status(events_df, chunk_size=0)
+
+
+def _ingest_all(events_df: pd.DataFrame) -> Tuple[LivePassStatistics, Dict[int, int]]:
+    live_stats = LivePassStatistics()
+    pass_status: Dict[int, int] = {}
+    for row in events_df.itertuples(index=False):
+        player_id = None if pd.isna(row.player_id) else int(row.player_id)
+        team_id = None if pd.isna(row.team_id) else int(row.team_id)
+        for event_id, status in live_stats.ingest(row.event_id, player_id, team_id, row.event):
+            pass_status[event_id] = status.value
+    for event_id, status in live_stats.finish():
+        pass_status[event_id] = status.value
+
+    return live_stats, pass_status
+
+
+@pytest.mark.parametrize("last_event", ["Pass", "Cross", "Clearance", "Reception"])
+def test_live_pass_statistics(last_event: str) -> None:
+    events_df = compute_pass_status(get_random_events(200, seed=11, last_event=last_event))
+
+    live_stats, pass_status = _ingest_all(events_df)
+
+    expected = events_df.loc[events_df[PASS_STATUS_COL] != -1]
+    assert pass_status == {
+        **dict(zip(expected[Event.event_id], expected[PASS_STATUS_COL])),
+        **({200: -1} if last_event == "Cross" else {}),
+    }
+    assert live_stats.find_most_passing_player() == find_most_passing_player(events_df)
+    assert live_stats.find_most_pass_completing_player() == pytest.approx(
+        find_most_pass_completing_player(events_df)
+    )
+
+
+def test_live_pass_statistics_leaderboard() -> None:
+    live_stats, _ = _ingest_all(get_test_events())
+
+    assert live_stats.find_most_passing_player() == (270948, 1)
+    assert live_stats.find_most_pass_completing_player() == (339987, 100.0, 1)
+    with pytest.raises(ValueError):
+        live_stats.ingest(11, 358112, 1935290, EventType.PASS)
+    with pytest.raises(ValueError):
+        LivePassStatistics().find_most_passing_player()
@@ -0,0 +1,109 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.player_motion import MotionStats, compute_player_motion
+from src.metadata import CompactTrackedPosition, TrackedPosition
+from src.utils.cleaning import TrackingCleaner
+from tests.utils import get_test_tracking
+
+
+def _tracking(rows: List[List[int]]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=TrackedPosition.columns()).astype(
+        TrackedPosition.column_types()
+    )
+
+
+def _run(
+    player_id: int, speeds: List[float], half_time: int = 1, start: int = 0
+) -> List[List[int]]:
+    """Positions of the player running along the x axis at the speeds in m/s every frame."""
+    x: np.ndarray = np.concatenate([[0], np.cumsum(np.asarray(speeds) * 4)])
+    return [
+        [half_time, start + frame * 40, player_id, 1, int(round(pos_x)), 100]
+        for frame, pos_x in enumerate(x)
+    ]
+
+
+def test_compute_player_motion() -> None:
+    tracking_df = _tracking(
+        # 2s at 5 m/s and then 1s at 8 m/s, a sprint.
+        _run(10, [5.0] * 50 + [8.0] * 25)
+        # Two sprints of 1.2s and one of 0.4s.
+        + _run(11, [8.0] * 30 + [3.0] * 10 + [8.0] * 30 + [1.0] * 5 + [8.0] * 10)
+        # 1s at 3 m/s in every half, the positions don't continue across the halves.
+        + _run(12, [3.0] * 25)
+        + _run(12, [3.0] * 25, half_time=2, start=40)
+        + [[1, 0, -1, -1, -1, -1]]
+    )
+
+    motion_df = compute_player_motion(tracking_df.sample(frac=1, random_state=1))
+
+    assert motion_df.columns.tolist() == MotionStats.columns()
+    assert motion_df.index.tolist() == [(1, 10), (1, 11), (1, 12)]
+    assert motion_df[MotionStats.distance].to_numpy() == pytest.approx([18, 23.8, 6])
+    assert motion_df[MotionStats.max_speed].to_numpy() == pytest.approx([8, 8, 3])
+    assert motion_df[MotionStats.high_intensity_distance].to_numpy() == pytest.approx([8, 22.4, 0])
+    assert motion_df[MotionStats.sprinting_distance].to_numpy() == pytest.approx([8, 22.4, 0])
+    assert motion_df[MotionStats.running_distance].to_numpy() == pytest.approx([10, 0, 0])
+    assert motion_df[MotionStats.jogging_distance].to_numpy() == pytest.approx([0, 1.2, 6])
+    assert motion_df[MotionStats.walking_distance].to_numpy() == pytest.approx([0, 0.2, 0])
+    assert motion_df[MotionStats.sprints].tolist() == [1, 2, 0]
+
+
+def test_compute_player_motion_gaps() -> None:
+    rows = _run(10, [5.0] * 25)
+    # Not tracked for 2s, e.g. off the pitch for a treatment, and back 10m further.
+    rows += [row[:4] + [row[4] + 1500, row[5]] for row in _run(10, [5.0] * 25, start=3000)]
+
+    motion_df = compute_player_motion(_tracking(rows))
+    assert motion_df[MotionStats.distance].to_numpy() == pytest.approx([10])
+    assert compute_player_motion(_tracking(rows), max_gap_ms=3000)[
+        MotionStats.distance
+    ].to_numpy() == pytest.approx([20])
+
+
+def test_compute_player_motion_smoothing() -> None:
+    rows = _run(10, [5.0] * 100)
+    for idx in range(0, len(rows), 2):
+        rows[idx][5] += 30
+    tracking_df = _tracking(rows)
+
+    raw_df = compute_player_motion(tracking_df)
+    smooth_df = compute_player_motion(tracking_df, smoothing_frames=4)
+
+    assert raw_df[MotionStats.max_speed].iloc[0] > 9
+    assert raw_df[MotionStats.sprints].iloc[0] == 1
+    assert smooth_df[MotionStats.distance].iloc[0] == pytest.approx(20, rel=0.02)
+    assert smooth_df[MotionStats.max_speed].iloc[0] < 5.5
+    assert smooth_df[MotionStats.sprints].iloc[0] == 0
+
+    with pytest.raises(ValueError):
+        compute_player_motion(tracking_df, smoothing_frames=0)
+
+
+def test_compute_player_motion_test_tracking() -> None:
+    tracking_df = get_test_tracking()
+    motion_df = compute_player_motion(tracking_df)
+
+    players_df = tracking_df[tracking_df[TrackedPosition.player_id] != -1].astype(np.float64)
+    step = np.hypot(
+        players_df.groupby(TrackedPosition.player_id)[TrackedPosition.x].diff(),
+        players_df.groupby(TrackedPosition.player_id)[TrackedPosition.y].diff(),
+    )
+    expected = (step / 100).groupby(players_df[TrackedPosition.player_id]).sum()
+
+    assert len(motion_df) == 22
+    assert motion_df[MotionStats.distance].droplevel(0).sort_index().to_numpy() == pytest.approx(
+        expected.to_numpy()
+    )
+    pd.testing.assert_frame_equal(
+        compute_player_motion(tracking_df.astype(CompactTrackedPosition.column_types())),
+        motion_df,
+    )
+    pd.testing.assert_frame_equal(
+        compute_player_motion(TrackingCleaner().clean(tracking_df)), motion_df
+    )
+    assert compute_player_motion(tracking_df.iloc[:0]).empty
@@ -0,0 +1,94 @@
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.ball_tracker import BallTrajectoryIndex
+from src.analysis.possession import (
+    POSSESSION_COL,
+    Possession,
+    assign_possessions,
+    compute_possessions,
+)
+from src.utils import event_utils
+from tests.utils import get_event_df, get_test_events, get_test_tracking
+
+_EVENTS: List[List[Any]] = [
+    [0, 1, 0.0, 11, 1, "Kick Off"],
+    [1, 1, 0.0, 11, 1, "Pass"],
+    [2, 1, 1.0, 12, 1, "Reception"],
+    [3, 1, 2.0, 12, 1, "Cross"],
+    [4, 1, 3.0, 21, 2, "Clearance"],
+    [5, 1, 4.0, 22, 2, "Reception"],
+    [6, 1, 5.0, 22, 2, "Pass"],
+    [7, 1, 6.0, 11, 1, "Reception"],
+    [8, 1, 7.0, 11, 1, "Attempt at Goal"],
+    [9, 1, 8.0, None, None, "Ball Out of Play"],
+    [10, 2, 9.0, 21, 2, "Kick Off"],
+    [11, 2, 9.5, 21, 2, "Pass"],
+    [12, 2, 10.0, None, None, "Ball Progression"],
+    [13, 2, 11.0, 22, 2, "Reception"],
+]
+
+
+def test_assign_possessions() -> None:
+    events_df = get_event_df(_EVENTS)
+
+    possessions_df = assign_possessions(events_df.iloc[::-1])
+
+    pd.testing.assert_frame_equal(possessions_df.drop(columns=POSSESSION_COL), events_df)
+    assert possessions_df[POSSESSION_COL].tolist() == [0, 0, 0, 0, 0, 1, 1, 2, 2, 3, 4, 4, 4, 4]
+
+
+def test_compute_possessions() -> None:
+    possessions_df = compute_possessions(get_event_df(_EVENTS))
+
+    assert possessions_df.columns.tolist() == Possession.columns()
+    assert possessions_df.index.tolist() == [0, 1, 2, 3, 4]
+    assert possessions_df[Possession.team_id].tolist() == [1, 2, 1, -1, 2]
+    assert possessions_df[Possession.start_event_id].tolist() == [0, 5, 7, 9, 10]
+    assert possessions_df[Possession.end_event_id].tolist() == [4, 6, 8, 9, 13]
+    assert possessions_df[Possession.events].tolist() == [5, 2, 2, 1, 4]
+    assert possessions_df[Possession.duration].tolist() == [3.0, 1.0, 1.0, 0.0, 2.0]
+    assert possessions_df[Possession.passes].tolist() == [2, 1, 0, 0, 1]
+    assert possessions_df[Possession.trajectory_length].isna().all()
+
+    assert compute_possessions(get_event_df(_EVENTS).iloc[:0]).empty
+
+
+def test_compute_possessions_season() -> None:
+    match_df = get_event_df(_EVENTS)
+    season_df = pd.concat([match_df.assign(match="b"), match_df.iloc[:3].assign(match="a")])
+
+    possessions_df = compute_possessions(season_df, match_col="match")
+
+    assert possessions_df.columns.tolist() == ["match", *Possession.columns()]
+    assert possessions_df["match"].tolist() == ["a", "b", "b", "b", "b", "b"]
+    assert possessions_df[Possession.start_event_id].tolist() == [0, 0, 5, 7, 9, 10]
+    pd.testing.assert_frame_equal(
+        possessions_df.iloc[1:].drop(columns="match").reset_index(drop=True),
+        compute_possessions(match_df).reset_index(drop=True),
+    )
+
+
+def test_possession_trajectory_length() -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    events_with_positions = event_utils.add_position_to_event(events_df, get_test_tracking())
+
+    possessions_df = compute_possessions(events_with_positions)
+
+    trajectory_index = BallTrajectoryIndex(events_with_positions)
+    expected = [
+        trajectory_index.distance_between_ids(start - 1, end + 1) / 100
+        for start, end in possessions_df[
+            [Possession.start_event_id, Possession.end_event_id]
+        ].to_numpy()
+    ]
+    assert np.count_nonzero(possessions_df[Possession.trajectory_length]) > 0
+    assert possessions_df[Possession.trajectory_length].tolist() == pytest.approx(expected)
+    assert (
+        possessions_df[Possession.start_event_id] <= possessions_df[Possession.end_event_id]
+    ).all()
+    assert possessions_df[Possession.events].sum() == len(events_df)
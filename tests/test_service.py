@@ -0,0 +1,229 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from src.analysis.ball_tracker import TrajectoryMode, compute_ball_trajectory_between_events
+from src.main import add_positions, load_match_data, solve_match
+from src.service import (
+    LRUCache,
+    MatchData,
+    MatchQueryServer,
+    MatchQueryService,
+    QueryError,
+)
+from src.utils.tracking_store import TrackingStore
+from tests.utils import get_test_tracking, write_tracking_csv
+
+
+def _make_match_dir(match_dir: Path) -> Path:
+    match_dir.mkdir(parents=True)
+    shutil.copy(Path(__file__).parent / "test_data/events.csv", match_dir)
+    write_tracking_csv(get_test_tracking(), match_dir / "tracking.csv")
+    return match_dir
+
+
+def test_match_query_service(tmp_path: Path) -> None:
+    match_dir = _make_match_dir(tmp_path / "match_1")
+    results = solve_match(match_dir)
+    service = MatchQueryService(tmp_path)
+
+    trajectory = service.query(
+        "/trajectory", {"match": "match_1", "start": "Kick Off", "end": "Ball Out of Play"}
+    )
+    assert trajectory["length"] == results.kickoff_trajectory_length
+
+    leaderboard = service.query("/leaderboard", {"match": "match_1", "k": "2"})
+    assert len(leaderboard) == 2
+    assert leaderboard[0]["player_id"] == results.most_passes_player_id
+    assert leaderboard[0]["passes"] == results.most_passes
+    best_completion = service.query(
+        "/leaderboard", {"match": "match_1", "metric": "completion_rate"}
+    )
+    assert best_completion[0]["player_id"] == results.best_completion_player_id
+
+    events = service.query("/events", {"match": "match_1", "first_id": "2", "last_id": "4"})
+    assert [event["event_id"] for event in events] == [2, 3, 4]
+    assert {"x", "y", "pass_status"} <= set(events[0])
+    assert len(service.query("/events", {"match": "match_1"})) == 11
+
+    assert [match["match"] for match in service.query("/matches", {})] == [str(match_dir)]
+    assert len(service.results) == 5
+    assert service.query("/leaderboard", {"k": "2", "match": "match_1"}) is leaderboard
+
+    for params in [
+        {"match": "match_1", "metric": "unknown"},
+        {"match": "match_1", "k": "x"},
+        {"match": "../match_1"},
+        {},
+    ]:
+        with pytest.raises(QueryError):
+            service.query("/leaderboard", params)
+    for params in [
+        {"match": "match_1", "start": "Kick Off", "end": "Corner"},
+        {"match": "match_1", "start": "Kick Off", "start_n": "1", "end": "Ball Out of Play"},
+        {"match": "match_1", "start": "Kick Off"},
+        {"match": "match_1", "start": "Kick Off", "end": "Ball Out of Play", "mode": "x"},
+    ]:
+        with pytest.raises(QueryError):
+            service.query("/trajectory", params)
+    with pytest.raises(QueryError):
+        service.query("/events", {"match": "match_1", "first_id": "first"})
+    with pytest.raises(LookupError):
+        service.query("/unknown", {"match": "match_1"})
+    with pytest.raises(FileNotFoundError):
+        service.query("/leaderboard", {"match": "missing_match"})
+
+
+def test_match_query_service_frames_trajectory(tmp_path: Path) -> None:
+    match_dir = _make_match_dir(tmp_path / "match_1")
+    events_df, tracking_df = load_match_data(match_dir)
+    assert isinstance(tracking_df, pd.DataFrame)
+    expected = compute_ball_trajectory_between_events(
+        add_positions(events_df, tracking_df),
+        ("Kick Off", 0),
+        ("Ball Out of Play", 0),
+        mode=TrajectoryMode.FRAMES,
+        tracking_store=TrackingStore.build(tracking_df, tmp_path / "store"),
+    )
+    service = MatchQueryService(tmp_path)
+
+    trajectory = service.query(
+        "/trajectory",
+        {"match": "match_1", "start": "Kick Off", "end": "Ball Out of Play", "mode": "frames"},
+    )
+    assert trajectory["mode"] == "frames"
+    assert trajectory["length"] == expected > 0
+    match = service.match(match_dir)
+    assert match.nbytes > match.tracking_store.positions.nbytes > 0
+
+
+def test_match_query_service_evicts_matches(tmp_path: Path) -> None:
+    _make_match_dir(tmp_path / "match_1")
+    match_dir_2 = _make_match_dir(tmp_path / "match_2")
+    service = MatchQueryService(tmp_path, max_match_bytes=1)
+
+    service.query("/leaderboard", {"match": "match_1"})
+    service.query("/leaderboard", {"match": "match_2"})
+
+    assert [match["match"] for match in service.query("/matches", {})] == [str(match_dir_2)]
+
+
+def test_lru_cache() -> None:
+    cache = LRUCache(max_size=3)
+    for key in ["a", "b", "c"]:
+        cache.get_or_compute(key, lambda: key.upper())
+
+    assert cache.get_or_compute("a", lambda: "new") == "A"
+    cache.get_or_compute("d", lambda: "D", size=lambda _: 2)
+    assert [key for key, _ in cache.items()] == ["a", "d"]
+
+
+def test_lru_cache_computes_once() -> None:
+    cache = LRUCache(max_size=3)
+    computing = threading.Event()
+    release = threading.Event()
+    calls: List[str] = []
+
+    def compute() -> str:
+        calls.append("e")
+        computing.set()
+        release.wait(timeout=10)
+        return "E"
+
+    results: List[str] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("e", compute)))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    computing.wait(timeout=10)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["e"]
+    assert results == ["E"] * 4
+    assert len(cache) == 1
+
+    def fail() -> str:
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("f", fail)
+    assert cache.get_or_compute("f", lambda: "F") == "F"
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[Tuple[str, Path]]:
+    _make_match_dir(tmp_path / "match_1")
+    with MatchQueryServer(("127.0.0.1", 0), MatchQueryService(tmp_path)) as query_server:
+        thread = threading.Thread(target=query_server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{query_server.server_address[1]}", tmp_path
+        query_server.shutdown()
+        thread.join()
+
+
+def _get(url: str) -> Any:
+    with urlopen(url, timeout=10) as response:
+        return json.load(response)
+
+
+def test_match_query_server(server: Tuple[str, Path]) -> None:
+    url, _ = server
+    params = urlencode({"match": "match_1", "start": "Kick Off", "end": "Ball Out of Play"})
+
+    assert _get(f"{url}/trajectory?{params}")["length"] > 0
+    assert _get(f"{url}/trajectory?{params}&mode=frames")["length"] > 0
+
+    with pytest.raises(HTTPError) as bad_request:
+        _get(f"{url}/leaderboard?match=match_1&metric=unknown")
+    assert bad_request.value.code == 400
+    assert "Unknown metric" in json.load(bad_request.value)["error"]
+
+    with pytest.raises(HTTPError) as not_found:
+        _get(f"{url}/unknown")
+    assert not_found.value.code == 404
+
+    with pytest.raises(HTTPError) as missing_match:
+        _get(f"{url}/leaderboard?match=missing_match")
+    assert missing_match.value.code == 404
+    assert "No match data" in json.load(missing_match.value)["error"]
+
+
+def test_match_query_server_error(
+    server: Tuple[str, Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    url, _ = server
+
+    def unreadable_match(*_: Any) -> MatchData:
+        raise OSError("unreadable")
+
+    monkeypatch.setattr(MatchQueryService, "match", unreadable_match)
+
+    with pytest.raises(HTTPError) as error:
+        _get(f"{url}/leaderboard?match=match_1")
+    assert error.value.code == 500
+    assert json.load(error.value)["error"] == "OSError: unreadable"
+
+
+def test_match_query_server_load_error(server: Tuple[str, Path]) -> None:
+    url, root_dir = server
+    match_dir = _make_match_dir(root_dir / "match_2")
+    with open(match_dir / "tracking.csv", "a", encoding="utf-8") as tracking_file:
+        tracking_file.write("1,10000,358112,1935290,left,right\n")
+
+    # The match fails to load, the query itself is valid.
+    with pytest.raises(HTTPError) as error:
+        _get(f"{url}/leaderboard?match=match_2")
+    assert error.value.code == 500
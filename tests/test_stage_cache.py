@@ -0,0 +1,93 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src import main
+from src.main import solve_match
+from src.utils.stage_cache import StageCache
+from tests.utils import get_test_tracking, write_tracking_csv
+
+
+def test_stage_cache_get_or_compute(tmp_path: Path) -> None:
+    stage_cache = StageCache(tmp_path / "cache")
+    calls = []
+
+    def compute() -> list:
+        calls.append(1)
+        return [1, 2, 3]
+
+    assert stage_cache.get_or_compute("stage", ["input", 1], compute) == [1, 2, 3]
+    assert stage_cache.get_or_compute("stage", ["input", 1], compute) == [1, 2, 3]
+    assert len(calls) == 1
+
+    stage_cache.get_or_compute("stage", ["input", 2], compute)
+    stage_cache.get_or_compute("other_stage", ["input", 1], compute)
+    assert len(calls) == 3
+
+
+def test_stage_cache_file_key(tmp_path: Path) -> None:
+    stage_cache = StageCache(tmp_path / "cache")
+    data_file = tmp_path / "data.csv"
+    data_file.write_text("a,b\n1,2\n")
+    key = stage_cache.file_key(data_file)
+
+    copied_file = tmp_path / "copied.csv"
+    shutil.copy(data_file, copied_file)
+    assert stage_cache.file_key(copied_file) == key
+
+    os.utime(data_file, ns=(0, 0))
+    assert stage_cache.file_key(data_file) == key
+
+    data_file.write_text("a,b\n1,3\n")
+    assert stage_cache.file_key(data_file) != key
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    stage_cache = StageCache(tmp_path / "cache", max_bytes=2500)
+    for idx, stage in enumerate(["first", "second"]):
+        stage_cache.get_or_compute(stage, [], lambda: bytes(1000))
+        # Order the outputs without relying on the clock resolution.
+        os.utime(stage_cache.cache_dir / f"{StageCache.key(stage, [])}.pkl", ns=(idx, idx))
+    stage_cache.get_or_compute("first", [], bytes)
+    stage_cache.get_or_compute("third", [], lambda: bytes(1000))
+
+    calls = []
+    for stage in ["first", "third", "second"]:
+        stage_cache.get_or_compute(stage, [], lambda: calls.append(stage))
+    assert calls == ["second"]
+
+
+def test_solve_match_with_stage_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    match_dir = tmp_path / "match"
+    match_dir.mkdir()
+    shutil.copy(Path(__file__).parent / "test_data/events.csv", match_dir)
+    write_tracking_csv(get_test_tracking(), match_dir / "tracking.csv")
+    stage_cache = StageCache(tmp_path / "cache")
+
+    results = solve_match(match_dir)
+    assert solve_match(match_dir, stage_cache=stage_cache) == results
+
+    def load_match_data(*args: object) -> None:
+        raise AssertionError("Unchanged match data must not be loaded")
+
+    monkeypatch.setattr(main, "load_match_data", load_match_data)
+    assert solve_match(match_dir, stage_cache=stage_cache) == results
+
+
+def test_solve_match_compact_dtypes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    match_dir = tmp_path / "match"
+    match_dir.mkdir()
+    shutil.copy(Path(__file__).parent / "test_data/events.csv", match_dir)
+    write_tracking_csv(get_test_tracking(), match_dir / "tracking.csv")
+    stage_cache = StageCache(tmp_path / "cache")
+    results = solve_match(match_dir, stage_cache=stage_cache)
+
+    monkeypatch.setenv("COMPACT_DTYPES", "1")
+    monkeypatch.setenv("TRACKING_CHUNK_FRAMES", "60")
+    assert solve_match(match_dir) == results
+    # Outputs of the compact types are cached separately.
+    assert len(list(stage_cache.cache_dir.glob("*.pkl"))) == 3
+    assert solve_match(match_dir, stage_cache=stage_cache) == results
+    assert len(list(stage_cache.cache_dir.glob("*.pkl"))) == 6
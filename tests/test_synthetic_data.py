@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_match
+from src.main import load_csv_data, load_match_data, solve_challenges
+from src.metadata import Event, EventType, TrackedPosition
+from src.utils.tracking_utils import ROWS_PER_FRAME
+
+
+def test_generate_match(tmp_path: Path) -> None:
+    generate_match(tmp_path, minutes=1, seed=3)
+    tracking_df = load_csv_data(tmp_path / "tracking.csv", TrackedPosition.column_types())
+
+    assert len(tracking_df) == 60 * 25 * ROWS_PER_FRAME
+    frames = tracking_df.to_numpy(dtype=np.int64).reshape(-1, ROWS_PER_FRAME, 6)
+    assert (frames[:, :, 1] == frames[:, :1, 1]).all()
+    assert (np.diff(frames[:, 0, 1]) == 40).all()
+    assert (frames[:, 0, 2:] == -1).all()
+    assert len(np.unique(tracking_df[TrackedPosition.player_id])) == 23
+
+    events_df, tracking_df = load_match_data(tmp_path)
+    assert isinstance(tracking_df, pd.DataFrame)
+    # Delimiter rows are dropped at load time.
+    assert len(tracking_df) == 60 * 25 * (ROWS_PER_FRAME - 1)
+
+    assert events_df[Event.event].isin(list(EventType)).all()
+    assert events_df[Event.event].iloc[0] == EventType.KICK_OFF
+    assert events_df[Event.time].iloc[0] == 0
+    assert events_df[Event.time].iloc[-1] < 60 * 1000
+    assert set(events_df[Event.player_id].dropna()) <= set(tracking_df[TrackedPosition.player_id])
+
+    results = solve_challenges(events_df, tracking_df)
+    assert results.most_passes > 0
@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.main import load_csv_data
+from src.metadata import CompactTrackedPosition, TrackedPosition
+from src.utils import columnar_cache, tracking_index
+from src.utils.tracking_index import (
+    build_time_index,
+    frame_time_range,
+    index_path_for,
+    load_time_index,
+    load_tracking_range,
+)
+from tests.utils import get_test_tracking, write_tracking_csv
+
+
+def _expected_range(tracking_df: pd.DataFrame, start_time: int, end_time: int) -> pd.DataFrame:
+    times = tracking_df[TrackedPosition.time]
+    return tracking_df[(times >= start_time) & (times <= end_time)].reset_index(drop=True)
+
+
+@pytest.mark.parametrize(
+    "start_time,end_time",
+    [(0, 39), (1000, 2500), (1020, 1020), (2000, 10**6), (10**6, 2 * 10**6), (50, 30)],
+)
+def test_load_tracking_range(tmp_path: Path, start_time: int, end_time: int) -> None:
+    tracking_csv = write_tracking_csv(get_test_tracking(n_frames=100), tmp_path / "tracking.csv")
+    tracking_df = load_csv_data(tracking_csv, TrackedPosition.column_types())
+    expected = _expected_range(tracking_df, start_time, end_time)
+
+    # A small stride makes the range span several indexed rows.
+    load_time_index(tracking_csv, stride=7)
+    pd.testing.assert_frame_equal(
+        load_tracking_range(tracking_csv, start_time, end_time, use_cache=False), expected
+    )
+    assert not columnar_cache.cache_dir_for(tracking_csv).exists()
+
+    load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True)
+    pd.testing.assert_frame_equal(load_tracking_range(tracking_csv, start_time, end_time), expected)
+
+    columns = [TrackedPosition.player_id, TrackedPosition.x]
+    pd.testing.assert_frame_equal(
+        load_tracking_range(tracking_csv, start_time, end_time, columns),
+        expected[columns],
+    )
+    pd.testing.assert_frame_equal(
+        load_tracking_range(tracking_csv, start_time, end_time, columns, use_cache=False),
+        expected[columns],
+    )
+
+
+def test_load_tracking_range_compact(tmp_path: Path) -> None:
+    tracking_csv = write_tracking_csv(get_test_tracking(n_frames=20), tmp_path / "tracking.csv")
+    column_dtypes = CompactTrackedPosition.column_types()
+    start_time, end_time = frame_time_range(5, 9)
+    expected = _expected_range(load_csv_data(tracking_csv, column_dtypes), start_time, end_time)
+
+    assert (start_time, end_time) == (200, 399)
+    assert len(expected) == 5 * 23
+    pd.testing.assert_frame_equal(
+        load_tracking_range(tracking_csv, start_time, end_time, column_dtypes=column_dtypes),
+        expected,
+    )
+    assert len(load_tracking_range(tracking_csv, column_dtypes=column_dtypes)) == 20 * 23
+
+
+def test_load_tracking_range_restarting_time(tmp_path: Path) -> None:
+    first_half = get_test_tracking(n_frames=10)
+    second_half = first_half.assign(**{TrackedPosition.half_time: 2})
+    tracking_csv = write_tracking_csv(
+        pd.concat([first_half, second_half], ignore_index=True), tmp_path / "tracking.csv"
+    )
+    tracking_df = load_csv_data(tracking_csv, TrackedPosition.column_types(), use_cache=True)
+    column_dtypes = TrackedPosition.column_types()
+
+    # The cached time isn't sorted, so its rows aren't searched in the cache.
+    assert columnar_cache.read_cache(tracking_csv, column_dtypes) is not None
+    assert (
+        columnar_cache.find_sorted_rows(tracking_csv, column_dtypes, TrackedPosition.time, 0, 3)
+        is None
+    )
+    # A frame or two in both the halves.
+    for start_time, end_time, rows in [(0, 3, 2 * 23), (40, 80, 4 * 23)]:
+        expected = _expected_range(tracking_df, start_time, end_time)
+        assert len(expected) == rows
+        pd.testing.assert_frame_equal(
+            load_tracking_range(tracking_csv, start_time, end_time), expected
+        )
+        pd.testing.assert_frame_equal(
+            load_tracking_range(tracking_csv, start_time, end_time, use_cache=False), expected
+        )
+
+
+def test_time_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    tracking_csv = write_tracking_csv(get_test_tracking(n_frames=10), tmp_path / "tracking.csv")
+
+    index = build_time_index(tracking_csv, stride=23)
+    assert index.times.tolist() == [frame * 40 for frame in range(10)]
+    # Scanning the file in blocks smaller than a line finds the same rows.
+    monkeypatch.setattr(tracking_index, "_BLOCK_SIZE", 7)
+    assert build_time_index(tracking_csv, stride=23).offsets.tolist() == index.offsets.tolist()
+    monkeypatch.undo()
+    with open(tracking_csv, "rb") as tracking_file:
+        tracking_file.seek(int(index.offsets[3]))
+        assert tracking_file.readline().startswith(b"1,120,-1,")
+
+    load_time_index(tracking_csv, stride=23)
+    assert index_path_for(tracking_csv).is_file()
+
+    # Changed file rebuilds the saved index.
+    with open(tracking_csv, "a", encoding="utf-8") as tracking_file:
+        tracking_file.write("1,400,-1,-1,-1,-1\n\n")
+    stat = tracking_csv.stat()
+    os.utime(tracking_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_time_index(tracking_csv, stride=23).times[-1] == 400
+
+    with open(tracking_csv, "a", encoding="utf-8") as tracking_file:
+        tracking_file.write("1,0,-1,-1,-1,-1\n")
+    with pytest.raises(ValueError):
+        build_time_index(tracking_csv, stride=1)
+    with pytest.raises(ValueError):
+        build_time_index(tracking_csv, stride=0)
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metadata import Event, TrackedPosition
+from src.utils import event_utils
+from src.utils.tracking_store import MISSING_POSITION, TrackingStore
+from tests.utils import get_test_events, get_test_tracking, write_tracking_csv
+
+
+def _get_test_events_in_ms() -> pd.DataFrame:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    return events_df
+
+
+def test_build_tracking_store(tmp_path: Path) -> None:
+    tracking_df = get_test_tracking(n_frames=10)
+    store = TrackingStore.build(tracking_df, tmp_path)
+
+    assert store.first_frame == 0
+    assert store.n_frames == 10
+    assert store.positions.shape == (10, 22, 2)
+    assert store.positions.dtype == np.int16
+    assert -1 not in store.player_ids
+
+    player_row = tracking_df.iloc[24]
+    coords, found = store.lookup(
+        np.array([player_row[TrackedPosition.time] // 40, 5, 10]),
+        np.array(
+            [player_row[TrackedPosition.player_id], 123, player_row[TrackedPosition.player_id]]
+        ),
+    )
+    assert found.tolist() == [True, False, False]
+    assert coords[0].tolist() == [player_row[TrackedPosition.x], player_row[TrackedPosition.y]]
+    assert coords[1].tolist() == [MISSING_POSITION, MISSING_POSITION]
+
+
+def test_store_position_with_missing_y(tmp_path: Path) -> None:
+    tracking_df = get_test_tracking(n_frames=3)
+    player_row = tracking_df.iloc[24]
+    tracking_df.loc[24, TrackedPosition.y] = pd.NA
+    store = TrackingStore.build(tracking_df, tmp_path)
+
+    coords, found = store.lookup(
+        np.array([player_row[TrackedPosition.time] // 40] * 2),
+        np.array([player_row[TrackedPosition.player_id], tracking_df.iloc[25][Event.player_id]]),
+    )
+    assert found.tolist() == [False, True]
+    assert coords[0].tolist() == [player_row[TrackedPosition.x], MISSING_POSITION]
+
+    events_df = get_test_events().iloc[:1]
+    events_df = events_df.assign(
+        **{
+            Event.time: player_row[TrackedPosition.time],
+            Event.player_id: player_row[TrackedPosition.player_id],
+        }
+    )
+    events_with_positions = store.add_position_to_event(events_df)
+    assert events_with_positions[TrackedPosition.x].isna().all()
+    assert events_with_positions[TrackedPosition.y].isna().all()
+
+
+def test_store_add_position_to_event(tmp_path: Path) -> None:
+    events_df = _get_test_events_in_ms()
+    tracking_df = get_test_tracking()
+    TrackingStore.from_csv(
+        write_tracking_csv(tracking_df, tmp_path / "tracking.csv"),
+        tmp_path / "store",
+        chunksize=100,
+    )
+
+    expected = event_utils.add_position_to_event(events_df, tracking_df)
+    events_with_positions = TrackingStore(tmp_path / "store").add_position_to_event(events_df)
+
+    pd.testing.assert_frame_equal(events_with_positions, expected)
+    assert (
+        events_with_positions[TrackedPosition.x].isna().tolist()
+        == events_df[Event.player_id].isna().tolist()
+    )
+
+
+def test_store_rejects_duplicate_positions(tmp_path: Path) -> None:
+    tracking_df = get_test_tracking(n_frames=10)
+    # Second half with the time restarting from 0 repeats the frames.
+    second_half_df = tracking_df.assign(**{TrackedPosition.half_time: 2})
+    with pytest.raises(ValueError, match="more than once in frame 0"):
+        TrackingStore.build(pd.concat([tracking_df, second_half_df]), tmp_path / "store")
+
+    tracking_csv = write_tracking_csv(
+        pd.concat([tracking_df, second_half_df]), tmp_path / "tracking.csv"
+    )
+    with pytest.raises(ValueError, match="more than once"):
+        TrackingStore.from_csv(tracking_csv, tmp_path / "csv_store", chunksize=50)
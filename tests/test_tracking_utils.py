@@ -0,0 +1,69 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.main import load_csv_data
+from src.metadata import TrackedPosition
+from src.utils import event_utils
+from src.utils.cleaning import TrackingCleaner
+from src.utils.tracking_utils import ROWS_PER_FRAME, read_tracking_chunks
+from tests.utils import get_test_events, get_test_tracking, write_tracking_csv
+
+
+def test_read_tracking_chunks(tmp_path: Path) -> None:
+    tracking_csv = write_tracking_csv(get_test_tracking(n_frames=50), tmp_path / "tracking.csv")
+    # Drop a row so that the frames don't line up with the chunk size.
+    tracking_df = (
+        load_csv_data(tracking_csv, TrackedPosition.column_types())
+        .drop(index=30)
+        .reset_index(drop=True)
+    )
+    write_tracking_csv(tracking_df, tracking_csv)
+
+    chunks = list(read_tracking_chunks(tracking_csv, frames_per_chunk=7))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 8 * ROWS_PER_FRAME
+    for chunk, next_chunk in zip(chunks, chunks[1:]):
+        assert chunk[TrackedPosition.time].iloc[-1] < next_chunk[TrackedPosition.time].iloc[0]
+    pd.testing.assert_frame_equal(pd.concat(chunks), tracking_df)
+
+
+def test_read_tracking_chunks_cleaned_away(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    tracking_df = get_test_tracking(n_frames=40)
+    # Frames with only the delimiter row, the first chunks are cleaned away.
+    delimiter_frames = tracking_df[tracking_df[TrackedPosition.player_id] == -1]
+    is_kept = tracking_df[TrackedPosition.time] >= 30 * 40
+    tracking_df = pd.concat(
+        [tracking_df[is_kept], delimiter_frames[~is_kept[delimiter_frames.index]]]
+    ).sort_index(kind="stable")
+    tracking_csv = write_tracking_csv(tracking_df, tmp_path / "tracking.csv")
+    tracking_df = load_csv_data(tracking_csv, TrackedPosition.column_types())
+
+    cleaner = TrackingCleaner()
+    with caplog.at_level(logging.INFO, logger="src.utils.tracking_utils"):
+        chunks = list(read_tracking_chunks(tracking_csv, frames_per_chunk=1, cleaner=cleaner))
+
+    expected_cleaner = TrackingCleaner()
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected_cleaner.clean(tracking_df))
+    assert cleaner.report.to_dict() == expected_cleaner.report.to_dict()
+    assert str(cleaner.report) in caplog.text
+
+
+def test_add_position_to_event_from_chunks(tmp_path: Path) -> None:
+    events_df = get_test_events()
+    events_df = event_utils.convert_event_time_to_ms(events_df)
+    tracking_df = get_test_tracking()
+    tracking_csv = write_tracking_csv(tracking_df, tmp_path / "tracking.csv")
+
+    pd.testing.assert_frame_equal(
+        event_utils.add_position_to_event_from_chunks(
+            events_df, read_tracking_chunks(tracking_csv, frames_per_chunk=20)
+        ),
+        event_utils.add_position_to_event(events_df, tracking_df),
+    )
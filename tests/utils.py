@@ -1,10 +1,11 @@
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, List
 
+import numpy as np
 import pandas as pd
 from pandas.api.types import pandas_dtype
 
-from src.metadata import Event
+from src.metadata import Event, TrackedPosition
 
 
 def get_event_df(rows: List[List[Any]]) -> pd.DataFrame:
@@ -30,3 +31,45 @@ def get_test_events() -> pd.DataFrame:
         names=Event.columns(),
         dtype=Event.column_types(),
     )
+
+
+def get_random_events(n_events: int, seed: int, last_event: str) -> pd.DataFrame:
+    """Passing events of 5 players a second apart with random teams and names, then last_event."""
+    rng = np.random.default_rng(seed)
+    event_names = ["Pass", "Cross", "Reception", "Clearance", "Interception"]
+    rows: List[List[Any]] = [
+        [i, 1, 600.0 + i, 1000 + i % 5, int(rng.integers(2)), rng.choice(event_names)]
+        for i in range(n_events)
+    ]
+    rows.append([n_events, 1, 600.0 + n_events, 1000, 0, last_event])
+    return get_event_df(rows)
+
+
+# Players of the test events and the rest of their teams.
+TEST_TEAMS: Dict[int, List[int]] = {
+    1935290: [358112, 339987, 270948, 398681] + list(range(100001, 100008)),
+    1884426: [439538, 395433] + list(range(200001, 200010)),
+}
+
+
+def get_test_tracking(n_frames: int = 250) -> pd.DataFrame:
+    """Tracking data for the test events, a delimiter row and 22 players every 40ms."""
+    rows: List[List[int]] = []
+    for frame in range(n_frames):
+        rows.append([1, frame * 40, -1, -1, -1, -1])
+        for team_id, player_ids in TEST_TEAMS.items():
+            for player_id in player_ids:
+                x = (player_id % 97 * 113 + frame * 7) % 10500
+                y = (player_id % 89 * 71 + frame * 3) % 6800
+                rows.append([1, frame * 40, player_id, team_id, x, y])
+
+    return pd.DataFrame(rows, columns=TrackedPosition.columns()).astype(
+        TrackedPosition.column_types()
+    )
+
+
+def write_tracking_csv(tracking_df: pd.DataFrame, csv_path: Path) -> Path:
+    tracking_df.to_csv(
+        csv_path, header=["id_half", "t", "id_actor", "id_team", "x", "y"], index=False
+    )
+    return csv_path